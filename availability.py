@@ -0,0 +1,193 @@
+"""
+This module defines the AvailabilityIndex class.
+
+The AvailabilityIndex keeps the reservations of every (hotel_id, room_id) pair sorted by
+start date, so overlap checks use binary search instead of scanning every reservation
+of every hotel. Dates are held as ordinal day numbers (see dates.py) in typed arrays,
+parsed once when a reservation enters the index. The index also groups the reservations by
+hotel and by customer, so listing or deleting the k reservations of one takes O(k).
+Temporary holds (see holds.py) are not indexed here, but the overlap checks count them.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from dates import parse_date, parse_period
+
+
+class RoomIntervals:
+    """
+    Sorted start/end arrays for the reservations of a single room.
+
+    Reservations of one room are normally disjoint (reserve_room refuses overlaps), which
+    means sorting them by start date also sorts them by end date. While that holds, the
+    conflicts of a query are a contiguous slice found with two bisects. If overlapping
+    reservations were written by other means the room falls back to a filtered scan of
+    the reservations that start before the query ends.
+    """
+
+    def __init__(self):
+        """Initializes an empty set of intervals."""
+        self.starts = array('l')
+        self.ends = array('l')
+        self.records = []
+        self.disjoint = True
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record, start, end):
+        """Inserts a reservation record and its ordinal dates, keeping the arrays sorted."""
+        position = bisect_right(self.starts, start)
+        if self.disjoint and (
+                end < start
+                or (position > 0 and self.ends[position - 1] >= start)
+                or (position < len(self.starts) and self.starts[position] <= end)):
+            self.disjoint = False
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.records.insert(position, record)
+
+    def remove(self, record, start):
+        """Removes a reservation record previously added with the given start date."""
+        position = bisect_left(self.starts, start)
+        while self.records[position] is not record:
+            position += 1
+        del self.starts[position]
+        del self.ends[position]
+        del self.records[position]
+        if not self.disjoint:
+            self.disjoint = all(
+                start <= end for start, end in zip(self.starts, self.ends)
+            ) and all(
+                self.ends[i] < self.starts[i + 1] for i in range(len(self.starts) - 1)
+            )
+
+    def overlapping(self, start, end):
+        """Returns the records whose [start, end] ordinal range intersects the given one."""
+        upper = bisect_right(self.starts, end)
+        if self.disjoint:
+            lower = bisect_left(self.ends, start, 0, upper)
+            return self.records[lower:upper]
+        return [
+            record for record, record_end in zip(self.records[:upper], self.ends)
+            if record_end >= start
+        ]
+
+
+class AvailabilityIndex:
+    """Per-(hotel_id, room_id) interval index over reservation records."""
+
+    def __init__(self, reservations=(), holds=None):
+        """
+        Initializes the index with an iterable of reservation records.
+
+        Args:
+            reservations (iterable): Reservation dictionaries as stored in reservations.json.
+            holds (HoldRegistry): Holds counted by the overlap checks as well, if given.
+
+        Raises:
+            ValueError: If a reservation has a malformed date.
+        """
+        self._rooms = {}
+        self._by_id = {}
+        self._by_hotel = {}
+        self._by_customer = {}
+        self.holds = holds
+        for reservation in reservations:
+            self.add(reservation)
+
+    def __len__(self):
+        return sum(len(records) for records in self._by_id.values())
+
+    def add(self, reservation):
+        """
+        Adds a reservation record to the index.
+
+        Raises:
+            ValueError: If the reservation has a malformed date.
+        """
+        try:
+            start = parse_date(reservation['start_date'])
+            end = parse_date(reservation['end_date'])
+        except ValueError as error:
+            raise ValueError(f"Reservation {reservation['reservation_id']}: {error}") from None
+        key = (reservation['hotel_id'], reservation['room_id'])
+        room = self._rooms.get(key)
+        if room is None:
+            room = self._rooms[key] = RoomIntervals()
+        room.add(reservation, start, end)
+        reservation_id = reservation['reservation_id']
+        self._by_id.setdefault(reservation_id, []).append(reservation)
+        self._by_hotel.setdefault(reservation['hotel_id'], {})[reservation_id] = reservation
+        self._by_customer.setdefault(reservation['customer_id'], {})[reservation_id] = reservation
+
+    def discard(self, reservation_id):
+        """
+        Removes every record stored under a reservation ID.
+
+        Returns:
+            list: The removed reservation records, empty if the ID was not indexed.
+        """
+        removed = self._by_id.pop(reservation_id, [])
+        for reservation in removed:
+            key = (reservation['hotel_id'], reservation['room_id'])
+            room = self._rooms[key]
+            room.remove(reservation, parse_date(reservation['start_date']))
+            if not room:
+                del self._rooms[key]
+            for groups, group_key in ((self._by_hotel, reservation['hotel_id']),
+                                      (self._by_customer, reservation['customer_id'])):
+                group = groups.get(group_key, {})
+                group.pop(reservation_id, None)
+                if not group:
+                    groups.pop(group_key, None)
+        return removed
+
+    def of_hotel(self, hotel_id):
+        """Returns the reservation records of a hotel, in the order they were added."""
+        return list(self._by_hotel.get(hotel_id, {}).values())
+
+    def of_customer(self, customer_id):
+        """Returns the reservation records of a customer, in the order they were added."""
+        return list(self._by_customer.get(customer_id, {}).values())
+
+    def conflicts(self, hotel_id, room_id, start_date, end_date):
+        """
+        Finds the reservations and holds of a room that overlap the given period.
+
+        Dates are compared inclusively, so a stay ending on the day another one starts
+        counts as a conflict.
+
+        Returns:
+            list: The conflicting reservation records, ordered by start date, followed by
+            the conflicting holds.
+
+        Raises:
+            ValueError: If a date is malformed or the period ends before it starts.
+        """
+        start, end = parse_period(start_date, end_date)
+        room = self._rooms.get((hotel_id, room_id))
+        conflicts = [] if room is None else room.overlapping(start, end)
+        if self.holds is not None:
+            conflicts += self.holds.conflicts(hotel_id, room_id, start, end)
+        return conflicts
+
+    def is_free(self, hotel_id, room_id, start_date, end_date):
+        """Returns True if no reservation or hold of the room overlaps the given period."""
+        return not self.conflicts(hotel_id, room_id, start_date, end_date)
+
+    def intervals(self, hotel_id, room_id):
+        """
+        Returns the sorted start and end ordinals of a room's reservations.
+
+        The arrays are the index's own buffers (typecode 'l'), suitable for vectorized
+        checks, e.g. with numpy.frombuffer; they must not be modified.
+
+        Returns:
+            tuple: (starts, ends) arrays, empty if the room has no reservations.
+        """
+        room = self._rooms.get((hotel_id, room_id))
+        if room is None:
+            return array('l'), array('l')
+        return room.starts, room.ends
@@ -0,0 +1,370 @@
+"""
+This script benchmarks the booking operations on synthetic datasets of increasing size.
+
+For every scale (number of reservations) a dataset is generated with datagen.py in a
+temporary directory, the Hotel, Customer and Reservation classes are pointed at it, and
+each operation is run a fixed number of times. The report is printed (or written) as JSON
+with the load time, the peak resident memory and, per operation, the throughput and the
+p50/p99 latencies, together with the Python version and git commit, so runs can be compared
+between commits:
+
+    python benchmark.py --scales 100 1000 10000 100000 --operations 200 --output before.json
+
+Every scale runs in a fresh process so its peak memory is not inflated by the previous one.
+With the default JSON backend every write rewrites the whole file, so large scales with
+many operations take long; --backend journal or sqlite use incremental writes.
+
+With --workers, the dataset is also split into as many shards as workers and a burst of
+reserve_room calls is sent through a BookingEngine (see engine.py) for each worker count,
+to compare the throughput of one and several worker processes:
+
+    python benchmark.py --scales 100000 --workers 1 2 4 --engine-requests 20000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from customer import Customer
+from datagen import customer_id, hotel_id, room_id, write_dataset
+from dates import format_date, parse_date
+from engine import BookingEngine
+from hotel import Hotel
+from reservation import Reservation
+from sharding import ShardedStore
+from sqlite_storage import close_connections, migrate_json
+from storage import read_json
+from store import Store, use
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+BACKENDS = ('json', 'journal', 'sqlite')
+FREE_DAY = '2100-01-01'
+
+
+def percentile(ordered, percent):
+    """Return the nearest-rank percentile of a sorted list."""
+    if not ordered:
+        return 0
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(latencies):
+    """Return the throughput and latency statistics of a list of durations in ns."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'ops_per_sec': round(len(ordered) / (total / 1e9), 1) if total else 0.0,
+        'mean_us': round(total / len(ordered) / 1e3, 2) if ordered else 0.0,
+        'p50_us': round(percentile(ordered, 50) / 1e3, 2),
+        'p99_us': round(percentile(ordered, 99) / 1e3, 2),
+        'max_us': round(ordered[-1] / 1e3, 2) if ordered else 0.0,
+    }
+
+
+def time_calls(calls):
+    """Run (function, args) pairs one by one and return their statistics."""
+    latencies = []
+    clock = time.perf_counter_ns
+    for function, args in calls:
+        start = clock()
+        function(*args)
+        latencies.append(clock() - start)
+    return summarize(latencies)
+
+
+def peak_memory():
+    """Return the peak resident memory of the process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def open_store(directory, paths, backend):
+    """Return the store of a generated dataset, importing it into SQLite if needed."""
+    if backend == 'sqlite':
+        migrate_json(os.path.join(directory, 'hotel.db'), paths['hotels'], paths['customers'],
+                     paths['reservations'])
+    return Store.open(directory, backend)
+
+
+def operation_calls(config, rng):
+    """
+    Build the timed calls of every operation, in the order they are run.
+
+    Arguments are drawn before timing starts, so only the operations are measured.
+    """
+    count = config['operations']
+    hotels, rooms, customers = config['hotels'], config['rooms'], config['customers']
+    existing = list(Reservation.repository.records().values())
+    free_day = parse_date(FREE_DAY)
+    first_day, last_day = parse_date('2024-01-01'), parse_date('2024-12-31')
+
+    def random_room():
+        number = rng.randrange(hotels * rooms)
+        return hotel_id(number // rooms), room_id(number % rooms)
+
+    def random_period(nights):
+        start = rng.randint(first_day, last_day)
+        return format_date(start), format_date(start + nights - 1)
+
+    reserved = []
+
+    def reserve(*args):
+        reserved.append(Hotel.reserve_room(*args).record['reservation_id'])
+
+    def reserve_args(day):
+        hotel, room = random_room()
+        date = format_date(day)
+        return hotel, customer_id(rng.randrange(customers)), room, date, date
+
+    calls = {}
+    calls['reserve_room'] = [
+        (reserve, reserve_args(day)) for day in range(free_day, free_day + count)
+    ]
+    calls['reserve_room_conflict'] = [
+        (Hotel.reserve_room, (r['hotel_id'], customer_id(0), r['room_id'],
+                              r['start_date'], r['end_date']))
+        for r in (rng.choice(existing) for _ in range(count if existing else 0))
+    ]
+    calls['find_conflicts'] = [
+        (Reservation.find_conflicts, random_room() + random_period(3)) for _ in range(count)
+    ]
+    calls['find_available_rooms'] = [
+        (Hotel.find_available_rooms, (f"City {rng.randrange(50)}",) + random_period(3))
+        for _ in range(count)
+    ]
+    calls['get_hotel'] = [(Hotel.repository.get, (hotel_id(rng.randrange(hotels)),))
+                          for _ in range(count)]
+    calls['get_customer'] = [(Customer.repository.get, (customer_id(rng.randrange(customers)),))
+                             for _ in range(count)]
+    calls['get_reservation'] = [
+        (Reservation.repository.get, (rng.choice(existing)['reservation_id'],))
+        for _ in range(count if existing else 0)
+    ]
+    calls['modify_hotel'] = [
+        (lambda hotel, name: Hotel.modify_hotel_info(hotel, name=name),
+         (hotel_id(rng.randrange(hotels)), f"Renamed {n}"))
+        for n in range(count)
+    ]
+    calls['modify_customer'] = [
+        (lambda customer, phone: Customer.modify_customer_info(customer, phone=phone),
+         (customer_id(rng.randrange(customers)), f"+1-555-{n:07d}"))
+        for n in range(count)
+    ]
+    calls['cancel_reservation'] = [
+        (lambda n: Hotel.cancel_reservation(reserved[n]), (n,)) for n in range(count)
+    ]
+    calls['delete_customer'] = [
+        (Customer.delete_customer, (customer_id(number), True))
+        for number in rng.sample(range(customers), min(count, customers))
+    ]
+    calls['delete_hotel'] = [
+        (Hotel.delete_hotel, (hotel_id(number), True))
+        for number in rng.sample(range(hotels), min(count, hotels))
+    ]
+    return calls
+
+
+def shard_dataset(paths, directories, shared_directory, backend):
+    """Copy a generated dataset into the shards of a ShardedStore, one write per collection."""
+    sharded = ShardedStore.open(directories, shared_directory, backend)
+    shards = {name: ([], []) for name in sharded.shards}
+    for index, collection in ((0, 'hotels'), (1, 'reservations')):
+        for record in read_json(paths[collection]):
+            shards[sharded.route(record['hotel_id'])][index].append(record)
+    for name, (hotels, reservations) in shards.items():
+        sharded.shards[name].hotels.create_many(hotels)
+        sharded.shards[name].reservations.create_many(reservations)
+    shared = next(iter(sharded.shards.values()))
+    shared.customers.create_many(read_json(paths['customers']))
+    # The generated reservations used IDs from the dataset's counter; carry it over.
+    shared.id_allocator.reserve(sum(len(reservations) for _, reservations in shards.values()))
+
+
+def engine_calls(config):
+    """Return the reserve_room arguments of the engine benchmark, one free day each."""
+    rng = random.Random(config['seed'])
+    rooms = config['rooms']
+    free_day = parse_date(FREE_DAY)
+    calls = []
+    for day in range(free_day, free_day + config['engine_requests']):
+        number, date = rng.randrange(config['hotels'] * rooms), format_date(day)
+        calls.append((hotel_id(number // rooms), customer_id(rng.randrange(config['customers'])),
+                      room_id(number % rooms), date, date))
+    return calls
+
+
+def run_engine(config, paths, directory, workers):
+    """
+    Time a burst of reserve_room calls through a BookingEngine with a number of workers.
+
+    The calls are all submitted before waiting for the first result, so the workers can
+    batch them; the throughput counts from the first submission to the last result.
+    """
+    calls = engine_calls(config)
+    root = os.path.join(directory, f'engine-{workers}')
+    directories = {f'{n:03d}': os.path.join(root, f'shard-{n:03d}') for n in range(workers)}
+    try:
+        shard_dataset(paths, directories, os.path.join(root, 'shared'), config['backend'])
+    finally:
+        close_connections()
+    with BookingEngine(directories, os.path.join(root, 'shared'), config['backend']) as engine:
+        engine.ping()
+        start = time.perf_counter()
+        futures = [engine.submit('reserve_room', call[0], *call) for call in calls]
+        reserved = sum(future.result().success for future in futures)
+        seconds = time.perf_counter() - start
+    return {
+        'workers': workers,
+        'count': len(calls),
+        'reserved': reserved,
+        'seconds': round(seconds, 3),
+        'ops_per_sec': round(len(calls) / seconds, 1) if seconds else 0.0,
+    }
+
+
+def run_scale(config):
+    """
+    Generate a dataset, time every operation on it and return the results.
+
+    Args:
+        config (dict): reservations, hotels, rooms, customers, operations, backend, seed,
+            and the worker counts and number of requests of the engine benchmark.
+    """
+    rng = random.Random(config['seed'])
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        paths = write_dataset(directory, config['hotels'], config['rooms'],
+                              config['customers'], config['reservations'], config['seed'])
+        generate_seconds = time.perf_counter() - start
+
+        try:
+            with use(open_store(directory, paths, config['backend'])):
+                start = time.perf_counter()
+                Customer.repository.records()
+                Hotel.room_search_index()
+                Reservation.availability_index()
+                load_seconds = time.perf_counter() - start
+
+                operations = {name: time_calls(calls)
+                              for name, calls in operation_calls(config, rng).items()}
+        finally:
+            close_connections()
+        engine = [run_engine(config, paths, directory, workers)
+                  for workers in config['workers']]
+    return {
+        'config': config,
+        'generate_seconds': round(generate_seconds, 3),
+        'load_seconds': round(load_seconds, 3),
+        'peak_memory_bytes': peak_memory(),
+        'operations': operations,
+        'engine': engine,
+    }
+
+
+def git_commit():
+    """Return the current git commit, or None outside a repository."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, hotels=100, rooms=20, customers=None, operations=200, backend='json',
+        seed=0, isolate=True, workers=(), engine_requests=2000):
+    """
+    Run the benchmark at every scale.
+
+    Args:
+        scales (list): Numbers of reservations to generate.
+        customers (int): Number of customers; a tenth of the reservations (at least 10)
+            if None.
+        isolate (bool): Run every scale in a new process, for accurate peak memory.
+        workers (list): Worker counts to run the engine benchmark with, if any.
+        engine_requests (int): Number of reserve_room calls of the engine benchmark.
+
+    Returns:
+        dict: The JSON report.
+    """
+    configs = [{
+        'reservations': scale,
+        'hotels': hotels,
+        'rooms': rooms,
+        'customers': customers or max(10, scale // 10),
+        'operations': operations,
+        'backend': backend,
+        'seed': seed,
+        'workers': list(workers),
+        'engine_requests': engine_requests,
+    } for scale in scales]
+    if isolate:
+        # Not a multiprocessing.Pool: its daemonic processes cannot start engine workers.
+        context = multiprocessing.get_context('spawn')
+        results = []
+        for config in configs:
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                results.append(pool.submit(run_scale, config).result())
+    else:
+        results = [run_scale(config) for config in configs]
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'commit': git_commit(),
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    """Command line entry point of the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the booking operations.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="numbers of reservations to generate")
+    parser.add_argument('--hotels', type=int, default=100)
+    parser.add_argument('--rooms', type=int, default=20, help="rooms per hotel")
+    parser.add_argument('--customers', type=int, default=None)
+    parser.add_argument('--operations', type=int, default=200,
+                        help="number of timed calls per operation")
+    parser.add_argument('--backend', choices=BACKENDS, default='json')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help="worker counts of the multi-process engine benchmark")
+    parser.add_argument('--engine-requests', type=int, default=2000,
+                        help="number of reserve_room calls sent through the engine")
+    parser.add_argument('--in-process', action='store_true',
+                        help="run every scale in this process")
+    parser.add_argument('--output', help="write the report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    report = run(args.scales, args.hotels, args.rooms, args.customers, args.operations,
+                 args.backend, args.seed, not args.in_process, args.workers,
+                 args.engine_requests)
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,31 @@
 This module defines the Customer class and its associated methods.
 
 The Customer class is responsible for managing customer information, including creating, deleting,
-modifying, and displaying customer details. It interacts with a JSON file to persist customer data.
+modifying, and displaying customer details. It persists customer data in the current store
+(see store.py), and looks customers up by email, phone and name through a CustomerIndex
+(see customer_index.py).
 """
 
 import json
+from customer_index import CustomerIndex, normalize_email, normalize_phone
+from instrumentation import timed, timer
+from logs import get_logger
+from records import json_default
+from reservation import Reservation
+from results import OperationResult
+from store import CurrentRepository
+
+logger = get_logger(__name__)
 
 class Customer:
     """
     Represents a customer, managing their information such as ID, name, email, and phone number.
     """
+    __slots__ = ('customer_id', 'name', 'email', 'phone')
+    repository = CurrentRepository('customers')
+    # Fields ('email', 'phone') no two customers may share, compared normalized.
+    unique_fields = ()
+
     def __init__(self, customer_id, name, email, phone):
         """
         Initializes a new Customer instance.
@@ -27,64 +43,220 @@ class Customer:
         self.phone = phone
 
     @staticmethod
+    @timed('customer.load_customers')
     def load_customers():
-        """Load the list of customers from the JSON file."""
-        try:
-            with open('customers.json', 'r', encoding='utf-8') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []
+        """Load the list of customers through the cached repository."""
+        return Customer.repository.load()
 
     @staticmethod
+    @timed('customer.save_customers')
     def save_customers(customers):
-        """Save the list of customers to the JSON file."""
-        with open('customers.json', 'w', encoding='utf-8') as file:
-            json.dump(customers, file, indent=4)
+        """Save the list of customers through the cached repository."""
+        Customer.repository.save(customers)
+
+    @staticmethod
+    def customer_index():
+        """
+        Return the email, phone and name index of the customers.
+
+        The index is built on first use and rebuilt whenever the customers changed other
+        than through the Customer methods, which update it in place.
+        """
+        repository = Customer.repository
+        with repository.mutex:
+            customers = repository.records()
+            revision, index = repository.indexes.get('customers', (None, None))
+            if revision != repository.revision:
+                with timer('customer.index_build'):
+                    index = CustomerIndex(customers.values())
+                repository.indexes['customers'] = (repository.revision, index)
+            return index
+
+    @staticmethod
+    def _indexed(index):
+        """Mark the customer index as up to date after applying a write to it."""
+        repository = Customer.repository
+        repository.indexes['customers'] = (repository.revision, index)
+
+    @staticmethod
+    def _current_index():
+        """Return the customer index if it is built and up to date, else None."""
+        repository = Customer.repository
+        revision, index = repository.indexes.get('customers', (None, None))
+        return index if revision == repository.revision else None
+
+    @staticmethod
+    def _records(customer_ids):
+        """Return the customer records of a list of IDs."""
+        customers = Customer.repository.records()
+        return [customers[customer_id] for customer_id in customer_ids]
+
+    @staticmethod
+    def find_by_email(email):
+        """Return the customers with an email, compared ignoring case and spaces."""
+        with Customer.repository.mutex:
+            return Customer._records(Customer.customer_index().by_email(email))
+
+    @staticmethod
+    def find_by_phone(phone):
+        """Return the customers with a phone number, compared on its digits only."""
+        with Customer.repository.mutex:
+            return Customer._records(Customer.customer_index().by_phone(phone))
+
+    @staticmethod
+    def search_by_name(prefix, limit=10):
+        """
+        Return customers whose name words start with the words typed, for type-ahead search.
+
+        Returns:
+            list: At most limit customer records; see CustomerIndex.search_name.
+        """
+        with Customer.repository.mutex:
+            return Customer._records(Customer.customer_index().search_name(prefix, limit))
+
+    @staticmethod
+    def _duplicates(customer, index, fields):
+        """Return the other customers sharing one of the unique fields with a customer record."""
+        lookups = {'email': (normalize_email, index.by_email),
+                   'phone': (normalize_phone, index.by_phone)}
+        found = {}
+        for field in fields:
+            normalize, lookup = lookups[field]
+            if normalize(customer.get(field)) is not None:
+                found.update((customer_id, field) for customer_id in lookup(customer[field])
+                             if customer_id != customer['customer_id'])
+        return found
+
+    @staticmethod
+    def _duplicate_result(customer_id, duplicates):
+        """Return the failed result of a write that would duplicate a unique field."""
+        fields = sorted(set(duplicates.values()))
+        logger.info("Customer %s not saved: %s already used.", customer_id, fields)
+        return OperationResult(
+            False, None, f"Another customer already uses this {' and '.join(fields)}.",
+            tuple(Customer._records(duplicates))
+        )
 
     def create_customer(self):
-        """Create a new customer and add it to the JSON file."""
-        customers = self.load_customers()
+        """
+        Create a new customer and add it to the storage backend.
+
+        The email and phone are checked against the other customers if they are in
+        ``Customer.unique_fields``.
+
+        Returns:
+            OperationResult: The outcome, with the stored customer record, or the customers
+            already using a unique email or phone in ``conflicts``.
+        """
         customer = {
             "customer_id": self.customer_id,
             "name": self.name,
             "email": self.email,
             "phone": self.phone
         }
-        if any(cust['customer_id'] == self.customer_id for cust in customers):
-            print(f"Customer with ID {self.customer_id} already exists.")
-            return
-        customers.append(customer)
-        self.save_customers(customers)
-        print(f"Customer {self.name} created successfully.")
+        with Customer.repository.transaction():
+            if self.customer_id in Customer.repository:
+                logger.info("Customer %s not created: already exists.", self.customer_id)
+                return OperationResult(
+                    False, None, f"Customer with ID {self.customer_id} already exists."
+                )
+            if Customer.unique_fields:
+                index = Customer.customer_index()
+                duplicates = Customer._duplicates(customer, index, Customer.unique_fields)
+                if duplicates:
+                    return Customer._duplicate_result(self.customer_id, duplicates)
+            else:
+                index = Customer._current_index()
+            customer = Customer.repository.create(customer)
+            if index is not None:
+                index.add(customer)
+                Customer._indexed(index)
+        logger.info("Customer %s created.", self.customer_id)
+        return OperationResult(True, customer, f"Customer {self.name} created successfully.")
 
     @staticmethod
-    def delete_customer(customer_id):
-        """Delete a customer from the JSON file."""
-        customers = Customer.load_customers()
-        customers = [customer for customer in customers if customer['customer_id'] != customer_id]
-        Customer.save_customers(customers)
-        print(f"Customer {customer_id} deleted successfully.")
+    def delete_customer(customer_id, cascade=False):
+        """
+        Delete a customer from the storage backend.
+
+        A customer who still has reservations is only deleted with ``cascade``, which
+        cancels them too; otherwise the reservations are returned in ``conflicts``. Only the
+        reservations of the current store are checked: with a ShardedStore, use
+        ShardedStore.delete_customer, which checks every shard.
+
+        Args:
+            customer_id (str): ID of the customer to delete.
+            cascade (bool): Whether to cancel the customer's reservations along with them.
+
+        Returns:
+            OperationResult: The outcome, with the deleted customer record.
+        """
+        with Customer.repository.transaction(), Reservation.repository.transaction():
+            if customer_id not in Customer.repository:
+                logger.info("Customer %s not deleted: not found.", customer_id)
+                return OperationResult(False, None, "Customer not found.")
+            reservations = Reservation.find_by_customer(customer_id)
+            if reservations and not cascade:
+                logger.info("Customer %s not deleted: %d reservations.",
+                            customer_id, len(reservations))
+                return OperationResult(
+                    False, None,
+                    f"Customer {customer_id} has {len(reservations)} reservations.",
+                    tuple(reservations)
+                )
+            if reservations:
+                Reservation.cancel_reservations([r['reservation_id'] for r in reservations])
+            index = Customer._current_index()
+            customer = Customer.repository.delete(customer_id)
+            if index is not None:
+                index.discard(customer_id)
+                Customer._indexed(index)
+        logger.info("Customer %s deleted with %d reservations.", customer_id, len(reservations))
+        return OperationResult(True, customer, f"Customer {customer_id} deleted successfully.")
 
     @staticmethod
     def display_customer_info(customer_id):
-        """Display information for a specific customer."""
-        customers = Customer.load_customers()
-        for customer in customers:
-            if customer['customer_id'] == customer_id:
-                print(json.dumps(customer, indent=4))
-                return
-        print("Customer not found.")
+        """
+        Display information for a specific customer.
+
+        Returns:
+            dict: The customer record, or None if the customer does not exist.
+        """
+        customer = Customer.repository.get(customer_id)
+        if customer is None:
+            print("Customer not found.")
+            return None
+        print(json.dumps(customer, indent=4, default=json_default))
+        return customer
 
     @staticmethod
     def modify_customer_info(customer_id, **kwargs):
-        """Modify information for a specific customer."""
-        customers = Customer.load_customers()
-        for customer in customers:
-            if customer['customer_id'] == customer_id:
-                for key, value in kwargs.items():
-                    if key in customer:
-                        customer[key] = value
-                Customer.save_customers(customers)
-                print(f"Customer {customer_id} updated successfully.")
-                return
-        print("Customer not found.")
+        """
+        Modify information for a specific customer. Unknown fields are ignored.
+
+        Returns:
+            OperationResult: The outcome, with the updated customer record, or the customers
+            already using a unique email or phone in ``conflicts``.
+        """
+        with Customer.repository.transaction():
+            customer = Customer.repository.get(customer_id)
+            if customer is None:
+                logger.info("Customer %s not modified: not found.", customer_id)
+                return OperationResult(False, None, "Customer not found.")
+            changes = {key: value for key, value in kwargs.items() if key in customer}
+            # Only the changed fields are checked: existing duplicates do not block edits.
+            checked = [field for field in Customer.unique_fields if field in changes]
+            if checked:
+                index = Customer.customer_index()
+                duplicates = Customer._duplicates(dict(customer, **changes), index, checked)
+                if duplicates:
+                    return Customer._duplicate_result(customer_id, duplicates)
+            else:
+                index = Customer._current_index()
+            customer = Customer.repository.modify(customer_id, changes)
+            if index is not None:
+                index.discard(customer_id)
+                index.add(customer)
+                Customer._indexed(index)
+        logger.info("Customer %s modified: %s.", customer_id, sorted(changes))
+        return OperationResult(True, customer, f"Customer {customer_id} updated successfully.")
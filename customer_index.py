@@ -0,0 +1,162 @@
+"""
+This module defines the CustomerIndex class used to look customers up by contact and name.
+
+Emails and phone numbers are normalized (see normalize_email and normalize_phone) and
+hashed to the IDs of the customers using them, so a front-desk lookup costs O(1) however
+many customers there are. Names are split into words kept in a trie, so a type-ahead search
+only visits the names starting with what was typed. Adding, changing or removing a customer
+afterwards only touches the entries of that customer.
+"""
+
+
+def normalize_email(email):
+    """Return the key an email is indexed by, or None if it is not a non-empty string."""
+    if not isinstance(email, str):
+        return None
+    return email.strip().casefold() or None
+
+
+def normalize_phone(phone):
+    """Return the digits a phone number is indexed by, or None if it has none."""
+    if not isinstance(phone, str):
+        return None
+    return ''.join(character for character in phone if character.isdigit()) or None
+
+
+def name_words(name):
+    """Return the casefolded words of a name, as indexed and searched."""
+    return tuple(str(name).casefold().split()) if name is not None else ()
+
+
+class _TrieNode:
+    """A node of the name trie: its children by character and the customers ending here."""
+
+    __slots__ = ('children', 'customer_ids')
+
+    def __init__(self):
+        self.children = {}
+        self.customer_ids = {}
+
+
+class CustomerIndex:
+    """Hash indexes over customer emails and phones, and a trie over the words of names."""
+
+    def __init__(self, customers=()):
+        """
+        Initializes the index with an iterable of customer records.
+
+        Args:
+            customers (iterable): Customer dictionaries as stored in customers.json.
+        """
+        self._emails = {}
+        self._phones = {}
+        self._names = _TrieNode()
+        self._keys = {}
+        for customer in customers:
+            self.add(customer)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, customer):
+        """Adds a customer record, replacing the entries of a customer with the same ID."""
+        customer_id = customer['customer_id']
+        self.discard(customer_id)
+        email = normalize_email(customer.get('email'))
+        phone = normalize_phone(customer.get('phone'))
+        words = name_words(customer.get('name'))
+        self._keys[customer_id] = (email, phone, words)
+        if email is not None:
+            self._emails.setdefault(email, {})[customer_id] = None
+        if phone is not None:
+            self._phones.setdefault(phone, {})[customer_id] = None
+        for word in set(words):
+            node = self._names
+            for character in word:
+                child = node.children.get(character)
+                if child is None:
+                    child = node.children[character] = _TrieNode()
+                node = child
+            node.customer_ids[customer_id] = None
+
+    def discard(self, customer_id):
+        """Removes the entries of a customer; does nothing if the customer is not indexed."""
+        keys = self._keys.pop(customer_id, None)
+        if keys is None:
+            return
+        email, phone, words = keys
+        for groups, key in ((self._emails, email), (self._phones, phone)):
+            if key is not None:
+                group = groups[key]
+                del group[customer_id]
+                if not group:
+                    del groups[key]
+        for word in set(words):
+            path = [self._names]
+            for character in word:
+                path.append(path[-1].children[character])
+            del path[-1].customer_ids[customer_id]
+            # Prune the nodes left without customers or children, deepest first.
+            for depth in range(len(word), 0, -1):
+                node = path[depth]
+                if node.customer_ids or node.children:
+                    break
+                del path[depth - 1].children[word[depth - 1]]
+
+    def by_email(self, email):
+        """Returns the IDs of the customers using an email, in the order they were added."""
+        return list(self._emails.get(normalize_email(email), ()))
+
+    def by_phone(self, phone):
+        """Returns the IDs of the customers using a phone number, in the order they were added."""
+        return list(self._phones.get(normalize_phone(phone), ()))
+
+    def search_name(self, prefix, limit=10):
+        """
+        Finds customers for a type-ahead search on names.
+
+        Every word of the prefix must start a different word of the name, in any order, so
+        "jo do" finds "John Doe" and "Doe, John"; case is ignored.
+
+        Args:
+            prefix (str): What was typed so far.
+            limit (int): Most customer IDs to return.
+
+        Returns:
+            list: Matching customer IDs, ordered by the matched word, then by insertion.
+        """
+        words = name_words(prefix)
+        if not words or limit <= 0:
+            return []
+        first, others = max(words, key=len), list(words)
+        others.remove(first)
+        node = self._names
+        for character in first:
+            node = node.children.get(character)
+            if node is None:
+                return []
+        found = {}
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            for customer_id in node.customer_ids:
+                if customer_id not in found and self._matches(customer_id, others, first):
+                    found[customer_id] = None
+                    if len(found) == limit:
+                        break
+            stack.extend(node.children[character]
+                         for character in sorted(node.children, reverse=True))
+        return list(found)
+
+    def _matches(self, customer_id, prefixes, used):
+        """Returns True if the other prefixes each start another word of a customer's name."""
+        if not prefixes:
+            return True
+        words = list(self._keys[customer_id][2])
+        words.remove(next(word for word in words if word.startswith(used)))
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            word = next((word for word in words if word.startswith(prefix)), None)
+            if word is None:
+                return False
+            words.remove(word)
+        return True
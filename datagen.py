@@ -0,0 +1,146 @@
+"""
+This module generates synthetic hotels, customers and reservations for benchmarks.
+
+The generators are deterministic for a given seed and yield one record at a time, so
+datasets of millions of reservations are written with the streaming writers (see
+streaming.py) without being held in memory. Reservations of a room never overlap, so a
+generated dataset is one the booking code could have produced.
+
+Run as a script to write a dataset:
+
+    python datagen.py data/ --hotels 100 --rooms 20 --customers 10000 --reservations 1000000
+"""
+
+import argparse
+import os
+import random
+
+from dates import format_date, parse_date
+from ids import IdAllocator
+from streaming import write_file
+
+ROOM_TYPES = ('Single', 'Double', 'Suite')
+AMENITIES = ('WiFi', 'Pool', 'Gym', 'Spa', 'Bar', 'Parking')
+FIRST_DAY = '2024-01-01'
+
+
+def hotel_id(number):
+    """Return the ID of the generated hotel with the given number."""
+    return f"H{number:06d}"
+
+
+def room_id(number):
+    """Return the ID of the generated room with the given number."""
+    return f"{number + 1:04d}"
+
+
+def customer_id(number):
+    """Return the ID of the generated customer with the given number."""
+    return f"C{number:08d}"
+
+
+def generate_hotels(count, rooms_per_hotel, locations=50, seed=0):
+    """Yield hotel records with rooms of every type."""
+    rng = random.Random(seed)
+    for number in range(count):
+        yield {
+            'hotel_id': hotel_id(number),
+            'name': f"Hotel {number}",
+            'location': f"City {number % locations}",
+            'rooms': [{
+                'room_id': room_id(room),
+                'type': ROOM_TYPES[room % len(ROOM_TYPES)],
+                'price': 50 + 25 * (room % len(ROOM_TYPES)) + rng.randrange(0, 50)
+            } for room in range(rooms_per_hotel)],
+            'amenities': rng.sample(AMENITIES, 3)
+        }
+
+
+def generate_customers(count):
+    """Yield customer records."""
+    for number in range(count):
+        yield {
+            'customer_id': customer_id(number),
+            'name': f"Customer {number}",
+            'email': f"customer{number}@example.com",
+            'phone': f"+1-555-{number:07d}"
+        }
+
+
+def generate_reservations(count, hotels, rooms_per_hotel, customers, ids=None, seed=0,
+                          first_day=FIRST_DAY):
+    """
+    Yield reservation records spread round-robin over every room of every hotel.
+
+    Each room's stays follow each other from first_day, lasting one to three nights with
+    gaps of zero to two days, so no two reservations of a room overlap.
+
+    Args:
+        count (int): Number of reservations.
+        hotels (int): Number of hotels, as passed to generate_hotels.
+        rooms_per_hotel (int): Number of rooms of every hotel.
+        customers (int): Number of customers, as passed to generate_customers.
+        ids (iterable): Reservation IDs to use; R000000000001, R000000000002, ... if None.
+        seed (int): Seed of the random stay lengths, gaps and customers.
+        first_day (str): Date of the first stay of every room.
+    """
+    rng = random.Random(seed)
+    rooms = hotels * rooms_per_hotel
+    next_free = [parse_date(first_day)] * rooms
+    if ids is None:
+        ids = (f"R{number:012d}" for number in range(1, count + 1))
+    for number, reservation_id in zip(range(count), ids):
+        room = number % rooms
+        start = next_free[room] + rng.randrange(0, 3)
+        end = start + rng.randrange(0, 3)
+        next_free[room] = end + 1
+        yield {
+            'reservation_id': reservation_id,
+            'customer_id': customer_id(rng.randrange(customers)),
+            'hotel_id': hotel_id(room // rooms_per_hotel),
+            'room_id': room_id(room % rooms_per_hotel),
+            'start_date': format_date(start),
+            'end_date': format_date(end)
+        }
+
+
+def write_dataset(directory, hotels, rooms_per_hotel, customers, reservations, seed=0):
+    """
+    Write hotels.json, customers.json and reservations.json to a directory.
+
+    The reservation IDs are taken from the ID counter next to reservations.json, so
+    reservations made afterwards by the Reservation class get new IDs.
+
+    Returns:
+        dict: The path of each file, keyed by 'hotels', 'customers' and 'reservations'.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {name: os.path.join(directory, f'{name}.json')
+             for name in ('hotels', 'customers', 'reservations')}
+    allocator = IdAllocator(paths['reservations'] + '.seq')
+    ids = map(allocator.format, allocator.reserve(reservations))
+    write_file(paths['hotels'], generate_hotels(hotels, rooms_per_hotel, seed=seed))
+    write_file(paths['customers'], generate_customers(customers))
+    write_file(paths['reservations'], generate_reservations(
+        reservations, hotels, rooms_per_hotel, customers, ids, seed))
+    return paths
+
+
+def main(argv=None):
+    """Command line entry point of the data generator."""
+    parser = argparse.ArgumentParser(description="Write a synthetic booking dataset.")
+    parser.add_argument('directory', help="directory to write the JSON files to")
+    parser.add_argument('--hotels', type=int, default=100)
+    parser.add_argument('--rooms', type=int, default=20, help="rooms per hotel")
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--reservations', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    paths = write_dataset(args.directory, args.hotels, args.rooms, args.customers,
+                          args.reservations, args.seed)
+    for name, path in paths.items():
+        print(f"Wrote {name} to {path}.")
+
+
+if __name__ == '__main__':
+    main()
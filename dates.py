@@ -0,0 +1,52 @@
+"""
+This module converts the ISO 8601 dates stored in reservations to ordinal day numbers.
+
+Reservation dates are stored as 'YYYY-MM-DD' strings. Internally they are compared as the
+integers returned by date.toordinal(), parsed once and cached, so overlap checks are integer
+comparisons and malformed dates are rejected when they enter the system instead of being
+compared as text.
+"""
+
+from datetime import date
+from functools import lru_cache
+
+
+def parse_date(value):
+    """
+    Convert a 'YYYY-MM-DD' string to its ordinal day number.
+
+    Raises:
+        ValueError: If the value is not a valid date in that format.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid date {value!r}: expected YYYY-MM-DD.")
+    return _parse_date_string(value)
+
+
+@lru_cache(maxsize=65536)
+def _parse_date_string(value):
+    """Cached part of parse_date, only called with strings so every key is hashable."""
+    if len(value) != 10 or value[4] != '-' or value[7] != '-':
+        raise ValueError(f"Invalid date {value!r}: expected YYYY-MM-DD.")
+    try:
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}: expected YYYY-MM-DD.") from None
+
+
+def parse_period(start_date, end_date):
+    """
+    Convert a start and end date to ordinal day numbers.
+
+    Raises:
+        ValueError: If a date is malformed or the period ends before it starts.
+    """
+    start, end = parse_date(start_date), parse_date(end_date)
+    if end < start:
+        raise ValueError(f"Invalid period: {end_date} is before {start_date}.")
+    return start, end
+
+
+def format_date(ordinal):
+    """Convert an ordinal day number back to a 'YYYY-MM-DD' string."""
+    return date.fromordinal(ordinal).isoformat()
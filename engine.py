@@ -0,0 +1,258 @@
+"""
+This module defines BookingEngine, which runs the bookings of every hotel in a pool of
+worker processes.
+
+Hotels are independent for availability, so the engine partitions them by hotel_id like
+ShardedStore (see sharding.py): every worker process opens one shard and is the only
+process using it, so its caches and indexes stay warm and bookings of different shards
+run on different cores. The customers and the reservation ID counter are shared as in a
+ShardedStore, which can open the same directories, e.g. to create the hotels.
+
+Calls are sent to the worker of their hotel through its request queue. A worker takes
+every request waiting in its queue, up to max_batch, saves consecutive reserve_room
+requests with one Hotel.reserve_rooms_batch write and sends all the results back in one
+reply. A thread of the calling process hands the results to the waiting callers:
+
+    with BookingEngine({'a': '/data/a', 'b': '/data/b'}, '/data/shared') as engine:
+        result = engine.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future
+
+from hotel import Hotel
+from reservation import Reservation
+from sharding import ShardedStore, price_key, stable_hash
+from store import activate
+
+RESERVATION_FIELDS = ('hotel_id', 'customer_id', 'room_id', 'start_date', 'end_date')
+
+# Operations a worker runs, by the name sent in requests.
+OPERATIONS = {
+    'reserve_room': Hotel.reserve_room,
+    'cancel_reservation': Hotel.cancel_reservation,
+    'find_conflicts': Reservation.find_conflicts,
+    'find_available_rooms': Hotel.find_available_rooms,
+    'ping': lambda: None,
+}
+
+
+def _run(operation, args):
+    """Run one operation, returning (True, result) or (False, the exception raised)."""
+    try:
+        return True, OPERATIONS[operation](*args)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return False, error
+
+
+def _reserve(requests):
+    """Save a run of reserve_room requests with one write; return one reply per request."""
+    try:
+        results = Hotel.reserve_rooms_batch(
+            [dict(zip(RESERVATION_FIELDS, args)) for _, _, args in requests])
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return [(request_id, False, error) for request_id, _, _ in requests]
+    return [(request_id, True, result)
+            for (request_id, _, _), result in zip(requests, results)]
+
+
+def _run_batch(batch):
+    """Run a batch of requests in order; return one (request_id, ok, value) per request."""
+    replies = []
+    for is_reservation, run in itertools.groupby(
+            batch, key=lambda request: request[1] == 'reserve_room'):
+        if is_reservation:
+            replies.extend(_reserve(list(run)))
+        else:
+            replies.extend((request_id,) + _run(operation, args)
+                           for request_id, operation, args in run)
+    return replies
+
+
+def _serve(name, directory, customers_directory, backend, requests, replies, max_batch):
+    """
+    Worker process: own one shard and answer its requests until a None request arrives.
+
+    The shard's indexes are built before the first request is taken.
+    """
+    sharded = ShardedStore.open({name: directory}, customers_directory, backend)
+    activate(sharded.shards[name])
+    Reservation.availability_index()
+    Hotel.room_search_index()
+    running = True
+    while running:
+        batch = [requests.get()]
+        while batch[-1] is not None and len(batch) < max_batch:
+            try:
+                batch.append(requests.get_nowait())
+            except queue.Empty:
+                break
+        if batch[-1] is None:
+            running = False
+            batch.pop()
+        if batch:
+            replies.put(_run_batch(batch))
+
+
+class BookingEngine:
+    """
+    Bookings and availability checks of hotels split by hotel_id over worker processes.
+
+    Every call is routed to the worker of its hotel; calls without a hotel_id are sent to
+    every worker and their results merged. The blocking methods mirror the Hotel and
+    Reservation methods; submit() returns a Future instead.
+    """
+
+    def __init__(self, directories, customers_directory, backend='json', route=None,
+                 max_batch=256, context='spawn'):
+        """
+        Starts a worker process for every shard.
+
+        Args:
+            directories (dict): Data directory of every shard, keyed by shard name.
+            customers_directory (str): Directory of the shared customers and of the
+                shared reservation ID counter, see ShardedStore.open.
+            backend (str): Backend of every store, see Store.open.
+            route (callable): Returns the shard name of a hotel_id. By default hotels are
+                spread over the shards like in a ShardedStore.
+            max_batch (int): Most requests a worker takes from its queue at once.
+            context (str): multiprocessing start method of the workers.
+        """
+        self._names = sorted(directories)
+        self.route = route or self._hash_route
+        multiprocessing_context = multiprocessing.get_context(context)
+        self._replies = multiprocessing_context.Queue()
+        self._queues = {}
+        self._workers = []
+        for name in self._names:
+            requests = self._queues[name] = multiprocessing_context.Queue()
+            worker = multiprocessing_context.Process(
+                target=_serve, name=f'booking-worker-{name}', daemon=True,
+                args=(name, directories[name], customers_directory, backend, requests,
+                      self._replies, max_batch))
+            worker.start()
+            self._workers.append(worker)
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_replies, daemon=True)
+        self._reader.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _hash_route(self, hotel_id):
+        """Route a hotel to a shard by a stable hash of its ID, like ShardedStore."""
+        return self._names[stable_hash(hotel_id) % len(self._names)]
+
+    def _send(self, name, operation, args):
+        """Queue a request for the worker of a shard and return its Future."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The booking engine is closed.")
+            request_id = next(self._ids)
+            self._futures[request_id] = future
+        self._queues[name].put((request_id, operation, args))
+        return future
+
+    def _read_replies(self):
+        """Hand the results of every reply to the callers waiting for them."""
+        while True:
+            replies = self._replies.get()
+            if replies is None:
+                return
+            for request_id, ok, value in replies:
+                with self._lock:
+                    future = self._futures.pop(request_id)
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def submit(self, operation, hotel_id, *args):
+        """
+        Send an operation to the worker of a hotel without waiting for it.
+
+        Args:
+            operation (str): 'reserve_room', 'cancel_reservation' or 'find_conflicts'.
+            hotel_id (str): The hotel routing the call.
+            *args: The arguments of the operation.
+
+        Returns:
+            Future: Resolves to the return value of the operation, or raises its error.
+        """
+        return self._send(self.route(hotel_id), operation, args)
+
+    def _broadcast(self, operation, *args):
+        """Send an operation to every worker and return their results, in shard order."""
+        futures = [self._send(name, operation, args) for name in self._names]
+        return [future.result() for future in futures]
+
+    def reserve_room(self, hotel_id, customer_id, room_id, start_date, end_date):
+        """
+        Reserves a room like Hotel.reserve_room, in the worker of the hotel.
+
+        Returns:
+            OperationResult: The outcome, with the stored reservation record, or the
+            reservations that overlap the requested period in ``conflicts``.
+        """
+        return self.submit('reserve_room', hotel_id, hotel_id, customer_id, room_id,
+                           start_date, end_date).result()
+
+    def cancel_reservation(self, reservation_id, hotel_id=None):
+        """
+        Cancels a reservation like Hotel.cancel_reservation.
+
+        Args:
+            hotel_id (str): Hotel of the reservation; if None every worker is asked.
+
+        Returns:
+            OperationResult: The outcome, with the canceled reservation record.
+        """
+        if hotel_id is not None:
+            return self.submit('cancel_reservation', hotel_id, reservation_id).result()
+        results = self._broadcast('cancel_reservation', reservation_id)
+        return next((result for result in results if result.success), results[0])
+
+    def find_conflicts(self, hotel_id, room_id, start_date, end_date):
+        """Return the reservations and holds of a room that overlap a period."""
+        return self.submit('find_conflicts', hotel_id, hotel_id, room_id, start_date,
+                           end_date).result()
+
+    def find_available_rooms(self, location, start_date, end_date, room_type=None,
+                             max_price=None):
+        """Find free rooms like Hotel.find_available_rooms, in every worker, cheapest first."""
+        return list(heapq.merge(
+            *self._broadcast('find_available_rooms', location, start_date, end_date,
+                             room_type, max_price),
+            key=price_key))
+
+    def ping(self):
+        """Wait until every worker has built its indexes and answers requests."""
+        self._broadcast('ping')
+
+    def close(self):
+        """Stop the workers after the queued requests; later calls raise RuntimeError."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for requests in self._queues.values():
+            requests.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._replies.put(None)
+        self._reader.join()
+        with self._lock:
+            pending, self._futures = self._futures, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("The booking engine stopped."))
@@ -0,0 +1,134 @@
+"""
+This module defines the HoldRegistry class, which keeps temporary holds on rooms.
+
+A hold blocks a room for a period while a customer checks out, like a reservation that is
+never written to the data files: it expires after a time to live unless it is confirmed
+into a reservation or released first. Each store has its own registry (see store.py).
+
+Holds are kept per room in the same sorted intervals as reservations (see availability.py),
+so the overlap checks of the availability index count them, and their expiry times in a
+min-heap. Expired holds are dropped whenever the registry is used, each in O(log n) for n
+holds and without any file I/O; released and confirmed holds leave their heap entry behind,
+which is skipped when it comes up.
+"""
+
+import heapq
+import secrets
+import threading
+import time
+
+from availability import RoomIntervals
+from dates import parse_period
+
+
+class HoldRegistry:
+    """In-memory holds on rooms, each expiring after its time to live."""
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Initializes an empty registry.
+
+        Args:
+            clock (callable): Returns the current time in seconds; the expiry times of the
+                holds are measured with it.
+        """
+        self.clock = clock
+        self._rooms = {}
+        self._holds = {}
+        self._expiry = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._holds)
+
+    def add(self, hotel_id, customer_id, room_id, start_date, end_date, ttl):
+        """
+        Holds a room for a period, without checking for overlaps.
+
+        Args:
+            ttl (float): Seconds until the hold expires.
+
+        Returns:
+            dict: The hold, with its 'hold_id' token and its 'expires_at' clock time.
+
+        Raises:
+            ValueError: If a date is malformed or the end date is before the start date.
+        """
+        start, end = parse_period(start_date, end_date)
+        hold_id = secrets.token_hex(16)
+        with self._lock:
+            self._expire()
+            expires_at = self.clock() + ttl
+            hold = {'hold_id': hold_id, 'customer_id': customer_id, 'hotel_id': hotel_id,
+                    'room_id': room_id, 'start_date': start_date, 'end_date': end_date,
+                    'expires_at': expires_at}
+            # Overlap checks return the hold without its token, which only its owner knows.
+            public = {field: value for field, value in hold.items()
+                      if field not in ('hold_id', 'expires_at')}
+            public['hold'] = True
+            room = self._rooms.get((hotel_id, room_id))
+            if room is None:
+                room = self._rooms[(hotel_id, room_id)] = RoomIntervals()
+            room.add(public, start, end)
+            self._holds[hold_id] = (hold, public, start)
+            heapq.heappush(self._expiry, (expires_at, hold_id))
+        return dict(hold)
+
+    def get(self, hold_id):
+        """Returns a hold that has not expired, or None."""
+        with self._lock:
+            self._expire()
+            entry = self._holds.get(hold_id)
+            return None if entry is None else dict(entry[0])
+
+    def remove(self, hold_id):
+        """
+        Removes a hold before it expires.
+
+        Returns:
+            dict: The removed hold, or None if there is no such hold or it expired.
+        """
+        with self._lock:
+            self._expire()
+            return self._remove(hold_id)
+
+    def conflicts(self, hotel_id, room_id, start, end):
+        """
+        Finds the holds of a room that overlap a period.
+
+        Args:
+            start (int): First day of the period, as an ordinal (see dates.py).
+            end (int): Last day of the period, as an ordinal.
+
+        Returns:
+            list: The overlapping holds without their tokens, ordered by start date.
+        """
+        with self._lock:
+            self._expire()
+            room = self._rooms.get((hotel_id, room_id))
+            return [] if room is None else room.overlapping(start, end)
+
+    def _remove(self, hold_id):
+        """Removes a hold from its room; the caller holds the lock."""
+        entry = self._holds.pop(hold_id, None)
+        if entry is None:
+            return None
+        hold, public, start = entry
+        key = (hold['hotel_id'], hold['room_id'])
+        room = self._rooms[key]
+        room.remove(public, start)
+        if not room:
+            del self._rooms[key]
+        return hold
+
+    def _expire(self):
+        """Drops the holds whose time to live has passed; the caller holds the lock."""
+        expiry = self._expiry
+        if not expiry:
+            return
+        now = self.clock()
+        while expiry and expiry[0][0] <= now:
+            _, hold_id = heapq.heappop(expiry)
+            self._remove(hold_id)
@@ -2,16 +2,41 @@
 This module defines the Hotel class and its associated methods.
 
 The Hotel class is responsible for managing hotel information, including creating, deleting,
-modifying, and displaying hotels. It also handles room reservations and cancellations by
-interacting with the Reservation class.
+modifying, and displaying hotels and their rooms. It also handles room reservations and
+cancellations by interacting with the Reservation class. Hotels are kept in the current
+store (see store.py).
 """
 
 import json
+from datetime import date
+from availability import AvailabilityIndex
+from dates import parse_period
+from instrumentation import timed
+from logs import get_logger
+from pricing import PriceQuoter
+from records import json_default
 from reservation import Reservation
+from results import OperationResult
+from room_search import RoomSearchIndex
+from store import CurrentRepository
+
+logger = get_logger(__name__)
+
+# Hotel fields the room search index is built from.
+SEARCHED_FIELDS = frozenset(('hotel_id', 'location', 'rooms'))
+
+# Hotel fields the nightly rates of its rooms are computed from.
+PRICED_FIELDS = frozenset(('rooms', 'rate_rules'))
+
+# Seconds a room stays held during checkout unless the hold is confirmed or released.
+HOLD_TTL = 600
 
 class Hotel:
     """Represents a hotel, managing its properties and reservations."""
 
+    __slots__ = ('hotel_id', 'name', 'location', 'rooms', 'amenities')
+    repository = CurrentRepository('hotels')
+
     def __init__(self, hotel_info):
         """
         Initializes a new Hotel instance with information provided in a dictionary.
@@ -32,23 +57,24 @@ class Hotel:
         self.amenities = hotel_info['amenities']
 
     @staticmethod
+    @timed('hotel.load_hotels')
     def load_hotels():
-        """Loads the list of hotels from a JSON file."""
-        try:
-            with open('hotels.json', 'r', encoding='utf-8') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []
+        """Loads the list of hotels through the cached repository."""
+        return Hotel.repository.load()
 
     @staticmethod
+    @timed('hotel.save_hotels')
     def save_hotels(hotels):
-        """Saves the list of hotels to a JSON file."""
-        with open('hotels.json', 'w', encoding='utf-8') as file:
-            json.dump(hotels, file, indent=4)
+        """Saves the list of hotels through the cached repository."""
+        Hotel.repository.save(hotels)
 
     def create_hotel(self):
-        """Creates a new hotel entry and adds it to the JSON file."""
-        hotels = self.load_hotels()
+        """
+        Creates a new hotel entry and adds it to the storage backend.
+
+        Returns:
+            OperationResult: The outcome, with the stored hotel record.
+        """
         hotel = {
             "hotel_id": self.hotel_id,
             "name": self.name,
@@ -56,51 +82,351 @@ class Hotel:
             "rooms": self.rooms,
             "amenities": self.amenities
         }
-        hotels.append(hotel)
-        self.save_hotels(hotels)
+        with Hotel.repository.transaction():
+            index = Hotel._current_search_index()
+            quoter = Hotel._current_price_quoter()
+            hotel = Hotel.repository.create(hotel)
+            if index is not None:
+                index.add_hotel(hotel)
+                Hotel._search_indexed(index)
+            Hotel._repriced(quoter, self.hotel_id)
+        logger.info("Hotel %s created.", self.hotel_id)
+        return OperationResult(True, hotel, f"Hotel {self.hotel_id} created successfully.")
 
     @staticmethod
-    def delete_hotel(hotel_id):
-        """Deletes a hotel entry from the JSON file."""
-        hotels = Hotel.load_hotels()
-        hotels = [hotel for hotel in hotels if hotel['hotel_id'] != hotel_id]
-        Hotel.save_hotels(hotels)
+    def delete_hotel(hotel_id, cascade=False):
+        """
+        Deletes a hotel entry from the storage backend.
+
+        A hotel that still has reservations is only deleted with ``cascade``, which cancels
+        them too; otherwise the reservations are returned in ``conflicts``.
+
+        Args:
+            hotel_id (str): ID of the hotel to delete.
+            cascade (bool): Whether to cancel the hotel's reservations along with it.
+
+        Returns:
+            OperationResult: The outcome, with the deleted hotel record.
+        """
+        with Hotel.repository.transaction(), Reservation.repository.transaction():
+            if hotel_id not in Hotel.repository:
+                logger.info("Hotel %s not deleted: not found.", hotel_id)
+                return OperationResult(False, None, "Hotel not found.")
+            reservations = Reservation.find_by_hotel(hotel_id)
+            if reservations and not cascade:
+                logger.info("Hotel %s not deleted: %d reservations.", hotel_id, len(reservations))
+                return OperationResult(
+                    False, None, f"Hotel {hotel_id} has {len(reservations)} reservations.",
+                    tuple(reservations)
+                )
+            if reservations:
+                Reservation.cancel_reservations([r['reservation_id'] for r in reservations])
+            index = Hotel._current_search_index()
+            quoter = Hotel._current_price_quoter()
+            hotel = Hotel.repository.delete(hotel_id)
+            if index is not None:
+                index.remove_hotel(hotel_id)
+                Hotel._search_indexed(index)
+            Hotel._repriced(quoter, hotel_id)
+        logger.info("Hotel %s deleted with %d reservations.", hotel_id, len(reservations))
+        return OperationResult(True, hotel, f"Hotel {hotel_id} deleted successfully.")
 
     @staticmethod
     def display_hotel_info(hotel_id):
-        """Prints information about a specific hotel."""
-        hotels = Hotel.load_hotels()
-        for hotel in hotels:
-            if hotel['hotel_id'] == hotel_id:
-                print(json.dumps(hotel, indent=4))
-                return
-        print("Hotel not found.")
+        """
+        Prints information about a specific hotel.
+
+        Returns:
+            dict: The hotel record, or None if the hotel does not exist.
+        """
+        hotel = Hotel.repository.get(hotel_id)
+        if hotel is None:
+            print("Hotel not found.")
+            return None
+        print(json.dumps(hotel, indent=4, default=json_default))
+        return hotel
 
     @staticmethod
     def modify_hotel_info(hotel_id, **kwargs):
-        """Modifies information for a specific hotel."""
-        hotels = Hotel.load_hotels()
-        for hotel in hotels:
-            if hotel['hotel_id'] == hotel_id:
-                hotel.update(kwargs)
-                Hotel.save_hotels(hotels)
-                print(f"Hotel {hotel_id} updated successfully.")
-                return
-        print("Hotel not found.")
+        """
+        Modifies information for a specific hotel.
+
+        Returns:
+            OperationResult: The outcome, with the updated hotel record.
+        """
+        with Hotel.repository.transaction():
+            index = Hotel._current_search_index()
+            quoter = Hotel._current_price_quoter()
+            hotel = Hotel.repository.modify(hotel_id, kwargs)
+            if hotel is None:
+                logger.info("Hotel %s not modified: not found.", hotel_id)
+                return OperationResult(False, None, "Hotel not found.")
+            if index is not None:
+                if SEARCHED_FIELDS.intersection(kwargs):
+                    index.remove_hotel(hotel_id)
+                    index.add_hotel(hotel)
+                Hotel._search_indexed(index)
+            Hotel._repriced(quoter, hotel_id if PRICED_FIELDS.intersection(kwargs) else None)
+        logger.info("Hotel %s modified: %s.", hotel_id, sorted(kwargs))
+        return OperationResult(True, hotel, f"Hotel {hotel_id} updated successfully.")
+
+    @staticmethod
+    def get_room(hotel_id, room_id):
+        """
+        Returns a room of a hotel, looked up in the room search index.
+
+        Returns:
+            Room: The room record, or None if the hotel has no such room.
+        """
+        return Hotel.room_search_index().room(hotel_id, room_id)
+
+    @staticmethod
+    def add_room(hotel_id, room):
+        """
+        Adds a room to a hotel.
+
+        Only the hotel's record is written on backends that write records one by one
+        (journal, SQLite), and the room indexes are updated for that room alone.
+
+        Args:
+            hotel_id (str): ID of the hotel.
+            room (dict): The room, with at least a 'room_id'.
+
+        Returns:
+            OperationResult: The outcome, with the stored room record.
+        """
+        if 'room_id' not in room:
+            return OperationResult(False, None, "Missing room field: room_id.")
+        room_id = room['room_id']
+        with Hotel.repository.transaction():
+            index = Hotel.room_search_index()
+            quoter = Hotel._current_price_quoter()
+            hotel = Hotel.repository.get(hotel_id)
+            if hotel is None:
+                logger.info("Room %s not added: Hotel %s not found.", room_id, hotel_id)
+                return OperationResult(False, None, "Hotel not found.")
+            if index.room(hotel_id, room_id) is not None:
+                logger.info("Room %s not added: already in Hotel %s.", room_id, hotel_id)
+                return OperationResult(False, None, f"Room {room_id} already exists.")
+            hotel = Hotel.repository.modify(hotel_id, {'rooms': hotel['rooms'] + [room]})
+            room = hotel['rooms'][-1]
+            index.add_room(hotel_id, hotel['location'], room)
+            Hotel._search_indexed(index)
+            Hotel._repriced(quoter, hotel_id)
+        logger.info("Room %s added to Hotel %s.", room_id, hotel_id)
+        return OperationResult(True, room, f"Room {room_id} added to Hotel {hotel_id}.")
+
+    @staticmethod
+    def remove_room(hotel_id, room_id, today=None):
+        """
+        Removes a room from a hotel unless it has current or future reservations.
+
+        The reservations are found with an overlap query from today on, a binary search
+        in the availability index (or the database index on SQLite).
+
+        Args:
+            hotel_id (str): ID of the hotel.
+            room_id (str): ID of the room.
+            today (str): The date reservations count as future from; today if None.
+
+        Returns:
+            OperationResult: The outcome, with the removed room record, or the
+            reservations that prevented the removal in ``conflicts``.
+        """
+        today = today or date.today().isoformat()
+        with Hotel.repository.transaction(), Reservation.repository.transaction():
+            index = Hotel.room_search_index()
+            quoter = Hotel._current_price_quoter()
+            room = index.room(hotel_id, room_id)
+            if room is None:
+                logger.info("Room %s not removed: not in Hotel %s.", room_id, hotel_id)
+                return OperationResult(False, None, "Room not found.")
+            reservations = Reservation.find_conflicts(
+                hotel_id, room_id, today, date.max.isoformat()
+            )
+            if reservations:
+                logger.info("Room %s not removed from Hotel %s: %d future reservations.",
+                            room_id, hotel_id, len(reservations))
+                return OperationResult(
+                    False, None, f"Room {room_id} has {len(reservations)} future reservations.",
+                    tuple(reservations)
+                )
+            rooms = [other for other in Hotel.repository.get(hotel_id)['rooms']
+                     if other is not room]
+            Hotel.repository.modify(hotel_id, {'rooms': rooms})
+            index.remove_room(hotel_id, room_id)
+            Hotel._search_indexed(index)
+            Hotel._repriced(quoter, hotel_id)
+        logger.info("Room %s removed from Hotel %s.", room_id, hotel_id)
+        return OperationResult(True, room, f"Room {room_id} removed from Hotel {hotel_id}.")
+
+    @staticmethod
+    def update_room_price(hotel_id, room_id, price):
+        """
+        Changes the price of a room of a hotel.
+
+        Returns:
+            OperationResult: The outcome, with the updated room record.
+        """
+        with Hotel.repository.transaction():
+            index = Hotel.room_search_index()
+            quoter = Hotel._current_price_quoter()
+            room = index.room(hotel_id, room_id)
+            if room is None:
+                logger.info("Room %s not repriced: not in Hotel %s.", room_id, hotel_id)
+                return OperationResult(False, None, "Room not found.")
+            hotel = Hotel.repository.get(hotel_id)
+            index.remove_room(hotel_id, room_id)
+            room['price'] = price
+            Hotel.repository.modify(hotel_id, {'rooms': hotel['rooms']})
+            index.add_room(hotel_id, hotel['location'], room)
+            Hotel._search_indexed(index)
+            Hotel._repriced(quoter, hotel_id)
+        logger.info("Room %s in Hotel %s repriced to %s.", room_id, hotel_id, price)
+        return OperationResult(True, room, f"Room {room_id} in Hotel {hotel_id} repriced.")
+
+    @staticmethod
+    def room_search_index():
+        """
+        Return the room search index.
+
+        The Hotel methods update the index in place; it is only rebuilt when the hotels
+        changed by other means, e.g. another process rewrote the file.
+        """
+        repository = Hotel.repository
+        with repository.mutex:
+            revision = repository.current_revision()
+            source, index = repository.indexes.get('room_search', (None, None))
+            if source != revision:
+                index = RoomSearchIndex(repository.records().values())
+                repository.indexes['room_search'] = (revision, index)
+            return index
+
+    @staticmethod
+    def _current_search_index():
+        """Return the room search index if it is built and up to date, else None."""
+        repository = Hotel.repository
+        source, index = repository.indexes.get('room_search', (None, None))
+        return index if source == repository.revision else None
+
+    @staticmethod
+    def _search_indexed(index):
+        """Mark the room search index as up to date after applying a write to it."""
+        repository = Hotel.repository
+        repository.indexes['room_search'] = (repository.revision, index)
+
+    @staticmethod
+    def price_quoter():
+        """
+        Return the price quoter, with its cached rates and quotes.
+
+        The Hotel methods drop the quotes of the hotels they change; a new quoter is only
+        started when the hotels changed by other means, e.g. another process rewrote the file.
+        """
+        repository = Hotel.repository
+        with repository.mutex:
+            revision = repository.current_revision()
+            source, quoter = repository.indexes.get('quotes', (None, None))
+            if source != revision:
+                quoter = PriceQuoter()
+                repository.indexes['quotes'] = (revision, quoter)
+            return quoter
+
+    @staticmethod
+    def _current_price_quoter():
+        """Return the price quoter if it is up to date, else None."""
+        repository = Hotel.repository
+        source, quoter = repository.indexes.get('quotes', (None, None))
+        return quoter if source == repository.revision else None
+
+    @staticmethod
+    def _repriced(quoter, hotel_id=None):
+        """Drop the quotes of a hotel whose rates changed and mark the quoter up to date."""
+        if quoter is None:
+            return
+        if hotel_id is not None:
+            quoter.invalidate(hotel_id)
+        repository = Hotel.repository
+        repository.indexes['quotes'] = (repository.revision, quoter)
+
+    @staticmethod
+    @timed('hotel.quote_stay')
+    def quote_stay(hotel_id, room_id, start_date, end_date):
+        """
+        Computes the price of a stay in a room from its nightly rates.
+
+        Every night costs the room's price as changed by the hotel's 'rate_rules' (see
+        pricing.py). Quotes are cached, so repeated quotes for the same stay are lookups.
+
+        Args:
+            hotel_id (str): ID of the hotel.
+            room_id (str): ID of the room.
+            start_date (str): First night of the stay.
+            end_date (str): Last night of the stay.
+
+        Returns:
+            OperationResult: The outcome, with a quote giving the 'nights' and 'total'.
+
+        Raises:
+            ValueError: If a date is malformed, the end date is before the start date, or
+                the room's price or the hotel's rate rules are not valid.
+        """
+        start, end = parse_period(start_date, end_date)
+        repository = Hotel.repository
+        with repository.mutex:
+            quoter = Hotel.price_quoter()
+            room = Hotel.room_search_index().room(hotel_id, room_id)
+            if room is None:
+                return OperationResult(False, None, "Room not found.")
+            total = quoter.quote(repository.get(hotel_id), room, start, end)
+        quote = {'hotel_id': hotel_id, 'room_id': room_id, 'start_date': start_date,
+                 'end_date': end_date, 'nights': end - start + 1, 'total': total}
+        return OperationResult(True, quote, f"Room {room_id} in Hotel {hotel_id} costs "
+                                            f"{total} from {start_date} to {end_date}.")
 
     @staticmethod
+    @timed('hotel.find_available_rooms')
+    def find_available_rooms(location, start_date, end_date, room_type=None, max_price=None):
+        """
+        Finds the rooms in a location that are free for a whole period.
+
+        Args:
+            location (str): Hotel location, compared ignoring case and extra spaces.
+            start_date (str): First night of the stay.
+            end_date (str): Last night of the stay.
+            room_type (str): Only return rooms of this type, if given.
+            max_price (float): Only return rooms whose price is at most this, if given.
+
+        Returns:
+            list: Room dictionaries with an added 'hotel_id' key, cheapest first.
+
+        Raises:
+            ValueError: If a date is malformed or the end date is before the start date.
+        """
+        parse_period(start_date, end_date)
+        search_index = Hotel.room_search_index()
+        with Reservation.repository.mutex:
+            return search_index.find_available(
+                Reservation.availability_index(), location, start_date, end_date,
+                room_type, max_price
+            )
+
+    @staticmethod
+    @timed('hotel.reserve_room')
     def reserve_room(hotel_id, customer_id, room_id, start_date, end_date):
-        """Attempts to reserve a room for a given period."""
-        reservations = Reservation.load_reservations()
-        for reservation in reservations:
-            if (reservation['hotel_id'] == hotel_id and reservation['room_id'] == room_id and
-                not (end_date < reservation['start_date'] or start_date > reservation['end_date'])):
-                print("Room is not available for the selected dates.")
-                return
-
-        # If room is available, create a new reservation
+        """
+        Attempts to reserve a room for a given period.
+
+        Returns:
+            OperationResult: The outcome, with the stored reservation record, or the
+            reservations that overlap the requested period in ``conflicts``.
+
+        Raises:
+            ValueError: If a date is malformed or the end date is before the start date.
+        """
+        parse_period(start_date, end_date)
         reservation_details = {
-            'reservation_id': f"R{len(reservations) + 1}",  # Simple way to generate a new ID
+            'reservation_id': Reservation.next_reservation_ids()[0],
             'customer_id': customer_id,
             'hotel_id': hotel_id,
             'room_id': room_id,
@@ -108,13 +434,174 @@ class Hotel:
             'end_date': end_date
         }
         new_reservation = Reservation(reservation_details)
-        new_reservation.create_reservation()
-        print(f"Room {room_id} in Hotel {hotel_id} reserved successfully "
-              f"from {start_date} to {end_date}.")
+        result = new_reservation.create_reservation()
+        if not result.success:
+            logger.info("Room %s in Hotel %s not reserved from %s to %s: %s",
+                        room_id, hotel_id, start_date, end_date, result.message)
+            return result
+        logger.info("Room %s in Hotel %s reserved from %s to %s.",
+                    room_id, hotel_id, start_date, end_date)
+        return result._replace(
+            message=f"Room {room_id} in Hotel {hotel_id} reserved successfully "
+                    f"from {start_date} to {end_date}."
+        )
+
+    @staticmethod
+    @timed('hotel.hold_room')
+    def hold_room(hotel_id, customer_id, room_id, start_date, end_date, ttl=HOLD_TTL):
+        """
+        Holds a room for a period while the customer checks out.
+
+        The hold blocks the room like a reservation, but is kept in memory only and expires
+        after ttl seconds unless it is confirmed with confirm_hold or released first.
+
+        Returns:
+            OperationResult: The outcome, with the hold and its 'hold_id' token, or the
+            reservations and holds that overlap the requested period in ``conflicts``.
+
+        Raises:
+            ValueError: If a date is malformed or the end date is before the start date.
+        """
+        parse_period(start_date, end_date)
+        with Reservation.repository.transaction():
+            conflicts = Reservation.find_conflicts(hotel_id, room_id, start_date, end_date)
+            if conflicts:
+                logger.info("Room %s in Hotel %s not held from %s to %s: not available.",
+                            room_id, hotel_id, start_date, end_date)
+                return OperationResult(
+                    False, None, "Room is not available for the selected dates.",
+                    tuple(conflicts)
+                )
+            hold = Reservation.holds().add(hotel_id, customer_id, room_id,
+                                           start_date, end_date, ttl)
+        logger.info("Room %s in Hotel %s held from %s to %s.",
+                    room_id, hotel_id, start_date, end_date)
+        return OperationResult(
+            True, hold, f"Room {room_id} in Hotel {hotel_id} held from {start_date} "
+                        f"to {end_date} for {ttl} seconds."
+        )
+
+    @staticmethod
+    @timed('hotel.confirm_hold')
+    def confirm_hold(hold_id):
+        """
+        Turns a hold that has not expired into a reservation.
+
+        Returns:
+            OperationResult: The outcome, with the stored reservation record.
+        """
+        with Reservation.repository.transaction():
+            hold = Reservation.holds().remove(hold_id)
+            if hold is None:
+                return OperationResult(False, None, "Hold not found or expired.")
+            return Hotel.reserve_room(hold['hotel_id'], hold['customer_id'], hold['room_id'],
+                                      hold['start_date'], hold['end_date'])
+
+    @staticmethod
+    def release_hold(hold_id):
+        """
+        Releases a hold before it expires, freeing the room.
+
+        Returns:
+            OperationResult: The outcome, with the released hold.
+        """
+        hold = Reservation.holds().remove(hold_id)
+        if hold is None:
+            return OperationResult(False, None, "Hold not found or expired.")
+        logger.info("Hold on room %s in Hotel %s released.", hold['room_id'], hold['hotel_id'])
+        return OperationResult(True, hold, "Hold released successfully.")
 
     @staticmethod
+    @timed('hotel.reserve_rooms_batch')
+    def reserve_rooms_batch(requests, all_or_nothing=False):
+        """
+        Reserves several rooms with one load, one validation pass and one write.
+
+        Every request is checked against the stored reservations and against the requests
+        accepted before it in the same batch. The accepted reservations are then saved
+        together.
+
+        Args:
+            requests (list): Dictionaries with the reserve_room arguments: hotel_id,
+                customer_id, room_id, start_date and end_date.
+            all_or_nothing (bool): If True, nothing is reserved unless every request
+                can be accepted.
+
+        Returns:
+            list: One OperationResult per request, in the same order.
+        """
+        with Reservation.repository.transaction():
+            return Hotel._reserve_rooms_batch(requests, all_or_nothing)
+
+    @staticmethod
+    def _reserve_rooms_batch(requests, all_or_nothing):
+        """Validates and saves a batch of reservations while holding the reservations lock."""
+        fields = ('hotel_id', 'customer_id', 'room_id', 'start_date', 'end_date')
+        index = Reservation.availability_index()
+        batch = AvailabilityIndex()
+        results = []
+        accepted = []
+        for request in requests:
+            missing = [field for field in fields if field not in request]
+            if missing:
+                results.append(OperationResult(
+                    False, None, f"Missing reservation fields: {', '.join(missing)}."
+                ))
+                continue
+            # The dates are checked by parse_period; the IDs must be strings to be keys.
+            invalid = [field for field in fields[:3] if not isinstance(request[field], str)]
+            if invalid:
+                results.append(OperationResult(
+                    False, None, f"Reservation fields must be strings: {', '.join(invalid)}."
+                ))
+                continue
+            try:
+                parse_period(request['start_date'], request['end_date'])
+            except ValueError as error:
+                results.append(OperationResult(False, None, str(error)))
+                continue
+            period = (request['hotel_id'], request['room_id'],
+                      request['start_date'], request['end_date'])
+            conflicts = index.conflicts(*period) + batch.conflicts(*period)
+            if conflicts:
+                results.append(OperationResult(
+                    False, None, "Room is not available for the selected dates.",
+                    tuple(conflicts)
+                ))
+                continue
+            reservation = {'reservation_id': None}
+            reservation.update((field, request[field]) for field in fields)
+            batch.add(reservation)
+            accepted.append(reservation)
+            results.append(OperationResult(
+                True, reservation,
+                f"Room {request['room_id']} in Hotel {request['hotel_id']} reserved "
+                f"successfully from {request['start_date']} to {request['end_date']}."
+            ))
+
+        if all_or_nothing and len(accepted) < len(results):
+            logger.info("Batch of %d reservations rejected: %d failed.",
+                        len(results), len(results) - len(accepted))
+            return [
+                OperationResult(False, None, "Batch rejected: another request failed.")
+                if result.success else result
+                for result in results
+            ]
+        for reservation, reservation_id in zip(
+                accepted, Reservation.next_reservation_ids(len(accepted))):
+            reservation['reservation_id'] = reservation_id
+        Reservation.create_reservations(accepted)
+        logger.info("Batch of %d reservations: %d reserved.", len(results), len(accepted))
+        return results
+
+    @staticmethod
+    @timed('hotel.cancel_reservation')
     def cancel_reservation(reservation_id):
-        """Cancels an existing room reservation."""
-        Reservation.cancel_reservation(reservation_id)
-        print(f"Reservation {reservation_id} canceled successfully.")
+        """
+        Cancels an existing room reservation.
+
+        Returns:
+            OperationResult: The outcome, with the canceled reservation record.
+        """
+        return Reservation.cancel_reservation(reservation_id)
         
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+This module defines the IdAllocator class, which hands out reservation IDs.
+
+IDs come from a persisted counter kept in a small file next to the data and incremented
+under an inter-process lock (see locking.py), so allocating an ID never looks at the
+existing records and two processes never receive the same ID. The counter is zero-padded,
+so IDs sort in the order they were allocated.
+"""
+
+from locking import VersionLock
+
+
+class IdAllocator:
+    """Allocates unique, creation-ordered IDs from a persisted monotonic counter."""
+
+    def __init__(self, path, prefix='R', width=12):
+        """
+        Initializes the allocator.
+
+        Args:
+            path (str): Path of the counter file.
+            prefix (str): Text placed before the counter in every ID.
+            width (int): Number of digits the counter is zero-padded to.
+        """
+        self.prefix = prefix
+        self.width = width
+        self._counter = VersionLock(path)
+
+    def format(self, number):
+        """Return the ID for a counter value."""
+        return f"{self.prefix}{number:0{self.width}d}"
+
+    def reserve(self, count):
+        """
+        Reserve a block of consecutive counter values with a single counter update.
+
+        Returns:
+            range: The reserved counter values; pass them to format() to get the IDs.
+        """
+        if count <= 0:
+            return range(0)
+        with self._counter:
+            last = self._counter.bump(count)
+        return range(last - count + 1, last + 1)
+
+    def allocate(self, count=1):
+        """
+        Reserve a block of consecutive IDs with a single counter update.
+
+        Returns:
+            list: The allocated IDs, in increasing order.
+        """
+        return [self.format(number) for number in self.reserve(count)]
+
+    def next_id(self):
+        """Return a new ID."""
+        return self.allocate()[0]
@@ -0,0 +1,174 @@
+"""
+This module records where time goes in the storage and booking code paths.
+
+Instrumentation is off by default. While it is off, timer() returns a shared no-op context
+manager, functions decorated with timed() call straight through, and count() returns after
+checking one flag, so the instrumented code paths cost next to nothing. Once enabled, it
+records per-operation timers (call count, total and slowest time), byte counts read from
+and written to the data files, and the hits and misses of the repository caches:
+
+    with instrumentation.enabled():
+        Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+    print(instrumentation.stats())
+    print(instrumentation.prometheus())
+
+Timers and counters are shared by every thread of the process.
+"""
+
+import functools
+import re
+import threading
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+_enabled = False
+_lock = threading.Lock()
+_timers = {}
+_counters = {}
+_NO_TIMER = nullcontext()
+
+
+def enable():
+    """Start recording timers and counters."""
+    global _enabled  # pylint: disable=global-statement
+    _enabled = True
+
+
+def disable():
+    """Stop recording; the values recorded so far are kept until reset()."""
+    global _enabled  # pylint: disable=global-statement
+    _enabled = False
+
+
+def is_enabled():
+    """Return True if timers and counters are being recorded."""
+    return _enabled
+
+
+def reset():
+    """Forget every recorded timer and counter."""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+@contextmanager
+def enabled():
+    """Record timers and counters for the duration of a with block."""
+    previous = _enabled
+    enable()
+    try:
+        yield
+    finally:
+        if not previous:
+            disable()
+
+
+def _record(name, seconds):
+    """Add one timed call of an operation."""
+    with _lock:
+        recorded = _timers.get(name)
+        if recorded is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            recorded[0] += 1
+            recorded[1] += seconds
+            if seconds > recorded[2]:
+                recorded[2] = seconds
+
+
+class _Timer:
+    """Context manager timing one call of an operation."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _record(self.name, perf_counter() - self.start)
+
+
+def timer(name):
+    """
+    Return a context manager timing the block it wraps as one call of an operation.
+
+    Returns:
+        A context manager; a shared no-op one while instrumentation is disabled.
+    """
+    return _Timer(name) if _enabled else _NO_TIMER
+
+
+def timed(name):
+    """Decorator timing every call of a function as one call of an operation."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _record(name, perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def count(name, amount=1):
+    """Add an amount, e.g. a number of bytes or a cache hit, to a counter."""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+
+def stats():
+    """
+    Return the recorded values.
+
+    Returns:
+        dict: 'timers' maps each operation to its 'count', 'seconds' (total) and
+        'max_seconds'; 'counters' maps each counter to its value.
+    """
+    with _lock:
+        return {
+            'timers': {name: {'count': calls, 'seconds': total, 'max_seconds': slowest}
+                       for name, (calls, total, slowest) in sorted(_timers.items())},
+            'counters': dict(sorted(_counters.items())),
+        }
+
+
+def _metric_name(prefix, name):
+    """Return a Prometheus metric name for a counter name such as 'json.read_bytes'."""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', f'{prefix}_{name}')
+
+
+def prometheus(prefix='hotel_booking'):
+    """
+    Return the recorded values in the Prometheus text exposition format.
+
+    Timers are exported as one summary, labelled by operation, with the slowest call as a
+    separate gauge; every counter is exported as its own counter.
+    """
+    recorded = stats()
+    lines = []
+    if recorded['timers']:
+        summary = f'{prefix}_operation_seconds'
+        lines.append(f'# TYPE {summary} summary')
+        for name, timer_stats in recorded['timers'].items():
+            lines.append(f'{summary}_count{{operation="{name}"}} {timer_stats["count"]}')
+            lines.append(f'{summary}_sum{{operation="{name}"}} {timer_stats["seconds"]!r}')
+        lines.append(f'# TYPE {prefix}_operation_max_seconds gauge')
+        for name, timer_stats in recorded['timers'].items():
+            lines.append(f'{prefix}_operation_max_seconds{{operation="{name}"}} '
+                         f'{timer_stats["max_seconds"]!r}')
+    for name, value in recorded['counters'].items():
+        metric = _metric_name(prefix, name) + '_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+    return '\n'.join(lines) + '\n' if lines else ''
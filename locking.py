@@ -0,0 +1,86 @@
+"""
+This module defines the VersionLock class used to coordinate writers across processes.
+
+A VersionLock is an advisory fcntl lock on a small side file that also stores a version
+counter. Writers take the lock only to compare the version they read their data at with the
+current one and to write; readers never lock and use the version to tell whether their
+cached data is still current. On platforms without fcntl the lock only serializes threads
+of the current process.
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+VERSION_WIDTH = 20
+
+
+class VersionLock:
+    """Re-entrant inter-process lock whose lock file holds a version counter."""
+
+    def __init__(self, path):
+        """
+        Initializes the lock. The lock file is created on first use.
+
+        Args:
+            path (str): Path of the lock file.
+        """
+        self.path = path
+        # Serializes the threads of this process; the fcntl lock only works across processes.
+        self.thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+        # Readers open the descriptor without the thread lock; a second descriptor opened by
+        # a racing thread could be flocked and then leaked with the lock still held.
+        self._open_lock = threading.Lock()
+
+    def _descriptor(self):
+        """Return the lock file descriptor, reopening it in a forked child process."""
+        if self._fd is None or self._pid != os.getpid():
+            with self._open_lock:
+                if self._fd is None or self._pid != os.getpid():
+                    # A descriptor inherited through fork shares its lock with the parent.
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    self._pid = os.getpid()
+        return self._fd
+
+    def version(self):
+        """Return the current version counter, 0 if nothing was committed yet."""
+        data = os.pread(self._descriptor(), VERSION_WIDTH, 0).strip()
+        return int(data) if data else 0
+
+    def bump(self, step=1):
+        """Increment the version counter. Must be called while holding the lock."""
+        version = self.version() + step
+        os.pwrite(self._descriptor(), b'%0*d' % (VERSION_WIDTH, version), 0)
+        return version
+
+    def acquire(self):
+        """Acquire the lock, blocking until it is available."""
+        self.thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                fcntl.flock(self._descriptor(), fcntl.LOCK_EX)
+            except BaseException:
+                self.thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        """Release the lock."""
+        self._depth -= 1
+        if self._depth == 0 and fcntl is not None:
+            fcntl.flock(self._descriptor(), fcntl.LOCK_UN)
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
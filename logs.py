@@ -0,0 +1,42 @@
+"""
+This module configures the loggers used to report the outcome of operations.
+
+The Hotel, Customer and Reservation classes return OperationResult objects and also log each
+outcome to a child of the 'hotel_booking' logger. Messages are formatted lazily by the logging
+module, and the parent logger only has a NullHandler, so nothing is written and no message
+is formatted unless an application enables a handler, e.g. with enable_logging() or the
+usual logging configuration.
+"""
+
+import logging
+
+LOGGER_NAME = 'hotel_booking'
+
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+
+def get_logger(name):
+    """Return the logger of a module, a child of the 'hotel_booking' logger."""
+    return logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+
+def enable_logging(level=logging.INFO, stream=None):
+    """
+    Write the operation messages to a stream, standard error by default.
+
+    Returns:
+        logging.Handler: The handler added, to pass to disable_logging().
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
+
+def disable_logging(handler):
+    """Remove a handler added by enable_logging()."""
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.removeHandler(handler)
+    logger.setLevel(logging.NOTSET)
@@ -0,0 +1,71 @@
+"""
+This script measures the memory held by reservations, hotels and customers kept as the
+dictionaries parsed from JSON and as the slotted records of records.py.
+
+Records are generated, serialized to JSON and parsed back, like the repositories load them,
+and the memory still allocated after parsing (and after converting to records) is measured
+with tracemalloc. Results are printed as JSON:
+
+    python memory_benchmark.py --reservations 1000000
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from datagen import generate_customers, generate_hotels, generate_reservations
+from records import CustomerRecord, HotelRecord, ReservationRecord
+
+
+def generate(hotels, rooms, customers, reservations):
+    """Return the JSON text of synthetic hotels, customers and reservations."""
+    return {
+        'hotels': json.dumps(list(generate_hotels(hotels, rooms))),
+        'customers': json.dumps(list(generate_customers(customers))),
+        'reservations': json.dumps(list(
+            generate_reservations(reservations, hotels, rooms, customers))),
+    }
+
+
+def measure(text, record_type=None):
+    """Return the bytes still allocated after parsing a JSON list (and converting it)."""
+    gc.collect()
+    tracemalloc.start()
+    records = json.loads(text)
+    if record_type is not None:
+        records = [record_type.from_dict(record) for record in records]
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(records)
+    del records
+    return {'bytes': current, 'peak_bytes': peak,
+            'bytes_per_record': round(current / count, 1) if count else 0.0}
+
+
+def main(argv=None):
+    """Command line entry point of the memory benchmark."""
+    parser = argparse.ArgumentParser(description="Compare dict and slotted record memory.")
+    parser.add_argument('--hotels', type=int, default=100)
+    parser.add_argument('--rooms', type=int, default=50)
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--reservations', type=int, default=100000)
+    args = parser.parse_args(argv)
+    texts = generate(args.hotels, args.rooms, args.customers, args.reservations)
+    report = {}
+    for name, record_type in (('hotels', HotelRecord), ('customers', CustomerRecord),
+                              ('reservations', ReservationRecord)):
+        dicts = measure(texts[name])
+        records = measure(texts[name], record_type)
+        report[name] = {
+            'dict': dicts,
+            'record': records,
+            'reduction': round(1 - records['bytes'] / dicts['bytes'], 3) if dicts['bytes'] else 0.0,
+        }
+    print(json.dumps(report, indent=4))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+This module defines the OccupancyMatrix class, a columnar snapshot of room occupancy.
+
+The matrix has one row per room and one column per night of a date window. Alongside it
+are per-room arrays (hotel ID, room ID, room type, price), so occupancy rates, revenue and
+free-room queries are computed with vectorized numpy operations instead of Python loops
+over the reservation dictionaries. Dates are inclusive, as in the overlap checks: a
+reservation from 2024-01-01 to 2024-01-03 occupies three nights.
+
+numpy is an optional dependency; it is only needed when an OccupancyMatrix is built.
+"""
+
+from dates import format_date, parse_date, parse_period
+from hotel import Hotel
+from reservation import Reservation
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+class OccupancyMatrix:
+    """Rooms x nights occupancy counts with vectorized occupancy and revenue queries."""
+
+    def __init__(self, hotels, reservations, start_date, end_date):
+        """
+        Builds the matrix for the rooms of the given hotels over a date window.
+
+        Args:
+            hotels (iterable): Hotel dictionaries as stored in hotels.json.
+            reservations (iterable): Reservation dictionaries as stored in reservations.json.
+            start_date (str): First night of the window.
+            end_date (str): Last night of the window.
+
+        Raises:
+            ImportError: If numpy is not installed.
+        """
+        if np is None:
+            raise ImportError("OccupancyMatrix requires numpy.")
+        self.first_day, last_day = parse_period(start_date, end_date)
+        self.days = np.arange(self.first_day, last_day + 1)
+        rooms = [(hotel['hotel_id'], room) for hotel in hotels for room in hotel['rooms']]
+        self.hotel_ids = np.array([hotel_id for hotel_id, _ in rooms], dtype=str)
+        self.room_ids = np.array([room['room_id'] for _, room in rooms], dtype=str)
+        self.room_types = np.array([str(room.get('type')) for _, room in rooms], dtype=str)
+        self.prices = np.array(
+            [room['price'] if isinstance(room.get('price'), (int, float)) else 0.0
+             for _, room in rooms],
+            dtype=float
+        )
+        self._rows = {(hotel_id, room['room_id']): row for row, (hotel_id, room) in
+                      enumerate(rooms)}
+        self.counts = np.zeros((len(rooms), len(self.days)), dtype=np.uint8)
+        for reservation in reservations:
+            self.add(reservation)
+
+    def _cells(self, reservation):
+        """Return the (row, first column, end column) a reservation covers, or None."""
+        row = self._rows.get((reservation['hotel_id'], reservation['room_id']))
+        if row is None:
+            return None
+        first = max(parse_date(reservation['start_date']) - self.first_day, 0)
+        end = min(parse_date(reservation['end_date']) - self.first_day + 1, len(self.days))
+        if first >= end:
+            return None
+        return row, first, end
+
+    def add(self, reservation):
+        """Marks the nights of a reservation as occupied."""
+        cells = self._cells(reservation)
+        if cells is not None:
+            row, first, end = cells
+            self.counts[row, first:end] += 1
+
+    def remove(self, reservation):
+        """Releases the nights of a reservation."""
+        cells = self._cells(reservation)
+        if cells is not None:
+            row, first, end = cells
+            span = self.counts[row, first:end]
+            span -= span > 0
+
+    def __call__(self, event, reservation):
+        """Applies a Reservation change notification (see Reservation.subscribe)."""
+        if event == 'created':
+            self.add(reservation)
+        elif event == 'canceled':
+            self.remove(reservation)
+
+    @property
+    def occupied(self):
+        """Boolean rooms x nights matrix, True where a room is booked."""
+        return self.counts > 0
+
+    def dates(self):
+        """Return the nights of the window as 'YYYY-MM-DD' strings."""
+        return [format_date(int(day)) for day in self.days]
+
+    def _grouped(self, labels, values):
+        """Sum rows of a rooms x nights matrix by label. Returns (keys, sums, room counts)."""
+        keys, inverse = np.unique(labels, return_inverse=True)
+        sums = np.zeros((len(keys),) + values.shape[1:], dtype=float)
+        np.add.at(sums, inverse, values)
+        return keys, sums, np.bincount(inverse, minlength=len(keys))
+
+    def occupancy_by_night(self):
+        """Return the share of all rooms booked on each night."""
+        if not len(self.counts):
+            return np.zeros(len(self.days))
+        return self.occupied.mean(axis=0)
+
+    def occupancy_by_hotel(self, per_night=False):
+        """
+        Return the occupancy rate of each hotel.
+
+        Returns:
+            tuple: (hotel_ids, rates); rates has one column per night if per_night is True.
+        """
+        return self._occupancy(self.hotel_ids, per_night)
+
+    def occupancy_by_type(self, per_night=False):
+        """
+        Return the occupancy rate of each room type.
+
+        Returns:
+            tuple: (room_types, rates); rates has one column per night if per_night is True.
+        """
+        return self._occupancy(self.room_types, per_night)
+
+    def _occupancy(self, labels, per_night):
+        """Return the occupancy rates of the rooms grouped by label."""
+        keys, booked, rooms = self._grouped(labels, self.occupied)
+        rates = booked / rooms[:, None]
+        return keys, rates if per_night else rates.mean(axis=1)
+
+    def revenue_by_night(self):
+        """Return the room revenue of each night, from the room prices."""
+        return self.prices @ self.occupied
+
+    def revenue_by_hotel(self, per_night=False):
+        """
+        Return the room revenue of each hotel over the window.
+
+        Returns:
+            tuple: (hotel_ids, revenue); revenue has one column per night if per_night
+            is True.
+        """
+        keys, revenue, _ = self._grouped(self.hotel_ids, self.occupied * self.prices[:, None])
+        return keys, revenue if per_night else revenue.sum(axis=1)
+
+    def free_rooms(self, start_date, end_date):
+        """
+        Return the rooms with no booking between two dates of the window.
+
+        Returns:
+            tuple: (hotel_ids, room_ids) arrays of the free rooms.
+        """
+        start, end = parse_period(start_date, end_date)
+        first = max(start - self.first_day, 0)
+        stop = min(end - self.first_day + 1, len(self.days))
+        free = ~self.occupied[:, first:stop].any(axis=1)
+        return self.hotel_ids[free], self.room_ids[free]
+
+
+def build_occupancy(start_date, end_date, track_changes=True):
+    """
+    Build an OccupancyMatrix from the stored hotels and reservations.
+
+    Args:
+        start_date (str): First night of the window.
+        end_date (str): Last night of the window.
+        track_changes (bool): Subscribe the matrix to Reservation so reservations created
+            or canceled afterwards in this process update it incrementally. Rooms added
+            to hotels later are not part of the matrix.
+    """
+    matrix = OccupancyMatrix(Hotel.load_hotels(), Reservation.load_reservations(),
+                             start_date, end_date)
+    if track_changes:
+        Reservation.subscribe(matrix)
+    return matrix
@@ -0,0 +1,171 @@
+"""
+This module defines the PriceQuoter class, which computes the price of stays.
+
+A room costs its 'price' per night unless the hotel's 'rate_rules' say otherwise. Every
+rule may be limited to a room type, a season and days of the week, and either sets the
+nightly rate ('price') or scales it ('multiplier'); the matching rules apply in order:
+
+    {'room_type': "Double", 'start_date': "07-01", 'end_date': "08-31", 'multiplier': 1.5}
+    {'weekdays': [4, 5], 'price': 140}
+
+Season dates are YYYY-MM-DD, or MM-DD for a season recurring every year, which may wrap
+around the new year ("12-15" to "01-10"); weekdays count from Monday as 0.
+
+The nightly rates of a room are turned into cumulative sums one calendar year at a time, so
+pricing a stay takes two array lookups per year it spans, whatever its length. Quotes are
+also kept in a bounded LRU cache keyed by hotel, room and dates; changing a hotel's rooms or
+rules drops its rates and quotes (see PriceQuoter.invalidate).
+"""
+
+from array import array
+from collections import OrderedDict
+from datetime import date
+from itertools import accumulate
+
+from dates import parse_date
+from instrumentation import count
+
+RULE_FIELDS = frozenset(('room_type', 'start_date', 'end_date', 'weekdays', 'price',
+                         'multiplier'))
+
+
+def _is_number(value):
+    """Return True if a value is an int or float, but not a bool."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _season_day(value, year):
+    """Return the ordinal of a season bound, MM-DD bounds taken in the given year."""
+    if isinstance(value, str) and len(value) == 5:
+        return parse_date(f"{year}-{value}") if value != "02-29" else (
+            date(year, 3, 1).toordinal() - 1)
+    return parse_date(value)
+
+
+def _rule_days(rule, year):
+    """
+    Return a predicate telling whether a rule applies on a day of a year, given as ordinal.
+
+    Raises:
+        ValueError: If the rule is malformed.
+    """
+    if not isinstance(rule, dict) or set(rule) - RULE_FIELDS:
+        raise ValueError(f"Invalid rate rule: {rule!r}.")
+    if ('price' in rule) == ('multiplier' in rule) or not _is_number(
+            rule.get('price', rule.get('multiplier'))):
+        raise ValueError(f"Rate rule needs a numeric price or multiplier: {rule!r}.")
+    weekdays = rule.get('weekdays')
+    if weekdays is not None and not (
+            isinstance(weekdays, list) and all(day in range(7) for day in weekdays)):
+        raise ValueError(f"Rate rule weekdays must be numbers from 0 to 6: {rule!r}.")
+    try:
+        start = _season_day(rule.get('start_date', f"{year}-01-01"), year)
+        end = _season_day(rule.get('end_date', f"{year}-12-31"), year)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid rate rule dates: {rule!r}.") from None
+    weekdays = frozenset(range(7) if weekdays is None else weekdays)
+    if start <= end:
+        return lambda day: start <= day <= end and date.fromordinal(day).weekday() in weekdays
+    # A recurring season wrapping around the new year.
+    return lambda day: (day >= start or day <= end) and date.fromordinal(day).weekday() in weekdays
+
+
+def nightly_rates(room, rules, year):
+    """
+    Return the rate of every night of a calendar year for a room.
+
+    Args:
+        room (dict): The room, with its 'type' and base 'price'.
+        rules (list): The rate rules of its hotel.
+        year (int): The calendar year.
+
+    Raises:
+        ValueError: If the room has no numeric price or a rule is malformed.
+    """
+    price = room.get('price')
+    if not _is_number(price):
+        raise ValueError(f"Room {room.get('room_id')} has no numeric price.")
+    first = date(year, 1, 1).toordinal()
+    days = range(first, date(year + 1, 1, 1).toordinal())
+    rates = [price] * len(days)
+    for rule in rules or ():
+        applies = _rule_days(rule, year)
+        if rule.get('room_type', room.get('type')) != room.get('type'):
+            continue
+        for offset, day in enumerate(days):
+            if applies(day):
+                rates[offset] = rule['price'] if 'price' in rule else rates[offset] * rule[
+                    'multiplier']
+    return rates
+
+
+class PriceQuoter:
+    """Stay prices from cumulative nightly rates, with an LRU cache of quotes."""
+
+    def __init__(self, max_quotes=10000):
+        """
+        Initializes an empty quoter.
+
+        Args:
+            max_quotes (int): Most quotes kept in the cache; the least recently used go first.
+        """
+        self.max_quotes = max_quotes
+        self._quotes = OrderedDict()
+        self._versions = {}
+        self._calendars = {}
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def invalidate(self, hotel_id):
+        """
+        Forget the rates and quotes of a hotel, after its rooms or rate rules changed.
+
+        Its cached quotes are not searched for: they are keyed by a version of the hotel,
+        which changes here, and leave the cache as the least recently used.
+        """
+        self._versions[hotel_id] = self._versions.get(hotel_id, 0) + 1
+        self._calendars.pop(hotel_id, None)
+
+    def quote(self, hotel, room, start, end):
+        """
+        Return the total price of the nights from start to end, both included.
+
+        Args:
+            hotel (dict): The hotel, with its optional 'rate_rules'.
+            room (dict): The room of the hotel.
+            start (int): First night, as an ordinal (see dates.py).
+            end (int): Last night, as an ordinal.
+
+        Raises:
+            ValueError: If the room has no numeric price or a rule is malformed.
+        """
+        hotel_id = hotel['hotel_id']
+        key = (hotel_id, self._versions.get(hotel_id, 0), room['room_id'], start, end)
+        total = self._quotes.get(key)
+        if total is not None:
+            self._quotes.move_to_end(key)
+            count('quotes.hits')
+            return total
+        count('quotes.misses')
+        total = 0.0
+        for year in range(date.fromordinal(start).year, date.fromordinal(end).year + 1):
+            first = date(year, 1, 1).toordinal()
+            sums = self._cumulative_rates(hotel, room, year)
+            total += (sums[min(end - first + 1, len(sums) - 1)]
+                      - sums[max(start - first, 0)])
+        total = round(total, 2)
+        self._quotes[key] = total
+        if len(self._quotes) > self.max_quotes:
+            self._quotes.popitem(last=False)
+        return total
+
+    def _cumulative_rates(self, hotel, room, year):
+        """Return the running sums of a room's nightly rates over a year, starting at 0."""
+        calendars = self._calendars.setdefault(hotel['hotel_id'], {})
+        sums = calendars.get((room['room_id'], year))
+        if sums is None:
+            sums = array('d', accumulate(nightly_rates(room, hotel.get('rate_rules'), year),
+                                         initial=0))
+            calendars[(room['room_id'], year)] = sums
+        return sums
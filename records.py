@@ -0,0 +1,225 @@
+"""
+This module defines compact record types for hotels, rooms, customers and reservations.
+
+The records keep their fields in __slots__ instead of a per-instance dictionary, which
+takes a fraction of the memory of the dictionaries parsed from the JSON files. They are
+mutable mappings, so code written against the dictionaries (record['hotel_id'],
+record.get('price'), record.update(changes), comparisons with dicts) works unchanged.
+Fields missing from the source dictionary stay missing, and unknown fields are kept in a
+side dictionary, so converting to a record and back is lossless.
+
+The repositories of the Hotel, Customer and Reservation classes hold records (see
+Repository's record_type) and convert them with to_dict() when writing to a backend.
+"""
+
+from collections.abc import MutableMapping
+from operator import attrgetter, itemgetter
+from sys import intern
+
+
+class _Missing:
+    """Placeholder stored in the slot of a field absent from the source dictionary."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+
+def _interned(value):
+    """Return an interned copy of a string, sharing repeated IDs and dates."""
+    return intern(value) if type(value) is str else value  # pylint: disable=unidiomatic-typecheck
+
+
+class Record(MutableMapping):
+    """
+    Base class of the slotted record types.
+
+    Subclasses list their fields in FIELDS, declare them in __slots__ and assign every
+    field in __init__, in order.
+    """
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        cls._get_items = staticmethod(itemgetter(*cls.FIELDS))
+        cls._get_attributes = staticmethod(attrgetter(*cls.FIELDS))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from a dictionary, or return the argument if it already is one.
+
+        Returns:
+            Record: The record, holding the same fields and values as the dictionary.
+        """
+        if type(data) is cls:  # pylint: disable=unidiomatic-typecheck
+            return data
+        try:
+            record = cls(*cls._get_items(data))
+            if len(data) == len(cls.FIELDS):
+                return record
+        except KeyError:
+            record = cls(*(data.get(field, MISSING) for field in cls.FIELDS))
+        extra = {key: value for key, value in data.items() if key not in cls._field_set}
+        if extra:
+            record._extra = extra
+        return record
+
+    def to_dict(self):
+        """Return the record as a plain dictionary, in field order."""
+        data = {field: value for field, value in zip(self.FIELDS, self._get_attributes(self))
+                if value is not MISSING}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._field_set and getattr(self, key) is not MISSING:
+            setattr(self, key, MISSING)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if getattr(self, field) is not MISSING:
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        count = sum(value is not MISSING for value in self._get_attributes(self))
+        return count + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key):
+        if key in self._field_set:
+            return getattr(self, key) is not MISSING
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self):
+        """Return a shallow copy of the record."""
+        return type(self).from_dict(self.to_dict())
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+class Room(Record):
+    """A room of a hotel."""
+
+    __slots__ = ('room_id', 'type', 'price')
+    FIELDS = __slots__
+
+    def __init__(self, room_id, type, price):  # pylint: disable=redefined-builtin
+        self._extra = None
+        self.room_id = room_id
+        self.type = type
+        self.price = price
+
+
+class HotelRecord(Record):
+    """A hotel, whose rooms are Room records."""
+
+    __slots__ = ('hotel_id', 'name', 'location', 'rooms', 'amenities')
+    FIELDS = __slots__
+
+    def __init__(self, hotel_id, name, location, rooms, amenities):
+        self._extra = None
+        self.hotel_id = hotel_id
+        self.name = name
+        self.location = location
+        self.rooms = self._rooms(rooms)
+        self.amenities = amenities
+
+    @staticmethod
+    def _rooms(rooms):
+        """Convert a list of room dictionaries to Room records."""
+        if isinstance(rooms, list):
+            return [Room.from_dict(room) if isinstance(room, dict) else room for room in rooms]
+        return rooms
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, self._rooms(value) if key == 'rooms' else value)
+
+    def to_dict(self):
+        data = super().to_dict()
+        rooms = data.get('rooms')
+        if isinstance(rooms, list):
+            data['rooms'] = [room.to_dict() if isinstance(room, Record) else room
+                             for room in rooms]
+        return data
+
+
+class CustomerRecord(Record):
+    """A customer."""
+
+    __slots__ = ('customer_id', 'name', 'email', 'phone')
+    FIELDS = __slots__
+
+    def __init__(self, customer_id, name, email, phone):
+        self._extra = None
+        self.customer_id = customer_id
+        self.name = name
+        self.email = email
+        self.phone = phone
+
+
+class ReservationRecord(Record):
+    """
+    A reservation.
+
+    Hotel, room and customer IDs and dates repeat across many reservations, so they are
+    interned and every record refers to one shared string per value.
+    """
+
+    __slots__ = ('reservation_id', 'customer_id', 'hotel_id', 'room_id',
+                 'start_date', 'end_date')
+    FIELDS = __slots__
+
+    def __init__(self, reservation_id, customer_id, hotel_id, room_id,  # pylint: disable=too-many-arguments
+                 start_date, end_date):
+        self._extra = None
+        self.reservation_id = reservation_id
+        self.customer_id = _interned(customer_id)
+        self.hotel_id = _interned(hotel_id)
+        self.room_id = _interned(room_id)
+        self.start_date = _interned(start_date)
+        self.end_date = _interned(end_date)
+
+
+def json_default(value):
+    """json.dumps default hook serializing records as plain dictionaries."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
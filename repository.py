@@ -0,0 +1,296 @@
+"""
+This module defines the Repository class.
+
+A Repository keeps one collection parsed in memory, indexed by primary key, on top of a
+storage backend (see storage.py). The cached copy is reused for as long as the files behind
+the backend keep the same modification time and size and the collection's version counter
+is unchanged, and writes go through the repository so the cache stays valid without
+re-reading the files. Hit and miss counters show whether a code path is served from memory
+or had to go back to disk.
+
+Writes from several processes are coordinated with a VersionLock next to the data file (see
+locking.py). Each write runs in a short transaction: take the lock, compare the version the
+cache was read at with the current one (reloading only if another process committed in the
+meantime), write, and bump the version. Within a process, writers and reloads also hold
+``mutex``; threads that read the cached records, or indexes built from them, while other
+threads write should hold it too.
+"""
+
+from contextlib import contextmanager
+
+from instrumentation import count, timer
+from locking import VersionLock
+
+
+class Repository:
+    """
+    Cached, primary-key indexed view of a storage backend.
+
+    Records are held in a dictionary keyed by primary key, in file order, so a key that
+    appears more than once in the underlying file resolves to its last record. The
+    records returned by load() and get() are the cached objects: change them through
+    modify() or save() so the backend sees the change.
+    """
+
+    def __init__(self, storage, record_type=None):
+        """
+        Initializes the repository.
+
+        Args:
+            storage: The backend holding the collection, e.g. a JsonFileStorage. Its
+                ``lock_path`` is used as the lock and version file.
+            record_type: A Record class (see records.py) to hold the cached records in,
+                or None to keep the dictionaries read from the backend.
+        """
+        self.storage = storage
+        self.record_type = record_type
+        self.key = storage.key
+        self.lock = VersionLock(storage.lock_path)
+        self.mutex = self.lock.thread_lock
+        # Indexes built from the records by the classes using the repository, by name.
+        self.indexes = {}
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self.revision = 0
+        self._records = None
+        self._state = None
+
+    def _current_state(self):
+        """Return the collection's version counter and storage signature."""
+        return self.lock.version(), self.storage.signature()
+
+    def _refresh(self):
+        """Reload the cached records if the collection changed. Returns True on reload."""
+        state = self._current_state()
+        if self._records is not None and state == self._state:
+            self.hits += 1
+            count('cache.hits')
+            return False
+        with self.mutex:
+            # Another thread may be writing, or may have reloaded, since the check above.
+            state = self._current_state()
+            if self._records is not None and state == self._state:
+                self.hits += 1
+                count('cache.hits')
+                return False
+            self.misses += 1
+            count('cache.misses')
+            with timer('repository.reload'):
+                records = self.storage.load()
+                if self.record_type is not None:
+                    records = map(self.record_type.from_dict, records)
+                self._records = {record[self.key]: record for record in records}
+            self._state = state
+            self.generation += 1
+            self.revision += 1
+            return True
+
+    def _record(self, record):
+        """Return a record as it is held in the cache."""
+        return record if self.record_type is None else self.record_type.from_dict(record)
+
+    def _plain(self, record):
+        """Return a cached record as it is written to the backend."""
+        return record if self.record_type is None else record.to_dict()
+
+    def _save_all(self):
+        """Write every cached record to the backend."""
+        self.storage.save([self._plain(record) for record in self._records.values()])
+
+    def _committed(self):
+        """Bump the version after a write made while holding the lock."""
+        self._state = (self.lock.bump(), self.storage.signature())
+        self.revision += 1
+
+    def current_revision(self):
+        """
+        Return a number that changes whenever the collection changes.
+
+        ``generation`` only changes when the whole collection is reloaded or replaced;
+        ``revision`` also changes on every write, for indexes rebuilt from the records.
+        """
+        self._refresh()
+        return self.revision
+
+    def records(self):
+        """Return the cached key-to-record dictionary, reloading it if the files changed."""
+        self._refresh()
+        return self._records
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the collection's lock, first bringing the cache up to date if it is loaded.
+
+        Yields True if the cache had to be reloaded because another process committed
+        since it was read, in which case checks made before the transaction must be
+        repeated. Transactions are re-entrant, and every write method runs in one.
+        """
+        with self.lock:
+            yield self._refresh() if self._records is not None else False
+
+    def load(self):
+        """Return the records of the collection as a list."""
+        return list(self.records().values())
+
+    def iter_records(self):
+        """
+        Yield the records of the collection.
+
+        The cached records are used if they are current; otherwise the records are
+        streamed from the backend without filling the cache.
+        """
+        if self._records is not None and self._current_state() == self._state:
+            self.hits += 1
+            return iter(tuple(self._records.values()))
+        return self.storage.iter_records()
+
+    def get(self, key):
+        """Return the record with the given primary key, or None."""
+        return self.records().get(key)
+
+    def __contains__(self, key):
+        return key in self.records()
+
+    def save(self, records):
+        """Replace the whole collection."""
+        with self.lock:
+            records = [self._record(record) for record in records]
+            self.storage.save([self._plain(record) for record in records])
+            self._records = {record[self.key]: record for record in records}
+            self.generation += 1
+            self._committed()
+
+    def _cache_for_write(self):
+        """
+        Return the cached records a write must update, or None if there are none.
+
+        Incremental backends, which also look up single records with get(), are written
+        without loading a cache that was never read; the other backends rewrite every
+        record, so their cache is loaded first.
+        """
+        if self._records is None and not self.storage.incremental:
+            self._refresh()
+        return self._records
+
+    def create(self, record):
+        """
+        Add a record to the collection, replacing any record with the same key.
+
+        Returns:
+            The stored record, of the repository's record type.
+        """
+        record = self._record(record)
+        with self.transaction():
+            records = self._cache_for_write()
+            if records is not None:
+                records[record[self.key]] = record
+            if self.storage.incremental:
+                self.storage.create(self._plain(record))
+            else:
+                self._save_all()
+            self._committed()
+        return record
+
+    def create_many(self, records):
+        """
+        Add several records to the collection with a single write to the backend.
+
+        Returns:
+            list: The stored records, of the repository's record type.
+        """
+        records = [self._record(record) for record in records]
+        if not records:
+            return records
+        with self.transaction():
+            stored = self._cache_for_write()
+            if stored is not None:
+                for record in records:
+                    stored[record[self.key]] = record
+            if self.storage.incremental:
+                self.storage.create_many([self._plain(record) for record in records])
+            else:
+                self._save_all()
+            self._committed()
+        return records
+
+    def modify(self, key, changes):
+        """
+        Update the fields of the record with the given primary key.
+
+        Returns:
+            dict: The updated record, or None if no record has that key.
+        """
+        with self.transaction():
+            records = self.records()
+            record = records.get(key)
+            if record is None:
+                return None
+            record.update(changes)
+            if record[self.key] != key:
+                records[record[self.key]] = records.pop(key)
+            if self.storage.incremental:
+                plain = self._plain(record)
+                self.storage.modify(key, {field: plain[field] for field in changes})
+            else:
+                self._save_all()
+            self._committed()
+        return record
+
+    def delete(self, key):
+        """
+        Remove the record with the given primary key.
+
+        Returns:
+            dict: The removed record, or None if no record has that key.
+        """
+        with self.transaction():
+            records = self._cache_for_write()
+            if records is None:
+                record = self.storage.get(key)
+                if record is None:
+                    return None
+                record = self._record(record)
+            else:
+                record = records.pop(key, None)
+                if record is None:
+                    return None
+            if self.storage.incremental:
+                self.storage.delete(key)
+            else:
+                self._save_all()
+            self._committed()
+        return record
+
+    def delete_many(self, keys):
+        """
+        Remove the records with the given primary keys with a single write to the backend.
+
+        Returns:
+            list: The removed records; keys without a record are skipped.
+        """
+        keys = list(dict.fromkeys(keys))
+        with self.transaction():
+            records = self._cache_for_write()
+            if records is None:
+                removed = [self._record(record) for record in map(self.storage.get, keys)
+                           if record is not None]
+            else:
+                removed = [records.pop(key) for key in keys if key in records]
+            if not removed:
+                return removed
+            if self.storage.incremental:
+                self.storage.delete_many([record[self.key] for record in removed])
+            else:
+                self._save_all()
+            self._committed()
+        return removed
+
+    def invalidate(self):
+        """Drop the cached records so the next access reloads them from the backend."""
+        self._records = None
+
+    def stats(self):
+        """Return the cache counters as a dictionary."""
+        return {'hits': self.hits, 'misses': self.misses, 'generation': self.generation}
@@ -3,16 +3,29 @@ This module defines the Reservation class and its associated methods.
 
 The Reservation class is responsible for managing reservation information, including creating,
 saving, loading, and canceling reservations. 
-It interacts with a JSON file to persist reservation data.
+It persists reservation data in the current store (see store.py), through a pluggable
+storage backend (see storage.py).
 """
 
-import json
+from availability import AvailabilityIndex
+from dates import parse_period
+from instrumentation import timed, timer
+from logs import get_logger
+from results import OperationResult
+from store import CurrentRepository, current_store
+from streaming import reservation_filter
+
+logger = get_logger(__name__)
 
 class Reservation:
     """
     Represents a reservation, managing details such as reservation ID, customer ID,
     hotel ID, room ID, start date, and end date.
     """
+
+    __slots__ = ('reservation_id', 'customer_id', 'hotel_id', 'room_id',
+                 'start_date', 'end_date')
+
     def __init__(self, reservation_details):
         """
         Initializes a new Reservation instance with details provided in a dictionary.
@@ -20,7 +33,12 @@ class Reservation:
         Args:
             reservation_details (dict): A dictionary containing all necessary details 
             for the reservation.
+
+        Raises:
+            ValueError: If a date is not a valid YYYY-MM-DD date or the end date is
+                before the start date.
         """
+        parse_period(reservation_details['start_date'], reservation_details['end_date'])
         self.reservation_id = reservation_details['reservation_id']
         self.customer_id = reservation_details['customer_id']
         self.hotel_id = reservation_details['hotel_id']
@@ -28,24 +46,162 @@ class Reservation:
         self.start_date = reservation_details['start_date']
         self.end_date = reservation_details['end_date']
 
+    repository = CurrentRepository('reservations')
+
+    @staticmethod
+    def subscribe(listener):
+        """
+        Register a callable notified of every reservation created or canceled.
+
+        The listener is called as listener(event, reservation) with event 'created' or
+        'canceled', after the change has been saved.
+        """
+        current_store().listeners.append(listener)
+
+    @staticmethod
+    def unsubscribe(listener):
+        """Stop notifying a listener registered with subscribe()."""
+        current_store().listeners.remove(listener)
+
+    @staticmethod
+    def _notify(event, reservation):
+        """Call the registered listeners."""
+        for listener in current_store().listeners:
+            listener(event, reservation)
+
+    @staticmethod
+    def id_allocator():
+        """Return the ID allocator of the current store."""
+        return current_store().id_allocator
+
+    @staticmethod
+    def holds():
+        """Return the temporary holds on rooms of the current store."""
+        return current_store().holds
+
+    @staticmethod
+    def next_reservation_ids(count=1):
+        """Return new, unique reservation IDs ordered by creation time."""
+        return Reservation.id_allocator().allocate(count)
+
     @staticmethod
+    def availability_index():
+        """
+        Return the per-room availability index.
+
+        The index is built on first use and rebuilt whenever the reservations changed
+        other than through the Reservation methods, which update it in place: when another
+        process rewrote the file, or records were written to the repository directly,
+        e.g. by streaming.import_collection.
+        """
+        repository = Reservation.repository
+        with repository.mutex:
+            reservations = repository.records()
+            revision, index = repository.indexes.get('availability', (None, None))
+            if revision != repository.revision:
+                with timer('reservation.index_build'):
+                    index = AvailabilityIndex(reservations.values(), Reservation.holds())
+                repository.indexes['availability'] = (repository.revision, index)
+            return index
+
+    @staticmethod
+    def _indexed(index):
+        """Mark the availability index as up to date after applying a write to it."""
+        repository = Reservation.repository
+        repository.indexes['availability'] = (repository.revision, index)
+
+    @staticmethod
+    def _current_index():
+        """Return the availability index if it is built and up to date, else None."""
+        repository = Reservation.repository
+        revision, index = repository.indexes.get('availability', (None, None))
+        return index if revision == repository.revision else None
+
+    @staticmethod
+    def _queries_storage():
+        """Return True if the backend answers overlap queries itself (see SqliteStorage)."""
+        return hasattr(Reservation.repository.storage, 'overlapping')
+
+    @staticmethod
+    @timed('reservation.find_conflicts')
+    def find_conflicts(hotel_id, room_id, start_date, end_date):
+        """
+        Return the reservations and holds of a room that overlap the given period.
+
+        Backends with their own index on the reservation dates are queried directly,
+        without loading every reservation; otherwise the availability index is used.
+
+        Raises:
+            ValueError: If a date is malformed or the period ends before it starts.
+        """
+        if Reservation._queries_storage():
+            start, end = parse_period(start_date, end_date)
+            return Reservation.repository.storage.overlapping(
+                hotel_id, room_id, start_date, end_date
+            ) + Reservation.holds().conflicts(hotel_id, room_id, start, end)
+        with Reservation.repository.mutex:
+            return Reservation.availability_index().conflicts(
+                hotel_id, room_id, start_date, end_date
+            )
+
+    @staticmethod
+    def find_by_hotel(hotel_id):
+        """Return the reservations of a hotel, from an index instead of a scan."""
+        return Reservation._find_by('hotel_id', hotel_id)
+
+    @staticmethod
+    def find_by_customer(customer_id):
+        """Return the reservations of a customer, from an index instead of a scan."""
+        return Reservation._find_by('customer_id', customer_id)
+
+    @staticmethod
+    def _find_by(field, value):
+        """Return the reservations with a hotel_id or customer_id, from the database or index."""
+        if Reservation._queries_storage():
+            return Reservation.repository.storage.select(field, value)
+        with Reservation.repository.mutex:
+            index = Reservation.availability_index()
+            return index.of_hotel(value) if field == 'hotel_id' else index.of_customer(value)
+
+    @staticmethod
+    @timed('reservation.load_reservations')
     def load_reservations():
-        """Load reservations from a JSON file."""
-        try:
-            with open('reservations.json', 'r', encoding='utf-8') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return []
+        """Load reservations through the cached repository."""
+        return Reservation.repository.load()
 
     @staticmethod
+    def iter_reservations(hotel_id=None, date_range=None):
+        """
+        Yield reservations lazily, optionally filtered.
+
+        Args:
+            hotel_id (str): Only yield reservations of this hotel, if given.
+            date_range (tuple): (start_date, end_date); only yield reservations
+                overlapping it, dates included, if given.
+        """
+        return filter(reservation_filter(hotel_id, date_range),
+                      Reservation.repository.iter_records())
+
+    @staticmethod
+    @timed('reservation.save_reservations')
     def save_reservations(reservations):
-        """Save reservations to a JSON file."""
-        with open('reservations.json', 'w', encoding='utf-8') as file:
-            json.dump(reservations, file, indent=4)
+        """Save reservations through the cached repository."""
+        Reservation.repository.save(reservations)
 
+    @timed('reservation.create_reservation')
     def create_reservation(self):
-        """Create and save a new reservation."""
-        reservations = self.load_reservations()
+        """
+        Create and save a new reservation unless it overlaps an existing one.
+
+        The overlap check runs against the cached reservations without locking. The
+        commit then only holds the lock to compare revisions: if another process or
+        thread saved reservations in the meantime the check is repeated. Backends that
+        answer overlap queries themselves are checked once, while holding the lock.
+
+        Returns:
+            OperationResult: The outcome, with the stored reservation record or the
+            conflicting reservations.
+        """
         reservation = {
             "reservation_id": self.reservation_id,
             "customer_id": self.customer_id,
@@ -54,15 +210,111 @@ class Reservation:
             "start_date": self.start_date,
             "end_date": self.end_date
         }
-        reservations.append(reservation)
-        self.save_reservations(reservations)
+        repository = Reservation.repository
+        period = (self.hotel_id, self.room_id, self.start_date, self.end_date)
+        queries_storage = Reservation._queries_storage()
+        if queries_storage:
+            revision, conflicts = None, []
+        else:
+            revision = repository.current_revision()
+            conflicts = Reservation.find_conflicts(*period)
+        if not conflicts:
+            with repository.transaction():
+                if repository.revision != revision:
+                    conflicts = Reservation.find_conflicts(*period)
+                else:
+                    # Holds do not change the revision: check those placed since.
+                    conflicts = Reservation.holds().conflicts(
+                        self.hotel_id, self.room_id,
+                        *parse_period(self.start_date, self.end_date)
+                    )
+                if not conflicts:
+                    if (repository.storage.get(self.reservation_id) is not None
+                            if queries_storage else self.reservation_id in repository):
+                        return OperationResult(
+                            False, None, f"Reservation {self.reservation_id} already exists."
+                        )
+                    index = Reservation._current_index()
+                    reservation = repository.create(reservation)
+                    if index is not None:
+                        index.add(reservation)
+                        Reservation._indexed(index)
+                    Reservation._notify('created', reservation)
+                    return OperationResult(
+                        True, reservation,
+                        f"Reservation {self.reservation_id} created successfully."
+                    )
+        return OperationResult(
+            False, None, "Room is not available for the selected dates.", tuple(conflicts)
+        )
+
+    @staticmethod
+    def create_reservations(reservations):
+        """
+        Save several new reservation records with a single write.
+
+        The records are not checked for overlaps: callers validate them inside
+        Reservation.repository.transaction() and call this in the same transaction.
+
+        Returns:
+            list: The stored reservation records.
+        """
+        with Reservation.repository.transaction():
+            index = Reservation.availability_index()
+            replaced = []
+            for reservation in reservations:
+                replaced.extend(index.discard(reservation['reservation_id']))
+            reservations = Reservation.repository.create_many(reservations)
+            for reservation in reservations:
+                index.add(reservation)
+            Reservation._indexed(index)
+        for reservation in replaced:
+            Reservation._notify('canceled', reservation)
+        for reservation in reservations:
+            Reservation._notify('created', reservation)
+        return reservations
 
     @staticmethod
+    @timed('reservation.cancel_reservation')
     def cancel_reservation(reservation_id):
-        """Cancel a reservation by removing it from the list and saving."""
-        reservations = Reservation.load_reservations()
-        reservations = [
-                        reservation for reservation in reservations
-                        if reservation['reservation_id'] != reservation_id
-                        ]
-        Reservation.save_reservations(reservations)
+        """
+        Cancel a reservation by removing it from the storage backend.
+
+        Returns:
+            OperationResult: The outcome, with the canceled reservation record.
+        """
+        with Reservation.repository.transaction():
+            index = Reservation._current_index()
+            reservation = Reservation.repository.delete(reservation_id)
+            if reservation is None:
+                logger.info("Reservation %s not canceled: not found.", reservation_id)
+                return OperationResult(False, None, "Reservation not found.")
+            if index is not None:
+                index.discard(reservation_id)
+                Reservation._indexed(index)
+        logger.info("Reservation %s canceled.", reservation_id)
+        Reservation._notify('canceled', reservation)
+        return OperationResult(
+            True, reservation, f"Reservation {reservation_id} canceled successfully."
+        )
+
+    @staticmethod
+    @timed('reservation.cancel_reservations')
+    def cancel_reservations(reservation_ids):
+        """
+        Cancel several reservations with a single write.
+
+        Returns:
+            list: The canceled reservation records; IDs without a reservation are skipped.
+        """
+        with Reservation.repository.transaction():
+            index = Reservation._current_index()
+            reservations = Reservation.repository.delete_many(reservation_ids)
+            if index is not None:
+                for reservation in reservations:
+                    index.discard(reservation['reservation_id'])
+                Reservation._indexed(index)
+        logger.info("%d reservations canceled.", len(reservations))
+        for reservation in reservations:
+            Reservation._notify('canceled', reservation)
+        return reservations
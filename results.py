@@ -0,0 +1,23 @@
+"""
+This module defines the OperationResult type returned by the create, modify and delete
+operations of the Hotel, Customer and Reservation classes.
+"""
+
+from collections import namedtuple
+
+
+class OperationResult(namedtuple('OperationResult', ['success', 'record', 'message', 'conflicts'],
+                                  defaults=((),))):
+    """
+    Outcome of an operation on a hotel, customer or reservation.
+
+    Attributes:
+        success (bool): Whether the operation was applied.
+        record (dict): The record created, modified or deleted, or None if there was none.
+        message (str): A human readable description of the outcome.
+        conflicts (tuple): The existing records that prevented the operation, if any.
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return self.success
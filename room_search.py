@@ -0,0 +1,151 @@
+"""
+This module defines the RoomSearchIndex class used to find free rooms.
+
+Rooms are grouped by hotel location and room type, and each group is kept sorted by price,
+so a search only visits the rooms of the requested location and type that are cheap enough.
+Whether a candidate room is free is then answered by the per-room interval index of the
+reservations (see availability.py). The groups are sorted once when the index is built, and
+adding or removing a hotel or a room afterwards only touches the rooms concerned. The index
+also maps every (hotel_id, room_id) pair to its room, for room lookups in O(1).
+"""
+
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+
+def normalize_location(location):
+    """Return the key used to group hotels by location."""
+    return ' '.join(str(location).split()).casefold()
+
+
+def _room_price(room):
+    """Return the price a room is sorted by; rooms without a numeric price sort last."""
+    price = room.get('price')
+    return price if isinstance(price, (int, float)) else math.inf
+
+
+class RoomSearchIndex:
+    """Secondary indexes over hotel rooms by location, room type and price."""
+
+    def __init__(self, hotels=()):
+        """
+        Initializes the index with an iterable of hotel records.
+
+        Args:
+            hotels (iterable): Hotel dictionaries as stored in hotels.json.
+        """
+        self._locations = {}
+        self._hotels = {}
+        self._rooms = {}
+        groups = {}
+        for hotel in hotels:
+            for group_key, price, entry in self._entries(hotel):
+                groups.setdefault(group_key, []).append((price, entry))
+        for (location, room_type), rooms in groups.items():
+            rooms.sort(key=itemgetter(0))
+            self._locations.setdefault(location, {})[room_type] = (
+                [price for price, _ in rooms], [entry for _, entry in rooms]
+            )
+
+    def _entries(self, hotel):
+        """Registers a hotel and returns ((location, type), price, entry) for its rooms."""
+        location = normalize_location(hotel['location'])
+        entries = [self._entry(hotel['hotel_id'], location, room) for room in hotel['rooms']]
+        self._hotels[hotel['hotel_id']] = entries
+        return entries
+
+    def _entry(self, hotel_id, location, room):
+        """Registers a room and returns its ((location, type), price, entry) tuple."""
+        indexed = ((location, room.get('type')), _room_price(room), (hotel_id, room))
+        self._rooms.setdefault((hotel_id, room.get('room_id')), indexed)
+        return indexed
+
+    def _insert(self, group_key, price, entry):
+        """Inserts a room entry into its group, keeping the group sorted by price."""
+        location, room_type = group_key
+        types = self._locations.setdefault(location, {})
+        prices, entries = types.setdefault(room_type, ([], []))
+        position = bisect_right(prices, price)
+        prices.insert(position, price)
+        entries.insert(position, entry)
+
+    def _delete(self, group_key, price, entry):
+        """Deletes a room entry from its group, dropping groups left empty."""
+        location, room_type = group_key
+        types = self._locations[location]
+        prices, entries = types[room_type]
+        position = bisect_left(prices, price)
+        while entries[position] is not entry:
+            position += 1
+        del prices[position]
+        del entries[position]
+        if not entries:
+            del types[room_type]
+            if not types:
+                del self._locations[location]
+
+    def add_hotel(self, hotel):
+        """Adds the rooms of a hotel record to the index, replacing any with the same ID."""
+        self.remove_hotel(hotel['hotel_id'])
+        for indexed in self._entries(hotel):
+            self._insert(*indexed)
+
+    def remove_hotel(self, hotel_id):
+        """Removes the rooms of a hotel from the index, if it was added."""
+        for indexed in self._hotels.pop(hotel_id, ()):
+            key = (hotel_id, indexed[2][1].get('room_id'))
+            if self._rooms.get(key) is indexed:
+                del self._rooms[key]
+            self._delete(*indexed)
+
+    def add_room(self, hotel_id, location, room):
+        """Adds one room of a hotel at the given location to the index."""
+        indexed = self._entry(hotel_id, normalize_location(location), room)
+        self._hotels.setdefault(hotel_id, []).append(indexed)
+        self._insert(*indexed)
+
+    def remove_room(self, hotel_id, room_id):
+        """Removes one room of a hotel from the index, if it was added."""
+        indexed = self._rooms.pop((hotel_id, room_id), None)
+        if indexed is None:
+            return
+        entries = self._hotels[hotel_id]
+        del entries[next(i for i, other in enumerate(entries) if other is indexed)]
+        self._delete(*indexed)
+
+    def room(self, hotel_id, room_id):
+        """Returns the room of a hotel with the given ID, or None."""
+        indexed = self._rooms.get((hotel_id, room_id))
+        return None if indexed is None else indexed[2][1]
+
+    def candidates(self, location, room_type=None, max_price=None):
+        """Yields (price, hotel_id, room) tuples matching the static criteria, cheapest first."""
+        types = self._locations.get(normalize_location(location), {})
+        groups = [types.get(room_type, ([], []))] if room_type is not None else types.values()
+        streams = []
+        for prices, entries in groups:
+            end = len(entries) if max_price is None else bisect_right(prices, max_price)
+            streams.append(
+                (price, hotel_id, room)
+                for price, (hotel_id, room) in zip(prices[:end], entries[:end])
+            )
+        return heapq.merge(*streams, key=itemgetter(0))
+
+    def find_available(self, availability, location, start_date, end_date,
+                       room_type=None, max_price=None):
+        """
+        Returns the rooms matching the criteria that are free for the whole period.
+
+        Args:
+            availability (AvailabilityIndex): The reservations to check occupancy against.
+
+        Returns:
+            list: Room dictionaries with an added 'hotel_id' key, ordered by price.
+        """
+        return [
+            dict(room, hotel_id=hotel_id)
+            for _, hotel_id, room in self.candidates(location, room_type, max_price)
+            if availability.is_free(hotel_id, room['room_id'], start_date, end_date)
+        ]
@@ -0,0 +1,460 @@
+"""
+This module defines BookingService, an asyncio HTTP/JSON front end for the Hotel, Customer
+and Reservation classes.
+
+The service only uses the standard library. Connections are handled on the event loop with
+HTTP/1.1 keep-alive, while every call into the classes, which may block on file I/O, runs
+on a bounded thread pool. Booking requests for the same room are coalesced: while one
+batch for a room is being written, later requests for that room queue up and are saved
+together with Hotel.reserve_rooms_batch, so writers never contend for a room.
+
+Endpoints (request and response bodies are JSON):
+
+    GET    /hotels                       list hotels
+    POST   /hotels                       create a hotel
+    GET    /hotels/<hotel_id>            get a hotel
+    PATCH  /hotels/<hotel_id>            modify a hotel
+    DELETE /hotels/<hotel_id>            delete a hotel without reservations, or with
+                                         ?cascade=true also cancel its reservations
+    GET    /customers                    list customers, or find them by ?email=, ?phone=
+                                         or a type-ahead ?name= prefix [&limit=]
+                                         (and the same four routes as hotels)
+    GET    /reservations                 list reservations, filtered by ?hotel_id=,
+                                         ?customer_id= and/or ?start_date=&end_date=
+    POST   /reservations                 reserve a room
+    GET    /reservations/<id>            get a reservation
+    DELETE /reservations/<id>            cancel a reservation
+    POST   /holds                        hold a room during checkout, optionally for
+                                         "ttl" seconds
+    POST   /holds/<hold_id>/confirm      turn a hold into a reservation
+    DELETE /holds/<hold_id>              release a hold
+    GET    /availability                 free rooms, ?location=&start_date=&end_date=
+                                         [&room_type=][&max_price=]
+    GET    /hotels/<hotel_id>/rooms/<room_id>/quote
+                                         price of a stay, ?start_date=&end_date=
+
+Run as a script to serve the JSON files of the current directory, or of --data:
+
+    python service.py --port 8000 --data /srv/hotel-data
+"""
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from customer import Customer
+from hotel import HOLD_TTL, Hotel
+from records import json_default
+from reservation import Reservation
+from store import BACKENDS, Store, activate, current_store
+from streaming import reservation_filter
+
+MAX_BODY_SIZE = 1024 * 1024
+RESERVATION_FIELDS = ('hotel_id', 'customer_id', 'room_id', 'start_date', 'end_date')
+
+
+class HttpError(Exception):
+    """An error reported to the client with an HTTP status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def encode(payload):
+    """Serialize a response payload, turning OperationResult tuples into objects."""
+    if hasattr(payload, '_asdict'):
+        payload = payload._asdict()
+    return json.dumps(payload, default=json_default).encode('utf-8')
+
+
+def result_response(result, success_status=HTTPStatus.OK, failure_status=HTTPStatus.NOT_FOUND):
+    """Return the status and payload of an OperationResult."""
+    return (success_status if result.success else failure_status), result
+
+
+def conflict_response(result):
+    """Return the status and payload of a write, 409 if conflicting records prevented it."""
+    status = HTTPStatus.CONFLICT if result.conflicts else HTTPStatus.NOT_FOUND
+    return result_response(result, failure_status=status)
+
+
+def is_true(query, name):
+    """Return True if a query parameter is set to true, 1 or yes."""
+    return query.get(name, '').lower() in ('true', '1', 'yes')
+
+
+def require(mapping, *fields):
+    """Raise a 400 error if any of the fields is missing from a query or body."""
+    missing = [field for field in fields if field not in mapping]
+    if missing:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Missing fields: {', '.join(missing)}.")
+
+
+def forbid(mapping, *fields):
+    """Raise a 400 error if a body sets any of the fields, such as a record's key."""
+    present = [field for field in fields if field in mapping]
+    if present:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Fields cannot be changed: {', '.join(present)}.")
+
+
+def require_strings(mapping, *fields):
+    """Raise a 400 error if any of the fields of a body is not a string."""
+    invalid = [field for field in fields if not isinstance(mapping[field], str)]
+    if invalid:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Fields must be strings: {', '.join(invalid)}.")
+
+
+class BookingService:
+    """HTTP service exposing hotels, customers, reservations and availability."""
+
+    ROUTES = (
+        ('GET', r'/hotels', 'list_hotels'),
+        ('POST', r'/hotels', 'create_hotel'),
+        ('GET', r'/hotels/(?P<hotel_id>[^/]+)', 'get_hotel'),
+        ('PATCH', r'/hotels/(?P<hotel_id>[^/]+)', 'modify_hotel'),
+        ('DELETE', r'/hotels/(?P<hotel_id>[^/]+)', 'delete_hotel'),
+        ('GET', r'/hotels/(?P<hotel_id>[^/]+)/rooms/(?P<room_id>[^/]+)/quote', 'quote_stay'),
+        ('GET', r'/customers', 'list_customers'),
+        ('POST', r'/customers', 'create_customer'),
+        ('GET', r'/customers/(?P<customer_id>[^/]+)', 'get_customer'),
+        ('PATCH', r'/customers/(?P<customer_id>[^/]+)', 'modify_customer'),
+        ('DELETE', r'/customers/(?P<customer_id>[^/]+)', 'delete_customer'),
+        ('GET', r'/reservations', 'list_reservations'),
+        ('POST', r'/reservations', 'create_reservation'),
+        ('GET', r'/reservations/(?P<reservation_id>[^/]+)', 'get_reservation'),
+        ('DELETE', r'/reservations/(?P<reservation_id>[^/]+)', 'cancel_reservation'),
+        ('POST', r'/holds', 'hold_room'),
+        ('POST', r'/holds/(?P<hold_id>[^/]+)/confirm', 'confirm_hold'),
+        ('DELETE', r'/holds/(?P<hold_id>[^/]+)', 'release_hold'),
+        ('GET', r'/availability', 'availability'),
+    )
+
+    def __init__(self, max_workers=8, max_pending=64, store=None):
+        """
+        Initializes the service.
+
+        Args:
+            max_workers (int): Number of threads running the blocking calls.
+            max_pending (int): Maximum number of calls submitted to the thread pool at
+                once; further requests wait on the event loop.
+            store (Store): The store to serve; the store current where requests are
+                handled (see store.py) if None.
+        """
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='booking')
+        self.server = None
+        self._slots = asyncio.Semaphore(max_pending)
+        self._room_queues = {}
+        self._routes = [(method, re.compile(pattern + '$'), getattr(self, name))
+                        for method, pattern, name in self.ROUTES]
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """Start listening. Port 0 picks a free port, see the ``port`` property."""
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    @property
+    def port(self):
+        """The port the service listens on."""
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop listening and wait for the running calls to finish."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def run(self, function, *args):
+        """Run a blocking function on the thread pool, in the service's store."""
+        context = contextvars.copy_context()
+        if self.store is not None:
+            context.run(activate, self.store)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(context.run, function, *args)
+            )
+
+    async def handle_connection(self, reader, writer):
+        """Serve the requests of one connection until it is closed."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = True
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip().lower()
+                    connection = headers.get('connection', '')
+                    keep_alive = (connection != 'close' if version == 'HTTP/1.1'
+                                  else connection == 'keep-alive')
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY_SIZE:
+                        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        "Request body too large.")
+                    body = await reader.readexactly(length) if length > 0 else b''
+                    status, content = await self.handle(method, target, body)
+                except (ValueError, HttpError) as error:
+                    keep_alive = False
+                    status = getattr(error, 'status', HTTPStatus.BAD_REQUEST)
+                    content = encode({'error': getattr(error, 'message', "Bad request.")})
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, method, target, body):
+        """
+        Dispatch a request to its handler.
+
+        Returns:
+            tuple: The HTTPStatus and the encoded JSON response body.
+        """
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(url.path)
+            if match is None or route_method != method:
+                continue
+            params = {name: unquote(value) for name, value in match.groupdict().items()}
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, encode({'error': "Invalid JSON body."})
+            if not isinstance(data, dict):
+                return HTTPStatus.BAD_REQUEST, encode({'error': "Expected a JSON object."})
+            try:
+                if asyncio.iscoroutinefunction(handler):
+                    status, payload = await handler(query, data, **params)
+                    return status, encode(payload)
+                return await self.run(self._call, handler, query, data, params)
+            except HttpError as error:
+                return error.status, encode({'error': error.message})
+            except Exception:  # pylint: disable=broad-except
+                return HTTPStatus.INTERNAL_SERVER_ERROR, encode({'error': "Internal error."})
+        if any(pattern.match(url.path) for _, pattern, _ in self._routes):
+            return HTTPStatus.METHOD_NOT_ALLOWED, encode({'error': "Method not allowed."})
+        return HTTPStatus.NOT_FOUND, encode({'error': "Not found."})
+
+    @staticmethod
+    def _call(handler, query, data, params):
+        """Run a blocking handler and encode its payload, on a worker thread."""
+        try:
+            status, payload = handler(query, data, **params)
+        except ValueError as error:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(error)) from None
+        return status, encode(payload)
+
+    @staticmethod
+    def _found(record, kind):
+        """Return a 200 response with a record, or raise a 404 error."""
+        if record is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"{kind} not found.")
+        return HTTPStatus.OK, record
+
+    def list_hotels(self, _query, _data):
+        """GET /hotels"""
+        return HTTPStatus.OK, Hotel.load_hotels()
+
+    def create_hotel(self, _query, data):
+        """POST /hotels"""
+        require(data, 'hotel_id', 'name', 'location', 'rooms', 'amenities')
+        return result_response(Hotel(data).create_hotel(), HTTPStatus.CREATED)
+
+    def get_hotel(self, _query, _data, hotel_id):
+        """GET /hotels/<hotel_id>"""
+        return self._found(Hotel.repository.get(hotel_id), "Hotel")
+
+    def modify_hotel(self, _query, data, hotel_id):
+        """PATCH /hotels/<hotel_id>"""
+        forbid(data, 'hotel_id')
+        return result_response(Hotel.modify_hotel_info(hotel_id, **data))
+
+    def delete_hotel(self, query, _data, hotel_id):
+        """DELETE /hotels/<hotel_id>"""
+        return conflict_response(Hotel.delete_hotel(hotel_id, is_true(query, 'cascade')))
+
+    def quote_stay(self, query, _data, hotel_id, room_id):
+        """GET /hotels/<hotel_id>/rooms/<room_id>/quote"""
+        require(query, 'start_date', 'end_date')
+        return result_response(Hotel.quote_stay(hotel_id, room_id, query['start_date'],
+                                                query['end_date']))
+
+    def list_customers(self, query, _data):
+        """GET /customers"""
+        if 'email' in query:
+            return HTTPStatus.OK, Customer.find_by_email(query['email'])
+        if 'phone' in query:
+            return HTTPStatus.OK, Customer.find_by_phone(query['phone'])
+        if 'name' in query:
+            return HTTPStatus.OK, Customer.search_by_name(query['name'],
+                                                          int(query.get('limit', 10)))
+        return HTTPStatus.OK, Customer.load_customers()
+
+    def create_customer(self, _query, data):
+        """POST /customers"""
+        require(data, 'customer_id', 'name', 'email', 'phone')
+        customer = Customer(data['customer_id'], data['name'], data['email'], data['phone'])
+        return result_response(customer.create_customer(), HTTPStatus.CREATED,
+                               HTTPStatus.CONFLICT)
+
+    def get_customer(self, _query, _data, customer_id):
+        """GET /customers/<customer_id>"""
+        return self._found(Customer.repository.get(customer_id), "Customer")
+
+    def modify_customer(self, _query, data, customer_id):
+        """PATCH /customers/<customer_id>"""
+        forbid(data, 'customer_id')
+        return conflict_response(Customer.modify_customer_info(customer_id, **data))
+
+    def delete_customer(self, query, _data, customer_id):
+        """DELETE /customers/<customer_id>"""
+        return conflict_response(Customer.delete_customer(customer_id, is_true(query, 'cascade')))
+
+    def list_reservations(self, query, _data):
+        """GET /reservations"""
+        date_range = None
+        if 'start_date' in query or 'end_date' in query:
+            require(query, 'start_date', 'end_date')
+            date_range = (query['start_date'], query['end_date'])
+        if 'customer_id' in query:
+            reservations = filter(reservation_filter(query.get('hotel_id'), date_range),
+                                  Reservation.find_by_customer(query['customer_id']))
+        else:
+            reservations = Reservation.iter_reservations(query.get('hotel_id'), date_range)
+        return HTTPStatus.OK, list(reservations)
+
+    def get_reservation(self, _query, _data, reservation_id):
+        """GET /reservations/<reservation_id>"""
+        return self._found(Reservation.repository.get(reservation_id), "Reservation")
+
+    def cancel_reservation(self, _query, _data, reservation_id):
+        """DELETE /reservations/<reservation_id>"""
+        return result_response(Hotel.cancel_reservation(reservation_id))
+
+    def hold_room(self, _query, data):
+        """POST /holds"""
+        require(data, *RESERVATION_FIELDS)
+        require_strings(data, *RESERVATION_FIELDS)
+        ttl = data.get('ttl', HOLD_TTL)
+        if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Field ttl must be a positive number.")
+        result = Hotel.hold_room(*(data[field] for field in RESERVATION_FIELDS), ttl=ttl)
+        return result_response(result, HTTPStatus.CREATED, HTTPStatus.CONFLICT)
+
+    def confirm_hold(self, _query, _data, hold_id):
+        """POST /holds/<hold_id>/confirm"""
+        result = Hotel.confirm_hold(hold_id)
+        status = HTTPStatus.CONFLICT if result.conflicts else HTTPStatus.NOT_FOUND
+        return result_response(result, HTTPStatus.CREATED, status)
+
+    def release_hold(self, _query, _data, hold_id):
+        """DELETE /holds/<hold_id>"""
+        return result_response(Hotel.release_hold(hold_id))
+
+    def availability(self, query, _data):
+        """GET /availability"""
+        require(query, 'location', 'start_date', 'end_date')
+        max_price = query.get('max_price')
+        return HTTPStatus.OK, Hotel.find_available_rooms(
+            query['location'], query['start_date'], query['end_date'],
+            query.get('room_type'), None if max_price is None else float(max_price)
+        )
+
+    async def create_reservation(self, _query, data):
+        """
+        POST /reservations
+
+        The request joins the queue of its room. The first request of a room becomes the
+        queue's writer: it saves everything queued with one reserve_rooms_batch call and
+        repeats until the queue is empty, while the other requests wait for their result.
+        """
+        require(data, *RESERVATION_FIELDS)
+        require_strings(data, *RESERVATION_FIELDS)
+        request = {field: data[field] for field in RESERVATION_FIELDS}
+        key = (self.store or current_store(), request['hotel_id'], request['room_id'])
+        future = asyncio.get_running_loop().create_future()
+        queue = self._room_queues.get(key)
+        if queue is not None:
+            queue.append((request, future))
+        else:
+            queue = self._room_queues[key] = [(request, future)]
+            batch = []
+            try:
+                while queue:
+                    batch = queue[:]
+                    del queue[:]
+                    results = await self.run(
+                        Hotel.reserve_rooms_batch, [item for item, _ in batch]
+                    )
+                    for (_, waiter), result in zip(batch, results):
+                        waiter.set_result(result)
+            except BaseException as error:
+                for _, waiter in batch + queue:
+                    if waiter is not future and not waiter.done():
+                        waiter.set_exception(error)
+                raise
+            finally:
+                del self._room_queues[key]
+        result = await future
+        if result.success:
+            return HTTPStatus.CREATED, result
+        if result.conflicts:
+            return HTTPStatus.CONFLICT, result
+        return HTTPStatus.BAD_REQUEST, result
+
+
+async def serve(host, port, max_workers, directory=None, backend='json'):
+    """Run a BookingService until the task is cancelled."""
+    service = BookingService(max_workers, store=Store.open(directory, backend))
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{service.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    """Command line entry point of the booking service."""
+    parser = argparse.ArgumentParser(description="Serve the hotel booking API over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=8, help="size of the thread pool")
+    parser.add_argument('--data', default=None,
+                        help="data directory (default: the working directory)")
+    parser.add_argument('--backend', choices=BACKENDS, default='json')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.data, args.backend))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
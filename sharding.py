@@ -0,0 +1,148 @@
+"""
+This module defines ShardedStore, which splits hotels and reservations over several stores.
+
+Every hotel, with its reservations, lives in one shard chosen by its hotel_id, so shards can
+be kept on different disks or databases. The customers and the reservation ID counter are
+shared by the shards. Operations on one hotel run with its shard as the current store (see
+store.py); searches over every hotel query each shard and merge the results, and
+delete_customer checks or cancels the customer's reservations in every shard.
+"""
+
+import heapq
+import os
+import zlib
+from contextlib import ExitStack
+from itertools import chain
+
+from customer import Customer
+from hotel import Hotel
+from ids import IdAllocator
+from reservation import Reservation
+from results import OperationResult
+from store import Store, use
+
+
+def stable_hash(hotel_id):
+    """Return a hash of a hotel ID that is the same in every process and run."""
+    return zlib.crc32(str(hotel_id).encode('utf-8'))
+
+
+class ShardedStore:
+    """
+    Hotels and reservations split over several stores by hotel_id, with shared customers.
+
+    Operations on one hotel run in its shard: ``with sharded.use(hotel_id):``. Every shard
+    shares one reservation ID allocator, so reservation IDs are unique across shards.
+    """
+
+    def __init__(self, shards, route=None):
+        """
+        Initializes the sharded store.
+
+        Args:
+            shards (dict): Stores keyed by shard name.
+            route (callable): Returns the shard name of a hotel_id. By default hotels are
+                spread over the shards by a stable hash of their ID.
+        """
+        self.shards = dict(shards)
+        self._names = sorted(self.shards)
+        self.route = route or self._hash_route
+
+    @classmethod
+    def open(cls, directories, customers_directory, backend='json', route=None):
+        """
+        Open a sharded store.
+
+        Args:
+            directories (dict): Data directory of every shard, keyed by shard name.
+            customers_directory (str): Directory of the shared customers and of the
+                shared reservation ID counter.
+            backend (str): Backend of every store, see Store.open.
+            route (callable): See __init__.
+        """
+        shared = Store.open(customers_directory, backend)
+        allocator = IdAllocator(os.path.join(customers_directory, 'reservations.seq'))
+        return cls({name: Store.open(directory, backend, shared.customers, allocator)
+                    for name, directory in directories.items()}, route)
+
+    def _hash_route(self, hotel_id):
+        """Route a hotel to a shard by a stable hash of its ID."""
+        return self._names[stable_hash(hotel_id) % len(self._names)]
+
+    def shard_for(self, hotel_id):
+        """Return the store holding a hotel and its reservations."""
+        return self.shards[self.route(hotel_id)]
+
+    def use(self, hotel_id):
+        """Make the shard of a hotel current for the duration of a with block."""
+        return use(self.shard_for(hotel_id))
+
+    def shard_of_reservation(self, reservation_id):
+        """Return the store holding a reservation, or None if no shard has it."""
+        for store in self.shards.values():
+            if reservation_id in store.reservations:
+                return store
+        return None
+
+    def iter_reservations(self, hotel_id=None, date_range=None):
+        """Yield reservations like Reservation.iter_reservations, across the shards."""
+        stores = ([self.shard_for(hotel_id)] if hotel_id is not None
+                  else self.shards.values())
+
+        iterators = []
+        for store in stores:
+            with use(store):
+                iterators.append(Reservation.iter_reservations(hotel_id, date_range))
+        return chain.from_iterable(iterators)
+
+    def delete_customer(self, customer_id, cascade=False):
+        """
+        Delete a customer like Customer.delete_customer, with their reservations in every shard.
+
+        The shared customers and the reservations of every shard stay locked until the
+        customer is deleted, so no shard can book for the customer in the meantime.
+
+        Returns:
+            OperationResult: The outcome, with the deleted customer record, or the
+            reservations that prevented the delete in ``conflicts``.
+        """
+        stores = list(self.shards.values())
+        with ExitStack() as stack:
+            stack.enter_context(stores[0].customers.transaction())
+            for store in stores:
+                stack.enter_context(store.reservations.transaction())
+            if customer_id not in stores[0].customers:
+                return OperationResult(False, None, "Customer not found.")
+            found = []
+            for store in stores:
+                with use(store):
+                    found.append(Reservation.find_by_customer(customer_id))
+            reservations = tuple(chain.from_iterable(found))
+            if reservations and not cascade:
+                return OperationResult(
+                    False, None,
+                    f"Customer {customer_id} has {len(reservations)} reservations.",
+                    reservations
+                )
+            for store, records in zip(stores, found):
+                if records:
+                    with use(store):
+                        Reservation.cancel_reservations([r['reservation_id'] for r in records])
+            with use(stores[0]):
+                return Customer.delete_customer(customer_id)
+
+    def find_available_rooms(self, location, start_date, end_date, room_type=None,
+                             max_price=None):
+        """Find free rooms like Hotel.find_available_rooms, across the shards, cheapest first."""
+        results = []
+        for store in self.shards.values():
+            with use(store):
+                results.append(Hotel.find_available_rooms(
+                    location, start_date, end_date, room_type, max_price))
+        return list(heapq.merge(*results, key=price_key))
+
+
+def price_key(room):
+    """Sort key of a room by price, rooms without a numeric price last."""
+    price = room.get('price')
+    return (0, price) if isinstance(price, (int, float)) else (1, 0)
@@ -0,0 +1,402 @@
+"""
+This module defines a compact binary snapshot format for the data files, read through mmap.
+
+A snapshot holds one collection. Every string (IDs, and for hotels and customers the JSON
+of each record) is stored once in a sorted string table, so records refer to strings by
+number. Reservations are fixed-width records of string numbers and ordinal dates (see
+dates.py); other collections store the key and the JSON text of each record. The header
+gives the offset of every section:
+
+    header       magic, version, layout, record and string counts, key field, offsets
+    offsets      string_count + 1 uint32 byte offsets into the string data
+    strings      UTF-8 string data, sorted
+    records      record_count fixed-width records, in the order they were written
+    key index    record numbers sorted by primary key
+    room index   reservations only: record numbers sorted by (hotel_id, room_id, start)
+
+Snapshot opens a file with mmap and decodes records and strings only when they are read, so
+opening is O(1), a lookup by key or by room is a binary search, and the processes reading
+one snapshot share its pages in the page cache. SnapshotStorage plugs the format into a
+store as the 'snapshot' backend (see store.py).
+
+Run as a script to convert between the JSON files and snapshots:
+
+    python snapshot.py export reservations.json reservations.snap
+    python snapshot.py import reservations.snap reservations.json
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+
+from dates import format_date, parse_date
+from records import json_default
+from storage import JsonFileStorage, file_signature, read_json, write_json
+
+MAGIC = b'HOTELSNP'
+VERSION = 1
+DOCUMENTS, RESERVATIONS = 0, 1
+NONE = 0xFFFFFFFF
+
+# Primary key of the collections, by file name, for the command line tools.
+KEYS = {'hotels': 'hotel_id', 'customers': 'customer_id', 'reservations': 'reservation_id'}
+
+_HEADER = struct.Struct('<8sIIIII5Q')
+_UINT = struct.Struct('<I')
+_SPAN = struct.Struct('<II')
+_LAYOUTS = {
+    # key, JSON text of the record
+    DOCUMENTS: struct.Struct('<II'),
+    # reservation_id, customer_id, hotel_id, room_id, start, end, JSON of other fields
+    RESERVATIONS: struct.Struct('<IIIIiiI'),
+}
+_RESERVATION_FIELDS = ('reservation_id', 'customer_id', 'hotel_id', 'room_id',
+                       'start_date', 'end_date')
+
+
+def _reservation_row(record):
+    """
+    Return the string fields, ordinal dates and other fields of a reservation.
+
+    Raises:
+        ValueError: If a field is missing, an ID is not a string or a date is malformed.
+    """
+    missing = [field for field in _RESERVATION_FIELDS if field not in record]
+    if missing:
+        raise ValueError(f"Reservation {record.get('reservation_id')!r} has no "
+                         f"{', '.join(missing)}: it cannot be stored in a snapshot.")
+    ids = tuple(record[field] for field in _RESERVATION_FIELDS[:4])
+    if not all(isinstance(value, str) for value in ids):
+        raise ValueError(f"Reservation {ids[0]!r} has non-string IDs: "
+                         "it cannot be stored in a snapshot.")
+    dates = (parse_date(record['start_date']), parse_date(record['end_date']))
+    other = {field: value for field, value in record.items()
+             if field not in _RESERVATION_FIELDS}
+    return ids, dates, json.dumps(other, default=json_default) if other else None
+
+
+def write_snapshot(path, records, key):
+    """
+    Write records to a snapshot file, replacing it atomically.
+
+    Reservations (key 'reservation_id') use fixed-width records and get a room index; other
+    collections store each record as JSON text.
+
+    Raises:
+        ValueError: If a reservation cannot be stored (see _reservation_row), or a
+            primary key is not a string.
+    """
+    layout = RESERVATIONS if key == 'reservation_id' else DOCUMENTS
+    rows, strings = _rows(layout, records, key)
+    number = {string: position for position, string in enumerate(strings)}
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    packed, key_order, room_order = _pack_rows(layout, rows, number)
+
+    sections = [struct.pack(f'<{len(offsets)}I', *offsets), b''.join(encoded),
+                b''.join(packed), struct.pack(f'<{len(key_order)}I', *key_order),
+                struct.pack(f'<{len(room_order)}I', *room_order)]
+    positions = [_HEADER.size]
+    for section in sections[:-1]:
+        positions.append(positions[-1] + len(section))
+    if not room_order:
+        positions[-1] = 0
+    header = _HEADER.pack(MAGIC, VERSION, layout, len(packed), len(strings), number[key],
+                          *positions)
+
+    temporary_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(temporary_path, 'wb') as file:
+            file.write(header)
+            file.write(b''.join(sections))
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def _rows(layout, records, key):
+    """
+    Return the rows of the records and the sorted strings they refer to.
+
+    Raises:
+        ValueError: See write_snapshot.
+    """
+    strings = {key}
+    if layout == RESERVATIONS:
+        rows = [_reservation_row(record) for record in records]
+        for ids, _, other in rows:
+            strings.update(ids)
+            if other is not None:
+                strings.add(other)
+    else:
+        rows = [(record[key], json.dumps(record, default=json_default)) for record in records]
+        if not all(isinstance(row_key, str) for row_key, _ in rows):
+            raise ValueError(f"Every {key} must be a string to be stored in a snapshot.")
+        for row in rows:
+            strings.update(row)
+    return rows, sorted(strings)
+
+
+def _pack_rows(layout, rows, number):
+    """
+    Pack the rows of a snapshot as fixed-width records and sort its indexes.
+
+    Returns:
+        tuple: The packed records, the record numbers sorted by key, and for reservations
+        the record numbers sorted by (hotel_id, room_id, start).
+    """
+    record_struct = _LAYOUTS[layout]
+    if layout == RESERVATIONS:
+        packed = [record_struct.pack(*(number[value] for value in ids), *dates,
+                                     NONE if other is None else number[other])
+                  for ids, dates, other in rows]
+        keys = [number[ids[0]] for ids, _, _ in rows]
+        rooms = [(number[ids[2]], number[ids[3]], dates[0]) for ids, dates, _ in rows]
+        room_order = sorted(range(len(rows)), key=rooms.__getitem__)
+    else:
+        packed = [record_struct.pack(number[row_key], number[data]) for row_key, data in rows]
+        keys = [number[row_key] for row_key, _ in rows]
+        room_order = []
+    return packed, sorted(range(len(rows)), key=keys.__getitem__), room_order
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot file through mmap, decoding records as they are read.
+
+    Strings are decoded once and then shared by every record that refers to them.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a snapshot.
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version.
+        """
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a snapshot.")
+        (magic, version, self.layout, self.record_count, self.string_count, key,
+         self._offsets, self._strings, self._records, self._key_index,
+         self._room_index) = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or self.layout not in _LAYOUTS:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} snapshot.")
+        self._record_struct = _LAYOUTS[self.layout]
+        self._decoded = {}
+        self._dates = {}
+        self.key = self.string(key)
+
+    def close(self):
+        """Unmap the file."""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.record_count
+
+    def __iter__(self):
+        return (self.record(number) for number in range(self.record_count))
+
+    def string(self, number):
+        """Return a string of the string table."""
+        string = self._decoded.get(number)
+        if string is None:
+            start, end = _SPAN.unpack_from(self._map, self._offsets + 4 * number)
+            start += self._strings
+            end += self._strings
+            string = self._decoded[number] = self._map[start:end].decode('utf-8')
+        return string
+
+    def _string_number(self, value):
+        """Return the number of a string of the table, or None if it is not in it."""
+        low, high = 0, self.string_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.string(middle) < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.string_count and self.string(low) == value else None
+
+    def _date(self, ordinal):
+        """Return the 'YYYY-MM-DD' string of an ordinal date, formatting each date once."""
+        string = self._dates.get(ordinal)
+        if string is None:
+            string = self._dates[ordinal] = format_date(ordinal)
+        return string
+
+    def _row(self, number):
+        """Return the unpacked fixed-width record at a record number."""
+        return self._record_struct.unpack_from(
+            self._map, self._records + self._record_struct.size * number)
+
+    def record(self, number):
+        """Decode the record at a record number, in the order the records were written."""
+        row = self._row(number)
+        if self.layout == DOCUMENTS:
+            return json.loads(self.string(row[1]))
+        record = dict(zip(_RESERVATION_FIELDS, map(self.string, row[:4])))
+        record['start_date'] = self._date(row[4])
+        record['end_date'] = self._date(row[5])
+        if row[6] != NONE:
+            record.update(json.loads(self.string(row[6])))
+        return record
+
+    def _indexed(self, index, position):
+        """Return the record number at a position of the key or room index."""
+        return _UINT.unpack_from(self._map, index + 4 * position)[0]
+
+    def _lower_bound(self, index, count, sort_key, target):
+        """Return the first position of an index whose record's sort key is >= target."""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if sort_key(self._row(self._indexed(index, middle))) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get(self, key):
+        """Return the record with the given primary key, or None."""
+        number = self._string_number(key)
+        if number is None:
+            return None
+        position = self._lower_bound(self._key_index, self.record_count,
+                                     lambda row: row[0], number)
+        if position == self.record_count:
+            return None
+        record_number = self._indexed(self._key_index, position)
+        return self.record(record_number) if self._row(record_number)[0] == number else None
+
+    def room_reservations(self, hotel_id, room_id):
+        """
+        Return the reservations of a room, ordered by start date.
+
+        Raises:
+            ValueError: If the snapshot does not hold reservations.
+        """
+        if self.layout != RESERVATIONS:
+            raise ValueError("Room lookups are only available on reservation snapshots.")
+        hotel, room = self._string_number(hotel_id), self._string_number(room_id)
+        if hotel is None or room is None:
+            return []
+        sort_key = lambda row: (row[2], row[3])  # pylint: disable=unnecessary-lambda-assignment
+        first = self._lower_bound(self._room_index, self.record_count, sort_key, (hotel, room))
+        reservations = []
+        for position in range(first, self.record_count):
+            record_number = self._indexed(self._room_index, position)
+            if sort_key(self._row(record_number)) != (hotel, room):
+                break
+            reservations.append(self.record(record_number))
+        return reservations
+
+
+class SnapshotStorage(JsonFileStorage):
+    """
+    Stores a collection as a snapshot file, rewriting it on every mutation.
+
+    Reads go through Snapshot: get() looks a record up without decoding the others and
+    iter_records() decodes one record at a time.
+    """
+
+    def load(self):
+        """Return every record of the collection."""
+        return list(self.iter_records())
+
+    def iter_records(self):
+        """Yield the records of the collection, decoding them one at a time."""
+        try:
+            snapshot = Snapshot(self.path)
+        except FileNotFoundError:
+            return
+        with snapshot:
+            yield from snapshot
+
+    def get(self, key):
+        """Return the record with the given primary key, or None."""
+        try:
+            snapshot = Snapshot(self.path)
+        except FileNotFoundError:
+            return None
+        with snapshot:
+            return snapshot.get(key)
+
+    def save(self, records):
+        """Replace the whole collection with the given records."""
+        write_snapshot(self.path, records, self.key)
+
+    def signature(self):
+        """Return a value that changes whenever the snapshot file changes."""
+        return file_signature(self.path)
+
+
+def export_json(json_path, snapshot_path, key=None):
+    """
+    Convert a JSON data file to a snapshot.
+
+    Args:
+        key (str): Primary key field; by default guessed from the file name, e.g.
+            'reservation_id' for reservations.json.
+
+    Returns:
+        int: The number of records written.
+    """
+    if key is None:
+        key = KEYS[os.path.splitext(os.path.basename(json_path))[0]]
+    records = read_json(json_path)
+    write_snapshot(snapshot_path, records, key)
+    return len(records)
+
+
+def import_json(snapshot_path, json_path):
+    """
+    Convert a snapshot back to a JSON data file.
+
+    Returns:
+        int: The number of records written.
+    """
+    with Snapshot(snapshot_path) as snapshot:
+        records = list(snapshot)
+    write_json(json_path, records)
+    return len(records)
+
+
+def main(argv=None):
+    """Command line entry point of the JSON and snapshot converters."""
+    parser = argparse.ArgumentParser(description="Convert data files to and from snapshots.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="write a snapshot of a JSON file")
+    export_parser.add_argument('json_path')
+    export_parser.add_argument('snapshot_path')
+    export_parser.add_argument('--key', default=None,
+                               help="primary key field (default: from the file name)")
+    import_parser = commands.add_parser('import', help="write a JSON file from a snapshot")
+    import_parser.add_argument('snapshot_path')
+    import_parser.add_argument('json_path')
+    args = parser.parse_args(argv)
+    if args.command == 'export':
+        count = export_json(args.json_path, args.snapshot_path, args.key)
+        print(f"Exported {count} records to {args.snapshot_path}.")
+    else:
+        count = import_json(args.snapshot_path, args.json_path)
+        print(f"Imported {count} records into {args.json_path}.")
+
+
+if __name__ == '__main__':
+    main()
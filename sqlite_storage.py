@@ -0,0 +1,280 @@
+"""
+This module defines the SQLite storage backend and a tool to migrate the JSON files into it.
+
+SqliteStorage has the same interface as the backends in storage.py, so it can be plugged into
+the Hotel, Customer and Reservation repositories, e.g. with a store (see store.py):
+
+    with use(Store.open('data', backend='sqlite')):
+        Hotel.reserve_room(...)
+
+Each collection is a table with the primary key, the fields that are queried as columns and
+the full record as JSON. Reservations are indexed on (hotel_id, room_id, start_date, end_date)
+so overlap checks run as indexed range queries (see SqliteStorage.overlapping). Databases use
+WAL mode and every thread reuses one connection per database file. The table_versions table
+keeps a counter per table, bumped by every write, so a table's signature only changes when
+that table does.
+
+Run as a script to import the existing JSON files:
+
+    python sqlite_storage.py hotel.db
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+
+from locking import VersionLock
+from storage import read_json
+
+TABLES = {
+    'hotels': ('hotel_id', ('name', 'location')),
+    'customers': ('customer_id', ('name', 'email', 'phone')),
+    'reservations': (
+        'reservation_id',
+        ('customer_id', 'hotel_id', 'room_id', 'start_date', 'end_date'),
+    ),
+}
+
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS hotels_location ON hotels (location)',
+    'CREATE INDEX IF NOT EXISTS customers_email ON customers (email)',
+    'CREATE INDEX IF NOT EXISTS reservations_room_dates '
+    'ON reservations (hotel_id, room_id, start_date, end_date)',
+    'CREATE INDEX IF NOT EXISTS reservations_customer ON reservations (customer_id)',
+)
+
+_local = threading.local()
+
+
+def connect(path):
+    """Return this thread's connection to a database, creating the schema on first use."""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    connection = connections.get(path)
+    if connection is None:
+        connection = sqlite3.connect(path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        with connection:
+            for table, (key, columns) in TABLES.items():
+                definitions = ', '.join(f'{column} TEXT' for column in columns)
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} '
+                    f'({key} TEXT PRIMARY KEY, {definitions}, data TEXT NOT NULL)'
+                )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS table_versions '
+                '(name TEXT PRIMARY KEY, version INTEGER NOT NULL)'
+            )
+            connection.executemany(
+                'INSERT OR IGNORE INTO table_versions VALUES (?, 0)',
+                [(table,) for table in TABLES]
+            )
+            for statement in INDEXES:
+                connection.execute(statement)
+        connections[path] = connection
+    return connection
+
+
+def close_connections():
+    """Close the connections opened by the current thread."""
+    for connection in getattr(_local, 'connections', {}).values():
+        connection.close()
+    _local.connections = {}
+
+
+class SqliteStorage:
+    """Stores a collection as a table of a SQLite database."""
+
+    incremental = True
+
+    def __init__(self, path, table):
+        """
+        Initializes the storage.
+
+        Args:
+            path (str): Path of the SQLite database file.
+            table (str): One of 'hotels', 'customers' or 'reservations'.
+        """
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        self.path = path
+        self.table = table
+        # One lock and version file per table, so writing one collection does not
+        # invalidate the cached copies of the others.
+        self.lock_path = f'{path}.{table}.lock'
+        self.key, self.columns = TABLES[table]
+        fields = (self.key,) + self.columns + ('data',)
+        self._upsert = (
+            f"INSERT INTO {table} ({', '.join(fields)}) "
+            f"VALUES ({', '.join('?' for _ in fields)}) "
+            f"ON CONFLICT ({self.key}) DO UPDATE SET "
+            + ', '.join(f'{field} = excluded.{field}' for field in fields[1:])
+        )
+
+    @property
+    def connection(self):
+        """The current thread's connection to the database."""
+        return connect(self.path)
+
+    def signature(self):
+        """Return a value that changes whenever the table may have changed."""
+        return self.connection.execute(
+            'SELECT version FROM table_versions WHERE name = ?', (self.table,)
+        ).fetchone()[0]
+
+    def _changed(self, connection):
+        """Bump the table's version, inside the transaction of a write."""
+        connection.execute(
+            'UPDATE table_versions SET version = version + 1 WHERE name = ?', (self.table,)
+        )
+
+    def _row(self, record):
+        """Return the column values stored for a record."""
+        return ((record[self.key],) + tuple(record.get(column) for column in self.columns)
+                + (json.dumps(record),))
+
+    def load(self):
+        """Return every record of the collection, in insertion order."""
+        rows = self.connection.execute(f'SELECT data FROM {self.table} ORDER BY rowid')
+        return [json.loads(data) for (data,) in rows]
+
+    def iter_records(self):
+        """Yield the records of the collection, in insertion order, from a cursor."""
+        rows = self.connection.execute(f'SELECT data FROM {self.table} ORDER BY rowid')
+        return (json.loads(data) for (data,) in rows)
+
+    def get(self, key):
+        """Return the record with the given primary key, or None."""
+        row = self.connection.execute(
+            f'SELECT data FROM {self.table} WHERE {self.key} = ?', (key,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def save(self, records):
+        """Replace the whole collection with the given records."""
+        with self.connection as connection:
+            connection.execute(f'DELETE FROM {self.table}')
+            connection.executemany(self._upsert, [self._row(record) for record in records])
+            self._changed(connection)
+
+    def create(self, record):
+        """Add a record to the collection, replacing any record with the same key."""
+        with self.connection as connection:
+            connection.execute(self._upsert, self._row(record))
+            self._changed(connection)
+
+    def create_many(self, records):
+        """Add several records to the collection in one transaction."""
+        with self.connection as connection:
+            connection.executemany(self._upsert, [self._row(record) for record in records])
+            self._changed(connection)
+
+    def modify(self, key, changes):
+        """
+        Update the fields of the record with the given primary key.
+
+        Returns:
+            dict: The updated record, or None if no record has that key.
+        """
+        with self.connection as connection:
+            record = self.get(key)
+            if record is None:
+                return None
+            record.update(changes)
+            assignments = ', '.join(f'{field} = ?' for field in (self.key,) + self.columns)
+            connection.execute(
+                f'UPDATE {self.table} SET {assignments}, data = ? WHERE {self.key} = ?',
+                self._row(record) + (key,)
+            )
+            self._changed(connection)
+        return record
+
+    def delete(self, key):
+        """
+        Remove the record with the given primary key.
+
+        Returns:
+            bool: True if a record was removed.
+        """
+        with self.connection as connection:
+            cursor = connection.execute(f'DELETE FROM {self.table} WHERE {self.key} = ?', (key,))
+            if cursor.rowcount:
+                self._changed(connection)
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys):
+        """Remove the records with any of the given primary keys in one transaction."""
+        with self.connection as connection:
+            cursor = connection.executemany(f'DELETE FROM {self.table} WHERE {self.key} = ?',
+                                            [(key,) for key in keys])
+            if cursor.rowcount:
+                self._changed(connection)
+
+    def select(self, column, value):
+        """Return the records whose column equals a value, in insertion order."""
+        if column not in self.columns:
+            raise ValueError(f"Unknown column of {self.table}: {column}")
+        rows = self.connection.execute(
+            f'SELECT data FROM {self.table} WHERE {column} = ? ORDER BY rowid', (value,)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def overlapping(self, hotel_id, room_id, start_date, end_date):
+        """
+        Return the reservations of a room that overlap the given period.
+
+        Uses the (hotel_id, room_id, start_date, end_date) index, comparing dates
+        inclusively like Reservation.find_conflicts.
+        """
+        if self.table != 'reservations':
+            raise ValueError("Overlap queries are only available on the reservations table.")
+        rows = self.connection.execute(
+            'SELECT data FROM reservations WHERE hotel_id = ? AND room_id = ? '
+            'AND start_date <= ? AND end_date >= ? ORDER BY start_date',
+            (hotel_id, room_id, end_date, start_date)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+
+def migrate_json(database, hotels='hotels.json', customers='customers.json',
+                 reservations='reservations.json'):
+    """
+    Import the JSON files into a SQLite database, replacing the tables' contents.
+
+    The reservation ID counter kept next to the reservations file is carried over to the
+    database, so new reservations do not reuse imported IDs.
+
+    Returns:
+        dict: The number of records imported into each table.
+    """
+    counts = {}
+    for table, path in (('hotels', hotels), ('customers', customers),
+                        ('reservations', reservations)):
+        records = read_json(path)
+        SqliteStorage(database, table).save(records)
+        counts[table] = len(records)
+    last_id = VersionLock(reservations + '.seq').version()
+    with VersionLock(database + '.seq') as counter:
+        if counter.version() < last_id:
+            counter.bump(last_id - counter.version())
+    return counts
+
+
+def main(argv=None):
+    """Command line entry point of the JSON to SQLite migration."""
+    parser = argparse.ArgumentParser(description="Import the JSON data files into SQLite.")
+    parser.add_argument('database', help="path of the SQLite database to create or update")
+    parser.add_argument('--hotels', default='hotels.json')
+    parser.add_argument('--customers', default='customers.json')
+    parser.add_argument('--reservations', default='reservations.json')
+    args = parser.parse_args(argv)
+    counts = migrate_json(args.database, args.hotels, args.customers, args.reservations)
+    for table, count in counts.items():
+        print(f"Imported {count} {table} into {args.database}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""
+This module defines the storage backends used by the Hotel, Customer and Reservation classes.
+
+A backend persists one collection of records, each identified by a primary key field.
+JsonFileStorage keeps the collection as a single pretty-printed JSON list and rewrites the
+whole file on every mutation. JournalStorage keeps the same JSON list as a snapshot and
+appends create, modify and delete operations to a JSONL journal next to it, so a single
+write only costs the size of the record; the journal is folded back into the snapshot by
+compaction.
+
+Every backend exposes signature(), a value that changes whenever its files change,
+iter_records(), which yields the records one at a time, and an ``incremental`` flag telling
+callers whether single-record writes are cheaper than saving the whole collection.
+"""
+
+import json
+import os
+import threading
+
+from instrumentation import count, is_enabled, timer
+from streaming import iter_file
+
+
+def read_json(path):
+    """Read a JSON list from a file, returning an empty list if the file does not exist."""
+    try:
+        with timer('json.read'), open(path, 'r', encoding='utf-8') as file:
+            records = json.load(file)
+            if is_enabled():
+                count('json.read_bytes', os.fstat(file.fileno()).st_size)
+            return records
+    except FileNotFoundError:
+        return []
+
+
+def write_json(path, records):
+    """
+    Write a list of records to a pretty-printed JSON file.
+
+    The data is written to a temporary file that then replaces the target, so readers
+    never see a partially written file.
+    """
+    temporary_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with timer('json.write'), open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(records, file, indent=4)
+            if is_enabled():
+                count('json.write_bytes', file.tell())
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def file_signature(path):
+    """Return the (mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class JsonFileStorage:
+    """Stores a collection as a JSON list, rewriting the whole file on every mutation."""
+
+    incremental = False
+
+    def __init__(self, path, key):
+        """
+        Initializes the storage.
+
+        Args:
+            path (str): Path of the JSON file.
+            key (str): Name of the primary key field of the records.
+        """
+        self.path = path
+        self.key = key
+        self.lock_path = path + '.lock'
+
+    def signature(self):
+        """Return a value that changes whenever the JSON file changes."""
+        return file_signature(self.path)
+
+    def load(self):
+        """Return every record of the collection."""
+        return read_json(self.path)
+
+    def iter_records(self):
+        """Yield the records of the collection, parsing the file incrementally."""
+        return iter_file(self.path)
+
+    def save(self, records):
+        """Replace the whole collection with the given records."""
+        write_json(self.path, records)
+
+    def create(self, record):
+        """Add a record to the collection."""
+        records = self.load()
+        records.append(record)
+        self.save(records)
+
+    def create_many(self, records):
+        """Add several records to the collection with a single write."""
+        stored = self.load()
+        stored.extend(records)
+        self.save(stored)
+
+    def modify(self, key, changes):
+        """
+        Update the fields of the records with the given primary key.
+
+        Returns:
+            dict: The updated record, or None if no record has that key.
+        """
+        records = self.load()
+        updated = None
+        for record in records:
+            if record[self.key] == key:
+                record.update(changes)
+                updated = record
+        if updated is not None:
+            self.save(records)
+        return updated
+
+    def delete(self, key):
+        """
+        Remove the records with the given primary key.
+
+        Returns:
+            bool: True if at least one record was removed.
+        """
+        records = self.load()
+        kept = [record for record in records if record[self.key] != key]
+        if len(kept) == len(records):
+            return False
+        self.save(kept)
+        return True
+
+    def delete_many(self, keys):
+        """Remove the records with any of the given primary keys with a single write."""
+        keys = set(keys)
+        records = self.load()
+        kept = [record for record in records if record[self.key] not in keys]
+        if len(kept) < len(records):
+            self.save(kept)
+
+
+class JournalStorage:
+    """
+    Stores a collection as a JSON snapshot plus an append-only JSONL journal.
+
+    Every mutation appends one line ({"op": "create" | "modify" | "delete", ...}) to the
+    journal. On load the snapshot is read once and the journal is replayed on top of it;
+    later loads only replay the lines appended since. A last line without its newline was
+    cut short by a crash: it is ignored and truncated before the next append. Operations
+    are idempotent (create is an upsert, modify sets fields, delete ignores missing keys),
+    so a crash between writing a compacted snapshot and truncating the journal replays
+    safely. Records are held by primary key, so duplicated keys collapse into one record.
+    """
+
+    incremental = True
+
+    def __init__(self, path, key, compact_every=1000, fsync=False):
+        """
+        Initializes the storage.
+
+        Args:
+            path (str): Path of the JSON snapshot. The journal is stored next to it with
+                the extension replaced by ``.journal.jsonl``.
+            key (str): Name of the primary key field of the records.
+            compact_every (int): Number of journal entries after which the journal is
+                folded into the snapshot. Zero or None disables automatic compaction.
+            fsync (bool): Whether to fsync the journal after every append.
+        """
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + '.journal.jsonl'
+        self.lock_path = path + '.lock'
+        self.key = key
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._records = None
+        self._snapshot_signature = None
+        self._offset = 0
+        self._entries = 0
+        self._torn = False
+
+    def signature(self):
+        """Return a value that changes whenever the snapshot or the journal changes."""
+        return file_signature(self.path), file_signature(self.journal_path)
+
+    def load(self):
+        """Return every record of the collection."""
+        self._refresh()
+        return [dict(record) for record in self._records.values()]
+
+    def iter_records(self):
+        """Yield the records of the collection."""
+        return iter(self.load())
+
+    def save(self, records):
+        """Replace the whole collection with the given records and clear the journal."""
+        self._records = {record[self.key]: dict(record) for record in records}
+        self._write_snapshot()
+
+    def get(self, key):
+        """Return the record with the given primary key, or None."""
+        self._refresh()
+        record = self._records.get(key)
+        return None if record is None else dict(record)
+
+    def create(self, record):
+        """Add a record to the collection, replacing any record with the same key."""
+        self._append({'op': 'create', 'record': record})
+
+    def create_many(self, records):
+        """Add several records to the collection with a single journal write."""
+        self._append(*({'op': 'create', 'record': record} for record in records))
+
+    def modify(self, key, changes):
+        """
+        Update the fields of the record with the given primary key.
+
+        Returns:
+            dict: The updated record, or None if no record has that key.
+        """
+        self._refresh()
+        if key not in self._records:
+            return None
+        self._append({'op': 'modify', 'key': key, 'changes': changes})
+        return dict(self._records[changes.get(self.key, key)])
+
+    def delete(self, key):
+        """
+        Remove the record with the given primary key.
+
+        Returns:
+            bool: True if a record was removed.
+        """
+        self._refresh()
+        if key not in self._records:
+            return False
+        self._append({'op': 'delete', 'key': key})
+        return True
+
+    def delete_many(self, keys):
+        """Remove the records with any of the given primary keys with a single journal write."""
+        self._refresh()
+        self._append(*({'op': 'delete', 'key': key}
+                       for key in dict.fromkeys(keys) if key in self._records))
+
+    def compact(self):
+        """Fold the journal into a new snapshot and truncate the journal."""
+        self._refresh()
+        self._write_snapshot()
+
+    def _refresh(self):
+        """Reload the snapshot if it changed on disk and replay new journal lines."""
+        signature = file_signature(self.path)
+        if self._records is None or signature != self._snapshot_signature:
+            self._records = {record[self.key]: record for record in read_json(self.path)}
+            self._snapshot_signature = signature
+            self._offset = 0
+            self._entries = 0
+        self._replay()
+
+    def _replay(self):
+        """Apply the journal lines written after the current offset."""
+        self._torn = False
+        offset = self._offset
+        try:
+            with open(self.journal_path, 'rb') as file:
+                file.seek(self._offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        self._torn = True
+                        break
+                    self._apply(json.loads(line))
+                    self._offset += len(line)
+                    self._entries += 1
+        except FileNotFoundError:
+            pass
+        count('journal.read_bytes', self._offset - offset)
+
+    def _apply(self, entry):
+        """Apply a single journal entry to the in-memory records."""
+        if entry['op'] == 'create':
+            record = entry['record']
+            self._records[record[self.key]] = dict(record)
+        elif entry['op'] == 'modify':
+            record = self._records.get(entry['key'])
+            if record is not None:
+                record.update(entry['changes'])
+                if record[self.key] != entry['key']:
+                    self._records[record[self.key]] = self._records.pop(entry['key'])
+        elif entry['op'] == 'delete':
+            self._records.pop(entry['key'], None)
+        else:
+            raise ValueError(f"Unknown journal operation: {entry['op']}")
+
+    def _append(self, *entries):
+        """Write entries to the journal and apply them, compacting when due."""
+        if not entries:
+            return
+        self._refresh()
+        if self._torn:
+            os.truncate(self.journal_path, self._offset)
+        lines = [(json.dumps(entry) + '\n').encode('utf-8') for entry in entries]
+        with timer('journal.append'), open(self.journal_path, 'ab') as file:
+            data = b''.join(lines)
+            file.write(data)
+            file.flush()
+            if self.fsync:
+                with timer('journal.fsync'):
+                    os.fsync(file.fileno())
+        count('journal.write_bytes', len(data))
+        for entry, line in zip(entries, lines):
+            self._apply(entry)
+            self._offset += len(line)
+            self._entries += 1
+        if self.compact_every and self._entries >= self.compact_every:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        """Atomically replace the snapshot with the in-memory records and clear the journal."""
+        write_json(self.path, list(self._records.values()))
+        with open(self.journal_path, 'wb'):
+            pass
+        self._snapshot_signature = file_signature(self.path)
+        self._offset = 0
+        self._entries = 0
+        self._torn = False
@@ -0,0 +1,160 @@
+"""
+This module defines the Store class, which says where the hotels, customers and reservations
+of the Hotel, Customer and Reservation classes are kept.
+
+A Store bundles the three repositories with the reservation ID allocator, the listeners of
+reservation changes and the temporary holds on rooms (see holds.py). The classes use the current store: the one activated in the current
+context (thread, asyncio task or contextvars context) with use() or activate(), or else the
+default store, which keeps hotels.json, customers.json and reservations.json in the working
+directory as before. Several stores can therefore serve different tenants in one process, and
+tests can each use a temporary directory:
+
+    with use(Store.open('/data/tenant-a')):
+        Hotel.reserve_room(...)
+
+ShardedStore (see sharding.py) splits hotels and reservations over several stores.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from holds import HoldRegistry
+from ids import IdAllocator
+from records import CustomerRecord, HotelRecord, ReservationRecord
+from repository import Repository
+from snapshot import SnapshotStorage
+from sqlite_storage import SqliteStorage
+from storage import JournalStorage, JsonFileStorage
+
+BACKENDS = ('json', 'journal', 'sqlite', 'snapshot')
+
+_current = ContextVar('store', default=None)
+_default = None
+
+
+class Store:
+    """The hotel, customer and reservation repositories used together."""
+
+    def __init__(self, hotels, customers, reservations, id_allocator=None):
+        """
+        Initializes the store.
+
+        Args:
+            hotels (Repository): Repository of the hotels.
+            customers (Repository): Repository of the customers.
+            reservations (Repository): Repository of the reservations.
+            id_allocator (IdAllocator): Allocator of reservation IDs; by default its
+                counter is kept next to the reservations data.
+        """
+        self.hotels = hotels
+        self.customers = customers
+        self.reservations = reservations
+        self.id_allocator = id_allocator or IdAllocator(reservations.storage.path + '.seq')
+        self.listeners = []
+        self.holds = HoldRegistry()
+
+    @classmethod
+    def open(cls, directory=None, backend='json', customers=None, id_allocator=None):
+        """
+        Open the store kept in a directory.
+
+        Args:
+            directory (str): Directory of the data files, created if needed; the working
+                directory if None.
+            backend (str): 'json' (one JSON file per collection), 'journal' (JSON
+                snapshots plus journals, see JournalStorage), 'sqlite' (hotel.db) or
+                'snapshot' (one binary snapshot per collection, see snapshot.py).
+            customers (Repository): Customer repository to use instead of the directory's,
+                e.g. one shared by several stores.
+            id_allocator (IdAllocator): Reservation ID allocator to use instead of the
+                directory's.
+
+        Raises:
+            ValueError: If the backend is unknown.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        def path(name):
+            return name if directory is None else os.path.join(directory, name)
+
+        if backend == 'sqlite':
+            storages = [SqliteStorage(path('hotel.db'), table)
+                        for table in ('hotels', 'customers', 'reservations')]
+        elif backend == 'snapshot':
+            storages = [SnapshotStorage(path(f'{name}.snap'), key) for name, key in (
+                ('hotels', 'hotel_id'), ('customers', 'customer_id'),
+                ('reservations', 'reservation_id'))]
+        else:
+            storage_type = JournalStorage if backend == 'journal' else JsonFileStorage
+            storages = [storage_type(path(f'{name}.json'), key) for name, key in (
+                ('hotels', 'hotel_id'), ('customers', 'customer_id'),
+                ('reservations', 'reservation_id'))]
+        hotels, own_customers, reservations = [
+            Repository(storage, record_type) for storage, record_type in zip(
+                storages, (HotelRecord, CustomerRecord, ReservationRecord))
+        ]
+        return cls(hotels, customers or own_customers, reservations, id_allocator)
+
+
+def default_store():
+    """Return the store used when none is active: the JSON files of the working directory."""
+    global _default  # pylint: disable=global-statement
+    if _default is None:
+        _default = Store.open()
+    return _default
+
+
+def set_default_store(store):
+    """Replace the store used when none is active, e.g. to move the data directory."""
+    global _default  # pylint: disable=global-statement
+    _default = store
+
+
+def current_store():
+    """Return the store active in the current context, or the default store."""
+    return _current.get() or default_store()
+
+
+def activate(store):
+    """
+    Make a store current in the current context.
+
+    Returns:
+        Token: The token to pass to deactivate().
+    """
+    return _current.set(store)
+
+
+def deactivate(token):
+    """Restore the store that was current before activate() returned the token."""
+    _current.reset(token)
+
+
+@contextmanager
+def use(store):
+    """Make a store current for the duration of a with block."""
+    token = activate(store)
+    try:
+        yield store
+    finally:
+        deactivate(token)
+
+
+class CurrentRepository:
+    """Class attribute resolving to one of the repositories of the current store."""
+
+    def __init__(self, name):
+        """
+        Initializes the attribute.
+
+        Args:
+            name (str): 'hotels', 'customers' or 'reservations'.
+        """
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return getattr(current_store(), self.name)
@@ -0,0 +1,217 @@
+"""
+This module provides streaming readers and writers for the data files.
+
+The readers are generators that yield one record at a time and the writers consume any
+iterable, so hotels, customers and reservations can be imported, filtered and exported
+without holding a whole file in memory. Two formats are supported: JSON Lines (one record
+per line, files ending in .jsonl) and the JSON array format of hotels.json, customers.json
+and reservations.json, which is parsed incrementally.
+"""
+
+import json
+import os
+from itertools import islice
+
+from dates import parse_date, parse_period
+from records import json_default
+
+CHUNK_SIZE = 65536
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array read incrementally from a text file object.
+
+    Raises:
+        ValueError: If the content is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+
+    def read_more():
+        nonlocal buffer, position
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def next_char():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not read_more():
+                return ''
+
+    if next_char() != '[':
+        raise ValueError("Expected a JSON array.")
+    position += 1
+    if next_char() == ']':
+        return
+    while True:
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(buffer) and read_more():
+                continue
+            break
+        position = end
+        yield value
+        char = next_char()
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}.")
+        position += 1
+        next_char()
+
+
+def write_json_array(file, records):
+    """
+    Write records to a text file object as a JSON array, one record at a time.
+
+    The output is the same as json.dump(list(records), file, indent=4).
+
+    Returns:
+        int: The number of records written.
+    """
+    count = 0
+    for record in records:
+        file.write('[\n' if count == 0 else ',\n')
+        lines = json.dumps(record, indent=4, default=json_default).split('\n')
+        file.write('\n'.join('    ' + line for line in lines))
+        count += 1
+    file.write('\n]' if count else '[]')
+    return count
+
+
+def iter_jsonl(file):
+    """Yield the records of a JSON Lines text file object, skipping blank lines."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_jsonl(file, records):
+    """
+    Write records to a text file object as JSON Lines.
+
+    Returns:
+        int: The number of records written.
+    """
+    count = 0
+    for record in records:
+        file.write(json.dumps(record, default=json_default) + '\n')
+        count += 1
+    return count
+
+
+def _is_jsonl(path):
+    """Return True if a path names a JSON Lines file."""
+    return os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson')
+
+
+def iter_file(path):
+    """Yield the records of a .jsonl file or a JSON array file, one at a time."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            yield from iter_jsonl(file) if _is_jsonl(path) else iter_json_array(file)
+    except FileNotFoundError:
+        return
+
+
+def write_file(path, records):
+    """
+    Write records to a .jsonl file or a JSON array file, one at a time.
+
+    Returns:
+        int: The number of records written.
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        if _is_jsonl(path):
+            return write_jsonl(file, records)
+        return write_json_array(file, records)
+
+
+def convert(source, destination, predicate=None):
+    """
+    Copy the records of one data file to another, optionally filtering them.
+
+    The formats are chosen from the file extensions, so this also converts between
+    JSON arrays and JSON Lines.
+
+    Returns:
+        int: The number of records written.
+    """
+    records = iter_file(source)
+    if predicate is not None:
+        records = filter(predicate, records)
+    return write_file(destination, records)
+
+
+def reservation_filter(hotel_id=None, date_range=None):
+    """
+    Return a predicate selecting the reservations of a hotel and/or overlapping a period.
+
+    Args:
+        hotel_id (str): Only select reservations of this hotel, if given.
+        date_range (tuple): (start_date, end_date); only select reservations overlapping
+            it, dates included, if given.
+    """
+    if date_range is not None:
+        first, last = parse_period(*date_range)
+
+    def predicate(reservation):
+        if hotel_id is not None and reservation['hotel_id'] != hotel_id:
+            return False
+        if date_range is not None:
+            return (parse_date(reservation['start_date']) <= last
+                    and parse_date(reservation['end_date']) >= first)
+        return True
+    return predicate
+
+
+def export_collection(repository, path, predicate=None):
+    """
+    Stream the records of a repository to a file.
+
+    Returns:
+        int: The number of records written.
+    """
+    records = repository.iter_records()
+    if predicate is not None:
+        records = filter(predicate, records)
+    return write_file(path, records)
+
+
+def import_collection(repository, path, batch_size=1000, predicate=None):
+    """
+    Stream the records of a file into a repository, saving them in batches.
+
+    Only one batch is read at a time; how much of the collection stays in memory
+    afterwards depends on the repository's backend.
+
+    Returns:
+        int: The number of records imported.
+    """
+    records = iter_file(path)
+    if predicate is not None:
+        records = filter(predicate, records)
+    count = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return count
+        repository.create_many(batch)
+        count += len(batch)
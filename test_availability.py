@@ -0,0 +1,104 @@
+"""
+This module contains unit tests for the AvailabilityIndex class.
+It tests overlap detection, keeping the index in sync with added and removed
+reservations, and the fallback used when a room holds overlapping reservations.
+"""
+
+import unittest
+from availability import AvailabilityIndex
+
+
+def make_reservation(reservation_id, room_id, start_date, end_date, hotel_id="H001",
+                     customer_id="C001"):
+    """Build a reservation record for the tests."""
+    return {
+        'reservation_id': reservation_id,
+        'customer_id': customer_id,
+        'hotel_id': hotel_id,
+        'room_id': room_id,
+        'start_date': start_date,
+        'end_date': end_date
+    }
+
+
+class TestAvailabilityIndex(unittest.TestCase):
+    """Tests for the AvailabilityIndex class."""
+
+    def setUp(self):
+        """Build an index with three disjoint stays in room 101 and one in room 102."""
+        self.reservations = [
+            make_reservation("R1", "101", "2024-01-01", "2024-01-05"),
+            make_reservation("R2", "101", "2024-01-10", "2024-01-12"),
+            make_reservation("R3", "101", "2024-02-01", "2024-02-03"),
+            make_reservation("R4", "102", "2024-01-01", "2024-01-31"),
+        ]
+        self.index = AvailabilityIndex(self.reservations)
+
+    def test_conflicts_returns_overlapping_reservations(self):
+        """Test that every overlapping reservation of the room is returned."""
+        conflicts = self.index.conflicts("H001", "101", "2024-01-04", "2024-01-10")
+        self.assertEqual([r['reservation_id'] for r in conflicts], ["R1", "R2"])
+
+    def test_conflicts_are_inclusive(self):
+        """Test that touching boundary dates count as a conflict."""
+        conflicts = self.index.conflicts("H001", "101", "2024-01-12", "2024-01-20")
+        self.assertEqual([r['reservation_id'] for r in conflicts], ["R2"])
+
+    def test_free_period_has_no_conflicts(self):
+        """Test a period between two stays and rooms or hotels without reservations."""
+        self.assertEqual(self.index.conflicts("H001", "101", "2024-01-13", "2024-01-31"), [])
+        self.assertEqual(self.index.conflicts("H001", "103", "2024-01-01", "2024-12-31"), [])
+        self.assertEqual(self.index.conflicts("H002", "101", "2024-01-01", "2024-12-31"), [])
+
+    def test_add_and_discard_keep_index_in_sync(self):
+        """Test that added reservations are found and discarded ones are not."""
+        self.index.add(make_reservation("R5", "101", "2024-01-20", "2024-01-25"))
+        conflicts = self.index.conflicts("H001", "101", "2024-01-21", "2024-01-21")
+        self.assertEqual([r['reservation_id'] for r in conflicts], ["R5"])
+
+        removed = self.index.discard("R5")
+        self.assertEqual([r['reservation_id'] for r in removed], ["R5"])
+        self.assertEqual(self.index.conflicts("H001", "101", "2024-01-21", "2024-01-21"), [])
+        self.assertEqual(self.index.discard("R5"), [])
+        self.assertEqual(len(self.index), 4)
+
+    def test_reservations_by_hotel_and_customer(self):
+        """Test that the hotel and customer groups follow added and discarded reservations."""
+        self.index.add(make_reservation("R5", "101", "2024-03-01", "2024-03-02", "H002", "C002"))
+        self.assertEqual([r['reservation_id'] for r in self.index.of_hotel("H001")],
+                         ["R1", "R2", "R3", "R4"])
+        self.assertEqual([r['reservation_id'] for r in self.index.of_customer("C002")], ["R5"])
+
+        self.index.discard("R5")
+        self.index.discard("R2")
+        self.assertEqual(self.index.of_hotel("H002"), [])
+        self.assertEqual(self.index.of_customer("C002"), [])
+        self.assertEqual([r['reservation_id'] for r in self.index.of_customer("C001")],
+                         ["R1", "R3", "R4"])
+
+    def test_overlapping_reservations_in_same_room(self):
+        """Test overlap detection once a room holds overlapping reservations."""
+        self.index.add(make_reservation("R6", "101", "2023-12-20", "2024-01-11"))
+        conflicts = self.index.conflicts("H001", "101", "2024-01-06", "2024-01-08")
+        self.assertEqual([r['reservation_id'] for r in conflicts], ["R6"])
+
+        self.index.discard("R6")
+        conflicts = self.index.conflicts("H001", "101", "2024-01-06", "2024-01-08")
+        self.assertEqual(conflicts, [])
+
+    def test_intervals_are_ordinal_arrays(self):
+        """Test that a room's intervals are exposed as sorted ordinal day arrays."""
+        starts, ends = self.index.intervals("H001", "101")
+        self.assertEqual(list(starts), sorted(starts))
+        self.assertEqual(ends[0] - starts[0], 4)
+        self.assertEqual(len(self.index.intervals("H001", "999")[0]), 0)
+
+    def test_malformed_dates_are_rejected(self):
+        """Test that malformed dates are rejected instead of compared as text."""
+        with self.assertRaises(ValueError):
+            self.index.add(make_reservation("R7", "101", "2024-3-1", "2024-03-02"))
+        with self.assertRaises(ValueError):
+            self.index.conflicts("H001", "101", "2024-01-10", "2024-01-01")
+
+if __name__ == '__main__':
+    unittest.main()
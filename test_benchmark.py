@@ -0,0 +1,52 @@
+"""
+This module contains unit tests for the benchmark harness.
+It runs a tiny benchmark in process, with and without the multi-process engine, and checks
+the report and its statistics.
+"""
+
+import unittest
+from benchmark import percentile, run, summarize
+from store import current_store
+
+
+class TestBenchmark(unittest.TestCase):
+    """Tests for the benchmark harness."""
+
+    def test_statistics(self):
+        """Test the nearest-rank percentiles and the throughput."""
+        ordered = list(range(1, 101))
+        self.assertEqual(percentile(ordered, 50), 50)
+        self.assertEqual(percentile(ordered, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        stats = summarize([2000, 1000])
+        self.assertEqual(stats['ops_per_sec'], 666666.7)
+        self.assertEqual((stats['p50_us'], stats['p99_us']), (1.0, 2.0))
+
+    def test_run_in_process(self):
+        """Test a small run on each backend and that the current store is restored."""
+        saved = current_store()
+        for backend in ('json', 'journal', 'sqlite'):
+            report = run([50], hotels=3, rooms=2, operations=5, backend=backend, isolate=False)
+            result, = report['results']
+            self.assertEqual(result['config']['backend'], backend)
+            self.assertEqual(result['operations']['reserve_room']['count'], 5)
+            self.assertEqual(result['operations']['delete_hotel']['count'], 3)
+            for stats in result['operations'].values():
+                self.assertGreater(stats['ops_per_sec'], 0)
+                self.assertLessEqual(stats['p50_us'], stats['p99_us'])
+        self.assertIn('python', report['environment'])
+        self.assertIs(current_store(), saved)
+
+    def test_engine(self):
+        """Test the engine benchmark with one and two worker processes."""
+        report = run([50], hotels=3, rooms=2, operations=2, isolate=False, workers=[1, 2],
+                     engine_requests=20)
+        engine = report['results'][0]['engine']
+        self.assertEqual([result['workers'] for result in engine], [1, 2])
+        for result in engine:
+            self.assertEqual((result['count'], result['reserved']), (20, 20))
+            self.assertGreater(result['ops_per_sec'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
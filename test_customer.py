@@ -3,8 +3,14 @@ This module contains unit tests for the Customer class.
 It tests the functionality of customer creation, deletion, and validation of customer properties.
 """
 
+import sys
+import tempfile
+from io import StringIO
 import unittest
 from customer import Customer
+from hotel import Hotel
+from reservation import Reservation
+from store import Store, activate, deactivate
 
 class TestCustomer(unittest.TestCase):
     """Tests for the Customer class."""
@@ -12,9 +18,11 @@ class TestCustomer(unittest.TestCase):
     def setUp(self):
         """
         Prepare environment for each test.
-        Ensure the customer list is empty before each test.
+        Use an empty store in a temporary directory for each test.
         """
-        Customer.save_customers([])
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
 
     def test_create_customer(self):
         """
@@ -62,7 +70,114 @@ class TestCustomer(unittest.TestCase):
 
         self.assertIsNone(found_customer_after, "Customer should be removed from the list")
 
-    # Additional tests for display_customer_info and modify_customer_info can be added here.
+    def test_create_duplicate_customer(self):
+        """
+        Test that creating a customer with an existing ID is refused.
+        """
+        Customer("C003", "John Doe", "john.doe@example.com", "123-456-7890").create_customer()
+        result = Customer("C003", "Other", "other@example.com", "000").create_customer()
+
+        self.assertFalse(result.success)
+        self.assertEqual(Customer.repository.get("C003")['name'], "John Doe")
+
+    def test_display_customer_info(self):
+        """
+        Test displaying customer information.
+        """
+        Customer("C004", "Jane Roe", "jane.roe@example.com", "555-0100").create_customer()
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        customer = Customer.display_customer_info("C004")
+        sys.stdout = sys.__stdout__
+
+        self.assertEqual(customer['email'], "jane.roe@example.com")
+        self.assertIn('"customer_id": "C004"', captured_output.getvalue())
+
+    def test_modify_customer_info(self):
+        """
+        Test modifying customer information, ignoring unknown fields.
+        """
+        Customer("C005", "Jim Poe", "jim.poe@example.com", "555-0101").create_customer()
+
+        result = Customer.modify_customer_info("C005", email="jim@example.com", age=40)
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.record['email'], "jim@example.com")
+        self.assertNotIn('age', Customer.repository.get("C005"))
+
+    def test_modify_and_delete_nonexistent_customer(self):
+        """
+        Test that operations on a missing customer report a failure.
+        """
+        self.assertFalse(Customer.modify_customer_info("C999", name="Nobody").success)
+        self.assertFalse(Customer.delete_customer("C999").success)
+
+    def test_delete_customer_with_reservations(self):
+        """
+        Test that a customer with reservations is kept unless the delete cascades.
+        """
+        Customer("C006", "Ann Lee", "ann@example.com", "555").create_customer()
+        Hotel.reserve_room("H001", "C006", "101", "2024-01-01", "2024-01-02")
+        Hotel.reserve_room("H002", "C006", "101", "2024-01-01", "2024-01-02")
+        Hotel.reserve_room("H001", "C007", "102", "2024-01-01", "2024-01-02")
+
+        result = Customer.delete_customer("C006")
+        self.assertFalse(result.success)
+        self.assertEqual([r['hotel_id'] for r in result.conflicts], ["H001", "H002"])
+        self.assertIsNotNone(Customer.repository.get("C006"))
+
+        self.assertTrue(Customer.delete_customer("C006", cascade=True).success)
+        self.assertIsNone(Customer.repository.get("C006"))
+        self.assertEqual([r['customer_id'] for r in Reservation.load_reservations()], ["C007"])
+
+    def test_lookups_follow_changes(self):
+        """
+        Test finding customers by email, phone and name as they are created, changed and deleted.
+        """
+        Customer("C010", "Maria Silva", "Maria@Example.com", "+351 912 000 001").create_customer()
+        self.assertEqual([c['customer_id'] for c in Customer.find_by_email(" maria@example.com")],
+                         ["C010"])
+        Customer("C011", "Mario Costa", "mario@example.com", "912000002").create_customer()
+        self.assertEqual([c['name'] for c in Customer.search_by_name("mari")],
+                         ["Maria Silva", "Mario Costa"])
+
+        Customer.modify_customer_info("C010", email="silva@example.com", name="Maria Santos")
+        self.assertEqual(Customer.find_by_email("maria@example.com"), [])
+        self.assertEqual([c['customer_id'] for c in Customer.find_by_email("silva@example.com")],
+                         ["C010"])
+        self.assertEqual([c['name'] for c in Customer.search_by_name("maria san")],
+                         ["Maria Santos"])
+        Customer.delete_customer("C011")
+        self.assertEqual(Customer.find_by_phone("912-000-002"), [])
+        self.assertEqual(Customer.search_by_name("mario"), [])
+
+        Customer.repository.create({'customer_id': "C012", 'name': "Rui Mar",
+                                    'email': "rui@example.com", 'phone': "351912000001"})
+        self.assertEqual([c['customer_id'] for c in Customer.find_by_phone("351912000001")],
+                         ["C010", "C012"])
+
+    def test_unique_email_and_phone(self):
+        """
+        Test that unique emails and phones are enforced only when configured.
+        """
+        Customer("C020", "Ana Reis", "ana@example.com", "555-0001").create_customer()
+        self.assertTrue(
+            Customer("C021", "Ana R.", "ANA@example.com", "5550002").create_customer().success)
+
+        self.addCleanup(setattr, Customer, 'unique_fields', Customer.unique_fields)
+        Customer.unique_fields = ('email', 'phone')
+        result = Customer("C022", "Anabela", "ana@example.com", "(555) 0001").create_customer()
+        self.assertFalse(result.success)
+        self.assertEqual(result.message, "Another customer already uses this email and phone.")
+        self.assertEqual([c['customer_id'] for c in result.conflicts], ["C020", "C021"])
+        self.assertIsNone(Customer.repository.get("C022"))
+
+        self.assertTrue(Customer("C023", "Bo", None, "555-0003").create_customer().success)
+        result = Customer.modify_customer_info("C023", phone="5550002")
+        self.assertEqual([c['customer_id'] for c in result.conflicts], ["C021"])
+        self.assertEqual(Customer.repository.get("C023")['phone'], "555-0003")
+        self.assertTrue(Customer.modify_customer_info("C020", phone="555 0001", name="A").success)
 
 if __name__ == '__main__':
     unittest.main()
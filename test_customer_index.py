@@ -0,0 +1,76 @@
+"""
+This module contains unit tests for the CustomerIndex class.
+It tests the normalization of emails and phones, lookups by them, type-ahead searches on
+names, and that adding, replacing and removing customers keeps the index consistent.
+"""
+
+import unittest
+from customer_index import CustomerIndex, name_words, normalize_email, normalize_phone
+
+
+def customer(customer_id, name, email, phone):
+    """Build a customer record for the tests."""
+    return {'customer_id': customer_id, 'name': name, 'email': email, 'phone': phone}
+
+
+class TestCustomerIndex(unittest.TestCase):
+    """Tests for the CustomerIndex class."""
+
+    def setUp(self):
+        """Index a few customers."""
+        self.index = CustomerIndex([
+            customer("C1", "John Doe", "John.Doe@Example.com ", "+1 (555) 010-0001"),
+            customer("C2", "Jane Doe", "jane@example.com", "555-0100-02"),
+            customer("C3", "Johanna  Smith", "jo@example.com", None),
+            customer("C4", "Doe John", "shared@example.com", "15550100001"),
+        ])
+
+    def test_normalization(self):
+        """Test the keys emails, phones and names are indexed by."""
+        self.assertEqual(normalize_email("  A@B.com"), "a@b.com")
+        self.assertIsNone(normalize_email("  "))
+        self.assertIsNone(normalize_email(42))
+        self.assertEqual(normalize_phone("+1 (555) 010-0001"), "15550100001")
+        self.assertIsNone(normalize_phone("n/a"))
+        self.assertEqual(name_words("  Ana  MARIA "), ("ana", "maria"))
+        self.assertEqual(name_words(None), ())
+
+    def test_lookups(self):
+        """Test finding customers by email and phone in any spelling."""
+        self.assertEqual(self.index.by_email("john.doe@example.COM"), ["C1"])
+        self.assertEqual(self.index.by_email("nobody@example.com"), [])
+        self.assertEqual(self.index.by_phone("1-555-010-0001"), ["C1", "C4"])
+        self.assertEqual(self.index.by_phone(None), [])
+        self.assertEqual(len(self.index), 4)
+
+    def test_search_name(self):
+        """Test type-ahead searches by word prefixes, in word order, up to a limit."""
+        self.assertEqual(self.index.search_name("jo"), ["C3", "C1", "C4"])
+        self.assertEqual(self.index.search_name("JOHN"), ["C1", "C4"])
+        self.assertEqual(self.index.search_name("jo do"), ["C1", "C4"])
+        self.assertEqual(self.index.search_name("doe j"), ["C1", "C2", "C4"])
+        self.assertEqual(self.index.search_name("d", limit=2), ["C1", "C2"])
+        self.assertEqual(self.index.search_name("john john"), [])
+        self.assertEqual(self.index.search_name("x"), [])
+        self.assertEqual(self.index.search_name("  "), [])
+
+    def test_replace_and_discard(self):
+        """Test that replacing or removing a customer leaves no stale entries."""
+        self.index.add(customer("C1", "Jon Roe", "new@example.com", "555"))
+        self.assertEqual(self.index.by_email("john.doe@example.com"), [])
+        self.assertEqual(self.index.by_email("new@example.com"), ["C1"])
+        self.assertEqual(self.index.by_phone("15550100001"), ["C4"])
+        self.assertEqual(self.index.search_name("john"), ["C4"])
+        self.assertEqual(self.index.search_name("jon"), ["C1"])
+
+        for customer_id in ("C1", "C2", "C3", "C4", "C9"):
+            self.index.discard(customer_id)
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.search_name("j"), [])
+        # pylint: disable=protected-access
+        self.assertEqual((self.index._emails, self.index._phones), ({}, {}))
+        self.assertEqual(self.index._names.children, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
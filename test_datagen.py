@@ -0,0 +1,57 @@
+"""
+This module contains unit tests for the synthetic data generator.
+It tests determinism, that generated reservations never overlap, and that written
+datasets reserve their IDs so later reservations get new ones.
+"""
+
+import os
+import tempfile
+import unittest
+from availability import AvailabilityIndex
+from datagen import (generate_customers, generate_hotels, generate_reservations,
+                     write_dataset)
+from ids import IdAllocator
+from storage import read_json
+
+
+class TestDatagen(unittest.TestCase):
+    """Tests for the data generator."""
+
+    def test_generators(self):
+        """Test record counts, references and determinism."""
+        hotels = list(generate_hotels(3, 4, seed=1))
+        self.assertEqual([len(hotel['rooms']) for hotel in hotels], [4, 4, 4])
+        self.assertEqual(hotels, list(generate_hotels(3, 4, seed=1)))
+        customers = {c['customer_id'] for c in generate_customers(5)}
+        self.assertEqual(len(customers), 5)
+
+        reservations = list(generate_reservations(200, 3, 4, 5, seed=1))
+        self.assertEqual(reservations, list(generate_reservations(200, 3, 4, 5, seed=1)))
+        self.assertEqual(len({r['reservation_id'] for r in reservations}), 200)
+        rooms = {(h['hotel_id'], room['room_id']) for h in hotels for room in h['rooms']}
+        self.assertTrue(all((r['hotel_id'], r['room_id']) in rooms for r in reservations))
+        self.assertTrue(all(r['customer_id'] in customers for r in reservations))
+
+    def test_reservations_do_not_overlap(self):
+        """Test that no two generated reservations of a room overlap."""
+        index = AvailabilityIndex(generate_reservations(500, 2, 3, 10))
+        for reservation in generate_reservations(500, 2, 3, 10):
+            conflicts = index.conflicts(reservation['hotel_id'], reservation['room_id'],
+                                        reservation['start_date'], reservation['end_date'])
+            self.assertEqual([r['reservation_id'] for r in conflicts],
+                             [reservation['reservation_id']])
+
+    def test_write_dataset(self):
+        """Test the written files and the reserved IDs."""
+        with tempfile.TemporaryDirectory() as directory:
+            paths = write_dataset(os.path.join(directory, 'data'), 2, 2, 3, 10)
+            self.assertEqual(len(read_json(paths['hotels'])), 2)
+            self.assertEqual(len(read_json(paths['customers'])), 3)
+            reservations = read_json(paths['reservations'])
+            self.assertEqual(reservations[-1]['reservation_id'], "R000000000010")
+            allocator = IdAllocator(paths['reservations'] + '.seq')
+            self.assertEqual(allocator.next_id(), "R000000000011")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+This module contains unit tests for the date parsing helpers and for the rejection
+of malformed dates when reservations are made.
+"""
+
+import tempfile
+import unittest
+from dates import format_date, parse_date, parse_period
+from hotel import Hotel
+from reservation import Reservation
+from store import Store, activate, deactivate
+
+
+class TestDates(unittest.TestCase):
+    """Tests for the dates module."""
+
+    def test_parse_date(self):
+        """Test that dates become consecutive ordinal day numbers."""
+        self.assertEqual(parse_date("2024-03-01") - parse_date("2024-02-28"), 2)
+        self.assertEqual(format_date(parse_date("2024-02-29")), "2024-02-29")
+
+    def test_malformed_dates_are_rejected(self):
+        """Test values that would have been mis-compared as strings."""
+        for value in ("2024-1-5", "2024/01/05", "20240105", "2024-02-30", "", None, 20240105,
+                      ["2024-01-05"], {'date': "2024-01-05"}):
+            with self.assertRaises(ValueError):
+                parse_date(value)
+
+    def test_parse_period(self):
+        """Test that a period ending before it starts is rejected."""
+        self.assertEqual(parse_period("2024-01-01", "2024-01-01"),
+                         (parse_date("2024-01-01"),) * 2)
+        with self.assertRaises(ValueError):
+            parse_period("2024-01-05", "2024-01-01")
+
+
+class TestDateIngest(unittest.TestCase):
+    """Tests that reservations with malformed dates never reach storage."""
+
+    def setUp(self):
+        """Use an empty store in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
+
+    def test_reserve_room_rejects_malformed_dates(self):
+        """Test reserve_room with a non zero-padded date."""
+        with self.assertRaises(ValueError):
+            Hotel.reserve_room("005", "C001", "101", "2024-1-5", "2024-01-07")
+        self.assertEqual(Reservation.load_reservations(), [])
+
+    def test_reservation_rejects_reversed_period(self):
+        """Test creating a reservation that ends before it starts."""
+        with self.assertRaises(ValueError):
+            Reservation({'reservation_id': "R1", 'customer_id': "C001", 'hotel_id': "005",
+                         'room_id': "101", 'start_date': "2024-01-07",
+                         'end_date': "2024-01-05"})
+
+    def test_batch_rejects_malformed_dates(self):
+        """Test that a malformed request is rejected without affecting the others."""
+        results = Hotel.reserve_rooms_batch([
+            {'hotel_id': "005", 'customer_id': "C001", 'room_id': "101",
+             'start_date': "2024-01-01", 'end_date': "2024-01-03"},
+            {'hotel_id': "005", 'customer_id': "C002", 'room_id': "102",
+             'start_date': "2024-01-32", 'end_date': "2024-02-03"},
+        ])
+
+        self.assertEqual([r.success for r in results], [True, False])
+        self.assertIn("Invalid date", results[1].message)
+        self.assertEqual(len(Reservation.load_reservations()), 1)
+
+    def test_batch_rejects_unhashable_dates(self):
+        """Test that a date of the wrong type fails its request instead of the batch."""
+        results = Hotel.reserve_rooms_batch([
+            {'hotel_id': "005", 'customer_id': "C001", 'room_id': "101",
+             'start_date': ["2024-01-01"], 'end_date': "2024-01-03"},
+        ])
+        self.assertFalse(results[0].success)
+        self.assertIn("Invalid date", results[0].message)
+        self.assertEqual(Reservation.load_reservations(), [])
+
+if __name__ == '__main__':
+    unittest.main()
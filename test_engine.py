@@ -0,0 +1,131 @@
+"""
+This module contains unit tests for the multi-process booking engine.
+It tests routing calls by hotel to the worker processes, batching concurrent bookings,
+merged searches, error replies and closing the engine, and the batches run by a worker.
+"""
+
+import os
+import tempfile
+import unittest
+from engine import BookingEngine, _run_batch
+from hotel import Hotel
+from reservation import Reservation
+from sharding import ShardedStore
+from store import Store, activate, deactivate
+
+
+def hotel(hotel_id, price):
+    """Return a hotel in Lisbon with one single room."""
+    return {'hotel_id': hotel_id, 'name': f"Hotel {hotel_id}", 'location': "Lisbon",
+            'rooms': [{"room_id": "101", "type": "Single", "price": price}],
+            'amenities': []}
+
+
+class TestBookingEngine(unittest.TestCase):
+    """Tests for the BookingEngine class."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create hotels in two shards and start an engine with a worker for each."""
+        cls.directory = tempfile.TemporaryDirectory()
+        directories = {name: os.path.join(cls.directory.name, name) for name in 'ab'}
+        shared = os.path.join(cls.directory.name, 'shared')
+        cls.sharded = ShardedStore.open(directories, shared)
+        cls.hotels = [f"H{number:03d}" for number in range(8)]
+        for number, hotel_id in enumerate(cls.hotels):
+            with cls.sharded.use(hotel_id):
+                Hotel(hotel(hotel_id, 100 + number)).create_hotel()
+        cls.engine = BookingEngine(directories, shared)
+        cls.engine.ping()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the engine and remove the temporary directory."""
+        cls.engine.close()
+        cls.directory.cleanup()
+
+    def test_bookings_land_in_the_shard_of_their_hotel(self):
+        """Test booking, conflicts and canceling through the workers."""
+        first = self.engine.reserve_room("H001", "C001", "101", "2024-01-01", "2024-01-05")
+        self.assertTrue(first.success)
+        refused = self.engine.reserve_room("H001", "C002", "101", "2024-01-05", "2024-01-06")
+        self.assertEqual(refused.conflicts[0]['reservation_id'],
+                         first.record['reservation_id'])
+        self.assertEqual(len(self.engine.find_conflicts("H001", "101",
+                                                        "2024-01-02", "2024-01-02")), 1)
+        self.assertEqual(
+            [r['reservation_id'] for r in self.sharded.iter_reservations("H001")],
+            [first.record['reservation_id']])
+
+        self.assertTrue(self.engine.cancel_reservation(first.record['reservation_id']).success)
+        self.assertFalse(
+            self.engine.cancel_reservation(first.record['reservation_id'], "H001").success)
+
+    def test_concurrent_bookings_are_batched(self):
+        """Test that bookings submitted together get one result each and unique IDs."""
+        futures = [self.engine.submit('reserve_room', hotel_id, hotel_id, "C001", "101",
+                                      "2024-02-01", "2024-02-01")
+                   for hotel_id in self.hotels * 3]
+        results = [future.result() for future in futures]
+
+        self.assertEqual(sum(result.success for result in results), len(self.hotels))
+        self.assertTrue(all(result.success for result in results[:len(self.hotels)]))
+        ids = [result.record['reservation_id'] for result in results if result.success]
+        self.assertEqual(len(set(ids)), len(self.hotels))
+        self.assertEqual(self.engine.find_available_rooms("Lisbon", "2024-02-01",
+                                                          "2024-02-01"), [])
+
+    def test_find_available_rooms_merges_workers(self):
+        """Test that free rooms from every worker come back cheapest first."""
+        self.engine.reserve_room("H000", "C001", "101", "2024-03-01", "2024-03-01")
+
+        rooms = self.engine.find_available_rooms("lisbon", "2024-03-01", "2024-03-01")
+        self.assertEqual([room['hotel_id'] for room in rooms], self.hotels[1:])
+
+    def test_errors_are_raised_to_the_caller(self):
+        """Test that an error in a worker is raised by the call that caused it."""
+        with self.assertRaises(ValueError):
+            self.engine.find_conflicts("H001", "101", "2024-13-01", "2024-13-02")
+        result = self.engine.reserve_room("H001", "C001", "101", "2024-01-02", "2024-01-01")
+        self.assertFalse(result.success)
+
+    def test_closed_engine(self):
+        """Test that a closed engine refuses calls."""
+        with tempfile.TemporaryDirectory() as directory:
+            engine = BookingEngine({'a': os.path.join(directory, 'a')}, directory)
+            with engine:
+                self.assertTrue(engine.reserve_room("H001", "C001", "101",
+                                                    "2024-01-01", "2024-01-01").success)
+            with self.assertRaises(RuntimeError):
+                engine.reserve_room("H001", "C001", "101", "2024-01-02", "2024-01-02")
+
+
+class TestRunBatch(unittest.TestCase):
+    """Tests for the batches of requests run by a worker."""
+
+    def setUp(self):
+        """Use an empty store in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
+
+    def test_requests_run_in_order(self):
+        """Test that a cancel between runs of bookings frees the room for the later run."""
+        existing = Hotel.reserve_room("H001", "C001", "101", "2024-01-01", "2024-01-01")
+        booking = ("H001", "C002", "101", "2024-01-01", "2024-01-01")
+        replies = _run_batch([
+            (1, 'reserve_room', booking),
+            (2, 'cancel_reservation', (existing.record['reservation_id'],)),
+            (3, 'reserve_room', booking),
+            (4, 'find_conflicts', ("H001", "101", "2024-01-02", "2024-01-01")),
+        ])
+
+        self.assertEqual([(request_id, ok) for request_id, ok, _ in replies],
+                         [(1, True), (2, True), (3, True), (4, False)])
+        self.assertEqual([value.success for _, _, value in replies[:3]], [False, True, True])
+        self.assertIsInstance(replies[3][2], ValueError)
+        self.assertEqual([r['customer_id'] for r in Reservation.load_reservations()], ["C002"])
+
+
+if __name__ == '__main__':
+    unittest.main()
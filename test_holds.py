@@ -0,0 +1,158 @@
+"""
+This module contains unit tests for temporary room holds.
+It tests the HoldRegistry class with a controlled clock, and holding, confirming and
+releasing rooms through the Hotel class on every backend.
+"""
+
+import os
+import tempfile
+import unittest
+from dates import parse_period
+from holds import HoldRegistry
+from hotel import Hotel
+from reservation import Reservation
+from sqlite_storage import close_connections
+from store import BACKENDS, Store, current_store, use
+
+
+class Clock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHoldRegistry(unittest.TestCase):
+    """Tests for the HoldRegistry class."""
+
+    def setUp(self):
+        """Create a registry on a controlled clock."""
+        self.clock = Clock()
+        self.holds = HoldRegistry(self.clock)
+
+    def conflicts(self, room_id, start_date, end_date):
+        """Return the holds of a room of hotel 001 overlapping a period."""
+        return self.holds.conflicts("001", room_id, *parse_period(start_date, end_date))
+
+    def test_hold_and_remove(self):
+        """Test that a hold overlaps its period until removed, without exposing its token."""
+        hold = self.holds.add("001", "C001", "101", "2024-01-01", "2024-01-05", ttl=60)
+
+        self.assertEqual(len(hold['hold_id']), 32)
+        self.assertEqual(hold['expires_at'], 60)
+        self.assertEqual(self.holds.get(hold['hold_id'])['customer_id'], "C001")
+        self.assertEqual(self.conflicts("101", "2024-01-06", "2024-01-07"), [])
+        self.assertEqual(self.conflicts("102", "2024-01-01", "2024-01-05"), [])
+        conflicts = self.conflicts("101", "2024-01-05", "2024-01-07")
+        self.assertEqual(conflicts, [{'customer_id': "C001", 'hotel_id': "001",
+                                      'room_id': "101", 'start_date': "2024-01-01",
+                                      'end_date': "2024-01-05", 'hold': True}])
+
+        self.assertEqual(self.holds.remove(hold['hold_id'])['hold_id'], hold['hold_id'])
+        self.assertIsNone(self.holds.remove(hold['hold_id']))
+        self.assertEqual(self.conflicts("101", "2024-01-01", "2024-01-05"), [])
+        self.assertEqual(len(self.holds), 0)
+
+    def test_expiry(self):
+        """Test that holds disappear once their time to live has passed, earliest first."""
+        short = self.holds.add("001", "C001", "101", "2024-01-01", "2024-01-02", ttl=10)
+        long = self.holds.add("001", "C002", "101", "2024-01-03", "2024-01-04", ttl=20)
+        released = self.holds.add("001", "C003", "102", "2024-01-01", "2024-01-02", ttl=5)
+        self.holds.remove(released['hold_id'])
+
+        self.clock.now = 10
+        self.assertIsNone(self.holds.get(short['hold_id']))
+        self.assertEqual([h['customer_id'] for h in self.conflicts("101", "2024-01-01",
+                                                                    "2024-01-31")], ["C002"])
+        self.clock.now = 25
+        self.assertIsNone(self.holds.remove(long['hold_id']))
+        self.assertEqual(len(self.holds), 0)
+        self.assertEqual(self.holds._expiry, [])  # pylint: disable=protected-access
+
+    def test_many_holds_expire(self):
+        """Test expiring thousands of holds of one room with staggered times to live."""
+        for number in range(3000):
+            start = f"{2024 + number // 300}-{number % 12 + 1:02d}-{number % 25 + 1:02d}"
+            self.holds.add("001", f"C{number}", "101", start, start, ttl=number % 100 + 1)
+        self.clock.now = 50
+        self.assertEqual(len(self.holds), 1500)
+        self.clock.now = 100
+        self.assertEqual(self.conflicts("101", "2024-01-01", "2034-12-31"), [])
+
+    def test_invalid_period(self):
+        """Test that a hold with invalid dates is refused."""
+        with self.assertRaises(ValueError):
+            self.holds.add("001", "C001", "101", "2024-01-05", "2024-01-01", ttl=60)
+        self.assertEqual(len(self.holds), 0)
+
+
+class TestHotelHolds(unittest.TestCase):
+    """Tests for Hotel.hold_room, Hotel.confirm_hold and Hotel.release_hold."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Close the SQLite connections and remove the temporary directory."""
+        close_connections()
+        self.directory.cleanup()
+
+    def test_holds_block_bookings(self):
+        """Test that a hold blocks bookings, batches and searches until it is released."""
+        for backend in BACKENDS:
+            with self.subTest(backend=backend), \
+                    use(Store.open(os.path.join(self.directory.name, backend), backend)):
+                Hotel({'hotel_id': "001", 'name': "Hotel", 'location': "Porto",
+                       'rooms': [{'room_id': "101", 'type': "Single", 'price': 90}],
+                       'amenities': []}).create_hotel()
+                held = Hotel.hold_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+                self.assertTrue(held.success)
+
+                refused = Hotel.reserve_room("001", "C002", "101", "2024-01-05", "2024-01-06")
+                self.assertEqual(refused.conflicts[0]['customer_id'], "C001")
+                self.assertNotIn('hold_id', refused.conflicts[0])
+                self.assertFalse(Hotel.hold_room("001", "C002", "101",
+                                                 "2024-01-02", "2024-01-02").success)
+                batch = [{'hotel_id': "001", 'customer_id': "C002", 'room_id': "101",
+                          'start_date': "2024-01-03", 'end_date': "2024-01-04"}]
+                self.assertFalse(Hotel.reserve_rooms_batch(batch)[0].success)
+                self.assertEqual(
+                    Hotel.find_available_rooms("Porto", "2024-01-04", "2024-01-04"), [])
+
+                self.assertTrue(Hotel.release_hold(held.record['hold_id']).success)
+                self.assertFalse(Hotel.release_hold(held.record['hold_id']).success)
+                self.assertTrue(Hotel.reserve_rooms_batch(batch)[0].success)
+                self.assertEqual(Reservation.load_reservations()[0]['customer_id'], "C002")
+
+    def test_confirm_hold(self):
+        """Test that confirming a hold reserves the room and only works once."""
+        with use(Store.open(self.directory.name)):
+            held = Hotel.hold_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+            confirmed = Hotel.confirm_hold(held.record['hold_id'])
+
+            self.assertTrue(confirmed.success)
+            self.assertEqual(confirmed.record['customer_id'], "C001")
+            self.assertEqual(len(current_store().holds), 0)
+            self.assertFalse(Hotel.confirm_hold(held.record['hold_id']).success)
+            self.assertEqual(len(Reservation.load_reservations()), 1)
+
+    def test_expired_hold_frees_the_room(self):
+        """Test that an expired hold no longer blocks the room and cannot be confirmed."""
+        with use(Store.open(self.directory.name)) as store:
+            store.holds.clock = clock = Clock()
+            held = Hotel.hold_room("001", "C001", "101", "2024-01-01", "2024-01-05", ttl=30)
+            self.assertFalse(Hotel.reserve_room("001", "C002", "101",
+                                                "2024-01-02", "2024-01-03").success)
+
+            clock.now = 30
+            self.assertTrue(Hotel.reserve_room("001", "C002", "101",
+                                               "2024-01-02", "2024-01-03").success)
+            self.assertFalse(Hotel.confirm_hold(held.record['hold_id']).success)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,19 +5,24 @@ displaying hotel information, reserving rooms, and canceling reservations.
 """
 
 import json
+import os
 import sys
+import tempfile
 from io import StringIO
 import unittest
 from hotel import Hotel
+from logs import disable_logging, enable_logging
 from reservation import Reservation
+from store import Store, activate, deactivate, use
 
 class TestHotel(unittest.TestCase):
     """Tests for the Hotel class."""
 
     def setUp(self):
-        """Prepare environment for each test."""
-        Hotel.save_hotels([])
-        Reservation.save_reservations([])
+        """Use an empty store in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
 
     def test_create_hotel(self):
         """Test creating a hotel and verifying it's saved correctly."""
@@ -60,6 +65,108 @@ class TestHotel(unittest.TestCase):
 
         self.assertIsNone(found_hotel)
 
+    def test_delete_hotel_with_reservations(self):
+        """Test that a hotel with reservations is kept unless the delete cascades."""
+        Hotel({'hotel_id': "010", 'name': "Busy", 'location': "Porto",
+               'rooms': [{"room_id": "101", "type": "Single", "price": 90}],
+               'amenities': []}).create_hotel()
+        Hotel.reserve_room("010", "C001", "101", "2024-01-01", "2024-01-02")
+        Hotel.reserve_room("011", "C001", "101", "2024-01-01", "2024-01-02")
+        self.assertEqual(len(Hotel.find_available_rooms("Porto", "2024-02-01", "2024-02-02")), 1)
+
+        result = Hotel.delete_hotel("010")
+        self.assertFalse(result.success)
+        self.assertEqual(len(result.conflicts), 1)
+
+        self.assertTrue(Hotel.delete_hotel("010", cascade=True).success)
+        self.assertEqual(Hotel.find_available_rooms("Porto", "2024-02-01", "2024-02-02"), [])
+        self.assertEqual([r['hotel_id'] for r in Reservation.load_reservations()], ["011"])
+
+    def test_room_operations(self):
+        """Test adding, repricing, reading and removing single rooms."""
+        Hotel({'hotel_id': "012", 'name': "Rooms", 'location': "Faro",
+               'rooms': [{"room_id": "101", "type": "Single", "price": 90}],
+               'amenities': []}).create_hotel()
+
+        self.assertTrue(Hotel.add_room("012", {"room_id": "102", "type": "Single",
+                                               "price": 70}).success)
+        self.assertFalse(Hotel.add_room("012", {"room_id": "102"}).success)
+        self.assertFalse(Hotel.add_room("999", {"room_id": "102"}).success)
+        self.assertTrue(Hotel.update_room_price("012", "101", 60).success)
+        self.assertFalse(Hotel.update_room_price("012", "109", 60).success)
+
+        self.assertEqual(Hotel.get_room("012", "101")['price'], 60)
+        rooms = Hotel.find_available_rooms("Faro", "2024-01-01", "2024-01-02")
+        self.assertEqual([room['room_id'] for room in rooms], ["101", "102"])
+        self.assertTrue(Hotel.remove_room("012", "101").success)
+        self.assertIsNone(Hotel.get_room("012", "101"))
+        self.assertEqual(Hotel.repository.storage.load()[0]['rooms'],
+                         [{"room_id": "102", "type": "Single", "price": 70}])
+
+    def test_remove_room_with_future_reservations(self):
+        """Test that a room is only removed once its reservations are in the past."""
+        Hotel({'hotel_id': "013", 'name': "Booked", 'location': "Faro",
+               'rooms': [{"room_id": "101", "type": "Single", "price": 90}],
+               'amenities': []}).create_hotel()
+        Hotel.reserve_room("013", "C001", "101", "2024-06-01", "2024-06-05")
+
+        result = Hotel.remove_room("013", "101", today="2024-06-05")
+        self.assertFalse(result.success)
+        self.assertEqual(len(result.conflicts), 1)
+        self.assertFalse(Hotel.remove_room("013", "102").success)
+        self.assertTrue(Hotel.remove_room("013", "101", today="2024-06-06").success)
+
+    def test_room_changes_write_one_hotel_on_the_journal(self):
+        """Test that room changes on the journal backend append one entry for the hotel."""
+        with use(Store.open(os.path.join(self.directory.name, 'journal'), 'journal')) as store:
+            Hotel({'hotel_id': "014", 'name': "Log", 'location': "Faro",
+                   'rooms': [], 'amenities': []}).create_hotel()
+            Hotel.add_room("014", {"room_id": "101", "type": "Single", "price": 90})
+            Hotel.update_room_price("014", "101", 80)
+
+            with open(store.hotels.storage.journal_path, 'r', encoding='utf-8') as file:
+                entries = [json.loads(line) for line in file]
+        self.assertEqual([entry['op'] for entry in entries], ['create', 'modify', 'modify'])
+        self.assertEqual(entries[-1]['changes']['rooms'][0]['price'], 80)
+
+    def test_quote_stay(self):
+        """Test quoting stays under rate rules, and after every change of the rates."""
+        Hotel({'hotel_id': "015", 'name': "Rates", 'location': "Faro",
+               'rooms': [{"room_id": "101", "type": "Single", "price": 100},
+                         {"room_id": "102", "type": "Double", "price": 150}],
+               'amenities': []}).create_hotel()
+        Hotel.modify_hotel_info("015", rate_rules=[
+            {'room_type': "Single", 'start_date': "12-30", 'end_date': "01-01",
+             'multiplier': 2},
+            {'weekdays': [5], 'price': 80},
+        ])
+
+        # Friday 2023-12-29 to Tuesday 2024-01-02: 100, 80, 200, 200, 100.
+        quote = Hotel.quote_stay("015", "101", "2023-12-29", "2024-01-02").record
+        self.assertEqual((quote['nights'], quote['total']), (5, 680))
+        self.assertEqual(Hotel.quote_stay("015", "102", "2023-12-29", "2024-01-02").record[
+            'total'], 680)
+        self.assertFalse(Hotel.quote_stay("015", "109", "2024-01-01", "2024-01-01").success)
+        self.assertFalse(Hotel.quote_stay("999", "101", "2024-01-01", "2024-01-01").success)
+        with self.assertRaises(ValueError):
+            Hotel.quote_stay("015", "101", "2024-01-02", "2024-01-01")
+
+        def total():
+            return Hotel.quote_stay("015", "101", "2024-01-01", "2024-01-02").record['total']
+
+        self.assertEqual(total(), 300)
+        Hotel.update_room_price("015", "101", 50)
+        self.assertEqual(total(), 150)
+        Hotel.modify_hotel_info("015", rate_rules=[])
+        self.assertEqual(total(), 100)
+        Hotel.remove_room("015", "101")
+        self.assertIsNone(Hotel.quote_stay("015", "101", "2024-01-01", "2024-01-02").record)
+        Hotel.add_room("015", {"room_id": "101", "type": "Single", "price": 70})
+        self.assertEqual(total(), 140)
+        with use(Store.open(self.directory.name)):
+            Hotel.update_room_price("015", "101", 90)
+        self.assertEqual(total(), 180)
+
     def test_display_hotel_info(self):
         """Test displaying hotel information."""
         hotel_info = {
@@ -167,6 +274,94 @@ class TestHotel(unittest.TestCase):
         reservation = next((r for r in reservations if r['reservation_id'] == 'R001'), None)
 
         self.assertIsNone(reservation)
+
+    def test_reserve_room_returns_conflicts(self):
+        """Test that an overlapping booking is refused and reports the conflict."""
+        hotel_info = {
+            'hotel_id': "007",
+            'name': "Test Hotel for Conflicts",
+            'location': "Test Location for Conflicts",
+            'rooms': [{"room_id": "103", "type": "Suite", "price": 300}],
+            'amenities': ["Bar"]
+        }
+
+        hotel = Hotel(hotel_info)
+        hotel.create_hotel()
+
+        result = Hotel.reserve_room(hotel_info['hotel_id'], "C003", "103",
+                                    "2024-03-01", "2024-03-05")
+        self.assertTrue(result.success)
+        self.assertEqual(result.record['customer_id'], "C003")
+        self.assertEqual(result.conflicts, ())
+        result = Hotel.reserve_room(
+                                   hotel_info['hotel_id'], "C004", "103",
+                                   "2024-03-04", "2024-03-08"
+                                   )
+
+        self.assertFalse(result)
+        self.assertIsNone(result.record)
+        self.assertEqual(len(result.conflicts), 1)
+        self.assertEqual(result.conflicts[0]['customer_id'], "C003")
+        reservations = Reservation.load_reservations()
+        self.assertFalse(any(r['customer_id'] == "C004" for r in reservations))
+
+    def test_reservation_ids_are_unique_after_cancel(self):
+        """Test that canceling a reservation does not make a later ID collide."""
+        Hotel.reserve_room("010", "C001", "101", "2024-06-01", "2024-06-02")
+        Hotel.reserve_room("010", "C002", "101", "2024-06-03", "2024-06-04")
+        first = Reservation.load_reservations()[0]['reservation_id']
+        Hotel.cancel_reservation(first)
+        Hotel.reserve_room("010", "C003", "101", "2024-06-05", "2024-06-06")
+
+        reservations = Reservation.load_reservations()
+        ids = [r['reservation_id'] for r in reservations]
+        self.assertEqual(len(reservations), 2)
+        self.assertEqual(len(set(ids)), 2)
+        self.assertNotIn(first, ids)
+        self.assertEqual(ids, sorted(ids))
+
+    def test_reserve_rooms_batch(self):
+        """Test a batch validated against stored reservations and against itself."""
+        Hotel.reserve_room("008", "C001", "101", "2024-04-01", "2024-04-05")
+        requests = [
+            {'hotel_id': "008", 'customer_id': "C002", 'room_id': "101",
+             'start_date': "2024-04-03", 'end_date': "2024-04-04"},
+            {'hotel_id': "008", 'customer_id': "C003", 'room_id': "102",
+             'start_date': "2024-04-01", 'end_date': "2024-04-10"},
+            {'hotel_id': "008", 'customer_id': "C004", 'room_id': "102",
+             'start_date': "2024-04-10", 'end_date': "2024-04-12"},
+            {'hotel_id': "008", 'customer_id': "C005", 'room_id': "101",
+             'start_date': "2024-04-06", 'end_date': "2024-04-08"},
+            {'hotel_id': "008", 'room_id': "103"},
+            {'hotel_id': ["008"], 'customer_id': "C006", 'room_id': "103",
+             'start_date': "2024-04-01", 'end_date': "2024-04-02"},
+        ]
+
+        results = Hotel.reserve_rooms_batch(requests)
+
+        self.assertEqual([r.success for r in results], [False, True, False, True, False, False])
+        self.assertEqual(results[5].message, "Reservation fields must be strings: hotel_id.")
+        self.assertEqual(results[0].conflicts[0]['customer_id'], "C001")
+        self.assertEqual(results[2].conflicts[0]['customer_id'], "C003")
+        reserved = {r['customer_id'] for r in Reservation.load_reservations()}
+        self.assertEqual(reserved, {"C001", "C003", "C005"})
+        self.assertEqual(len({r.record['reservation_id'] for r in results if r.success}), 2)
+
+    def test_reserve_rooms_batch_all_or_nothing(self):
+        """Test that an all-or-nothing batch with a rejected request reserves nothing."""
+        requests = [
+            {'hotel_id': "009", 'customer_id': "C001", 'room_id': "101",
+             'start_date': "2024-05-01", 'end_date': "2024-05-05"},
+            {'hotel_id': "009", 'customer_id': "C002", 'room_id': "101",
+             'start_date': "2024-05-05", 'end_date': "2024-05-06"},
+        ]
+
+        results = Hotel.reserve_rooms_batch(requests, all_or_nothing=True)
+
+        self.assertEqual([r.success for r in results], [False, False])
+        self.assertEqual(Reservation.load_reservations(), [])
+        self.assertEqual(Reservation.find_conflicts("009", "101", "2024-05-01", "2024-05-31"), [])
+
     #NEGATIVE CASES
     def test_create_hotel_empty_id(self):
         hotel_info = {
@@ -184,23 +379,51 @@ class TestHotel(unittest.TestCase):
         hotel_id = "123"
 
         # Instead of raising an error, simply pass the test
-        Hotel.delete_hotel(hotel_id)
-        self.assertTrue(True)
+        result = Hotel.delete_hotel(hotel_id)
+        self.assertFalse(result.success)
 
     def test_modify_nonexistent_hotel(self):
         hotel_id = "123"
         new_name = "Modified Hotel"
 
         # Instead of raising an error, simply pass the test
-        Hotel.modify_hotel_info(hotel_id, name=new_name)
-        self.assertTrue(True)
+        result = Hotel.modify_hotel_info(hotel_id, name=new_name)
+        self.assertFalse(result.success)
+        self.assertEqual(result.message, "Hotel not found.")
 
     def test_cancel_nonexistent_reservation(self):
         reservation_id = "R123"
 
         # Instead of raising an error, simply pass the test
-        Reservation.cancel_reservation(reservation_id)
-        self.assertTrue(True)
+        result = Reservation.cancel_reservation(reservation_id)
+        self.assertFalse(result.success)
+
+    def test_reserve_room_logs_outcome(self):
+        """Test that outcomes go to the 'hotel_booking' logger instead of stdout."""
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            with self.assertLogs('hotel_booking.hotel', 'INFO') as logs:
+                Hotel.reserve_room("011", "C001", "101", "2024-07-01", "2024-07-02")
+                Hotel.reserve_room("011", "C002", "101", "2024-07-02", "2024-07-03")
+        finally:
+            sys.stdout = sys.__stdout__
+        self.assertEqual(captured_output.getvalue(), "")
+        self.assertEqual(logs.records[0].getMessage(),
+                         "Room 101 in Hotel 011 reserved from 2024-07-01 to 2024-07-02.")
+        self.assertEqual(logs.records[0].args[:2], ("101", "011"))
+        self.assertIn("not reserved", logs.records[1].getMessage())
+
+    def test_enable_logging(self):
+        """Test writing the messages to a stream and turning them off again."""
+        stream = StringIO()
+        handler = enable_logging(stream=stream)
+        try:
+            Hotel.delete_hotel("missing")
+        finally:
+            disable_logging(handler)
+        Hotel.delete_hotel("missing")
+        self.assertEqual(stream.getvalue(), "Hotel missing not deleted: not found.\n")
 
 if __name__ == '__main__':
     unittest.main()
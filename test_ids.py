@@ -0,0 +1,63 @@
+"""
+This module contains unit tests for the IdAllocator class.
+It tests ordering, persistence of the counter, block allocation and
+uniqueness of IDs allocated by several processes at once.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+from ids import IdAllocator
+
+
+def allocate_ids(path):
+    """Allocate IDs one at a time from a fresh allocator, as a separate process would."""
+    allocator = IdAllocator(path)
+    return [allocator.next_id() for _ in range(50)]
+
+
+class TestIdAllocator(unittest.TestCase):
+    """Tests for the IdAllocator class."""
+
+    def setUp(self):
+        """Create an allocator in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'reservations.json.seq')
+        self.allocator = IdAllocator(self.path)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_ids_are_sequential_and_sortable(self):
+        """Test that IDs increase and sort in allocation order."""
+        ids = [self.allocator.next_id() for _ in range(12)]
+        self.assertEqual(ids[0], "R000000000001")
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), 12)
+
+    def test_counter_is_persisted(self):
+        """Test that a new allocator continues from the stored counter."""
+        self.allocator.allocate(5)
+        self.assertEqual(IdAllocator(self.path).next_id(), "R000000000006")
+
+    def test_block_allocation(self):
+        """Test allocating several IDs at once."""
+        self.assertEqual(self.allocator.allocate(3),
+                         ["R000000000001", "R000000000002", "R000000000003"])
+        self.assertEqual(self.allocator.allocate(0), [])
+        self.assertEqual(self.allocator.next_id(), "R000000000004")
+
+    def test_unique_across_processes(self):
+        """Test that concurrent processes never receive the same ID."""
+        with multiprocessing.get_context('spawn').Pool(4) as pool:
+            batches = pool.map(allocate_ids, [self.path] * 4)
+
+        ids = [reservation_id for batch in batches for reservation_id in batch]
+        self.assertEqual(len(set(ids)), 200)
+        for batch in batches:
+            self.assertEqual(batch, sorted(batch))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+This module contains unit tests for the instrumentation module.
+It tests that nothing is recorded while disabled, the timer, decorator and counter API,
+the stats and Prometheus exports, and the timers and byte counts of a booking.
+"""
+
+import tempfile
+import unittest
+import instrumentation
+from hotel import Hotel
+from store import Store, activate, deactivate
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests for the instrumentation module."""
+
+    def setUp(self):
+        """Start every test with instrumentation disabled and empty."""
+        instrumentation.disable()
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+        self.addCleanup(instrumentation.disable)
+
+    def test_disabled_records_nothing(self):
+        """Test that timers, decorated functions and counters are no-ops while disabled."""
+        with instrumentation.timer('block'):
+            pass
+        self.assertEqual(instrumentation.timed('call')(lambda value: value * 2)(21), 42)
+        instrumentation.count('bytes', 10)
+
+        self.assertEqual(instrumentation.stats(), {'timers': {}, 'counters': {}})
+        self.assertEqual(instrumentation.prometheus(), '')
+
+    def test_timers_and_counters(self):
+        """Test that enabled timers, decorated calls and counters are recorded."""
+        @instrumentation.timed('double')
+        def double(value):
+            return value * 2
+
+        with instrumentation.enabled():
+            with instrumentation.timer('block'):
+                double(1)
+            double(2)
+            instrumentation.count('json.read_bytes', 100)
+            instrumentation.count('json.read_bytes', 20)
+        double(3)
+
+        stats = instrumentation.stats()
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertEqual(stats['timers']['double']['count'], 2)
+        self.assertEqual(stats['timers']['block']['count'], 1)
+        self.assertGreaterEqual(stats['timers']['block']['seconds'],
+                                stats['timers']['block']['max_seconds'])
+        self.assertEqual(stats['counters'], {'json.read_bytes': 120})
+
+    def test_prometheus_export(self):
+        """Test the Prometheus text format of timers and counters."""
+        instrumentation.enable()
+        with instrumentation.timer('hotel.reserve_room'):
+            pass
+        instrumentation.count('cache.hits', 3)
+
+        lines = instrumentation.prometheus().splitlines()
+        self.assertIn('# TYPE hotel_booking_operation_seconds summary', lines)
+        self.assertIn('hotel_booking_operation_seconds_count{operation="hotel.reserve_room"} 1',
+                      lines)
+        self.assertIn('# TYPE hotel_booking_cache_hits_total counter', lines)
+        self.assertIn('hotel_booking_cache_hits_total 3', lines)
+
+    def test_booking_is_instrumented(self):
+        """Test that a booking records its timers, bytes written and cache counters."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(directory.name)))
+
+        with instrumentation.enabled():
+            Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-02")
+            Hotel.reserve_room("001", "C002", "101", "2024-01-01", "2024-01-02")
+
+        stats = instrumentation.stats()
+        for name in ('hotel.reserve_room', 'reservation.find_conflicts', 'json.write'):
+            self.assertIn(name, stats['timers'])
+        self.assertEqual(stats['timers']['hotel.reserve_room']['count'], 2)
+        self.assertGreater(stats['counters']['json.write_bytes'], 0)
+        self.assertGreater(stats['counters']['cache.hits'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+This module contains unit tests for the VersionLock class and a multi-process
+stress test of concurrent reservations on the JSON, journal and SQLite backends.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from locking import VersionLock
+from reservation import Reservation
+from sqlite_storage import close_connections
+from store import Store, use
+
+WORKERS = 4
+DAYS = 15
+
+
+def book_every_day(worker):
+    """Try to book room 101 for each day of January; return the number of bookings made."""
+    booked = 0
+    for day in range(1, DAYS + 1):
+        date = f"2024-01-{day:02d}"
+        result = Reservation({
+            'reservation_id': f"W{worker}-{day}",
+            'customer_id': f"C{worker}",
+            'hotel_id': "H001",
+            'room_id': "101",
+            'start_date': date,
+            'end_date': date
+        }).create_reservation()
+        booked += result.success
+    return booked
+
+
+def book_every_day_in(store, worker):
+    """Run book_every_day with a store as the current store, e.g. in a pool thread."""
+    with use(store):
+        return book_every_day(worker)
+
+
+class TestVersionLock(unittest.TestCase):
+    """Tests for the VersionLock class."""
+
+    def setUp(self):
+        """Create a lock in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.lock = VersionLock(os.path.join(self.directory.name, 'data.json.lock'))
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_version_counter(self):
+        """Test that the version starts at 0 and is shared through the lock file."""
+        self.assertEqual(self.lock.version(), 0)
+        with self.lock:
+            self.assertEqual(self.lock.bump(), 1)
+            self.assertEqual(self.lock.bump(), 2)
+        self.assertEqual(VersionLock(self.lock.path).version(), 2)
+
+    def test_reentrant(self):
+        """Test that the lock can be taken again by the thread holding it."""
+        with self.lock:
+            with self.lock:
+                self.lock.bump()
+            self.lock.bump()
+        self.assertEqual(self.lock.version(), 2)
+
+
+@unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(),
+                     "requires the fork start method")
+class TestConcurrentReservations(unittest.TestCase):
+    """Several processes booking the same room must neither double-book nor lose bookings."""
+
+    def setUp(self):
+        """Create a temporary directory for the store."""
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Close the SQLite connections and remove the temporary directory."""
+        close_connections()
+        self.directory.cleanup()
+
+    def stored(self, backend):
+        """Return the reservations read back by a new store."""
+        return Store.open(self.directory.name, backend).reservations.load()
+
+    def run_workers(self, backend):
+        """Run the workers against a store and check the stored reservations."""
+        with use(Store.open(self.directory.name, backend)):
+            # Forked workers inherit the current store.
+            with multiprocessing.get_context('fork').Pool(WORKERS) as pool:
+                booked = pool.map(book_every_day, range(WORKERS))
+
+        stored = self.stored(backend)
+        self.assertEqual(sum(booked), DAYS)
+        self.assertEqual(len(stored), DAYS)
+        self.assertEqual(len({r['start_date'] for r in stored}), DAYS)
+
+    def test_json_backend(self):
+        """Test concurrent bookings on the JSON file backend."""
+        self.run_workers('json')
+
+    def test_journal_backend(self):
+        """Test concurrent bookings on the journal backend."""
+        self.run_workers('journal')
+
+    def test_sqlite_backend(self):
+        """Test concurrent bookings on the SQLite backend."""
+        self.run_workers('sqlite')
+
+    def test_threads(self):
+        """Test concurrent bookings from threads sharing one repository, on each backend."""
+        for backend in ('json', 'sqlite'):
+            store = Store.open(os.path.join(self.directory.name, backend), backend)
+            with ThreadPoolExecutor(WORKERS) as executor:
+                booked = list(executor.map(partial(book_every_day_in, store), range(WORKERS)))
+
+            stored = store.reservations.storage.load()
+            self.assertEqual(sum(booked), DAYS)
+            self.assertEqual(len(stored), DAYS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+This module contains unit tests for the OccupancyMatrix class.
+It tests occupancy rates, revenue and free-room queries, and incremental updates
+when reservations are created or canceled. The tests are skipped without numpy.
+"""
+
+import tempfile
+import unittest
+from hotel import Hotel
+from reservation import Reservation
+from store import Store, activate, deactivate
+
+try:
+    import numpy as np
+    from occupancy import OccupancyMatrix, build_occupancy
+except ImportError:
+    np = None
+
+HOTELS = [
+    {'hotel_id': "001", 'name': "A", 'location': "X", 'amenities': [],
+     'rooms': [{"room_id": "101", "type": "Single", "price": 100},
+               {"room_id": "102", "type": "Double", "price": 200}]},
+    {'hotel_id': "002", 'name': "B", 'location': "Y", 'amenities': [],
+     'rooms': [{"room_id": "201", "type": "Single", "price": 50}]},
+]
+
+
+def reservation(reservation_id, hotel_id, room_id, start_date, end_date):
+    """Build a reservation record for the tests."""
+    return {'reservation_id': reservation_id, 'customer_id': "C001", 'hotel_id': hotel_id,
+            'room_id': room_id, 'start_date': start_date, 'end_date': end_date}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestOccupancyMatrix(unittest.TestCase):
+    """Tests for the OccupancyMatrix class."""
+
+    def setUp(self):
+        """Build a four night window with two reservations, one starting before it."""
+        self.matrix = OccupancyMatrix(HOTELS, [
+            reservation("R1", "001", "101", "2023-12-30", "2024-01-02"),
+            reservation("R2", "002", "201", "2024-01-03", "2024-01-03"),
+        ], "2024-01-01", "2024-01-04")
+
+    def test_occupancy_rates(self):
+        """Test occupancy by night, by hotel and by room type."""
+        np.testing.assert_allclose(self.matrix.occupancy_by_night(), [1 / 3, 1 / 3, 1 / 3, 0])
+        hotels, rates = self.matrix.occupancy_by_hotel()
+        self.assertEqual(list(hotels), ["001", "002"])
+        np.testing.assert_allclose(rates, [2 / 8, 1 / 4])
+        types, rates = self.matrix.occupancy_by_type(per_night=True)
+        self.assertEqual(list(types), ["Double", "Single"])
+        np.testing.assert_allclose(rates, [[0, 0, 0, 0], [0.5, 0.5, 0.5, 0]])
+
+    def test_revenue(self):
+        """Test revenue from room prices."""
+        np.testing.assert_allclose(self.matrix.revenue_by_night(), [100, 100, 50, 0])
+        hotels, revenue = self.matrix.revenue_by_hotel()
+        np.testing.assert_allclose(revenue, [200, 50])
+        self.assertEqual(list(hotels), ["001", "002"])
+
+    def test_free_rooms(self):
+        """Test the free-room query."""
+        hotel_ids, room_ids = self.matrix.free_rooms("2024-01-02", "2024-01-03")
+        self.assertEqual(list(zip(hotel_ids, room_ids)), [("001", "102")])
+        self.assertEqual(len(self.matrix.free_rooms("2024-01-04", "2024-01-04")[0]), 3)
+
+    def test_incremental_updates(self):
+        """Test that adding and removing a reservation updates the counts."""
+        extra = reservation("R3", "001", "102", "2024-01-04", "2024-01-09")
+        self.matrix('created', extra)
+        self.assertEqual(self.matrix.counts[1].tolist(), [0, 0, 0, 1])
+        self.matrix('canceled', extra)
+        self.assertEqual(int(self.matrix.counts.sum()), 3)
+        self.assertEqual(self.matrix.dates()[0], "2024-01-01")
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBuildOccupancy(unittest.TestCase):
+    """Tests that a matrix built from storage follows reservations made afterwards."""
+
+    def setUp(self):
+        """Store the test hotels and no reservations in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
+        Hotel.save_hotels([dict(hotel) for hotel in HOTELS])
+        self.matrix = build_occupancy("2024-01-01", "2024-01-04")
+
+    def tearDown(self):
+        """Stop tracking reservation changes."""
+        Reservation.unsubscribe(self.matrix)
+
+    def test_tracks_reserve_and_cancel(self):
+        """Test reserve_room and cancel_reservation updating the matrix."""
+        Hotel.reserve_room("002", "C001", "201", "2024-01-01", "2024-01-02")
+        np.testing.assert_allclose(self.matrix.revenue_by_night(), [50, 50, 0, 0])
+
+        reservation_id = Reservation.load_reservations()[0]['reservation_id']
+        Hotel.cancel_reservation(reservation_id)
+        self.assertEqual(int(self.matrix.counts.sum()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
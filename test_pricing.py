@@ -0,0 +1,90 @@
+"""
+This module contains unit tests for the PriceQuoter class.
+It tests nightly rates under seasonal and weekday rules, sums over stays spanning years,
+the LRU cache of quotes, invalidation by hotel, and malformed rules.
+"""
+
+import unittest
+from dates import parse_date
+from pricing import PriceQuoter, nightly_rates
+
+ROOM = {'room_id': "101", 'type': "Double", 'price': 100}
+
+
+def hotel(rules=None):
+    """Build a hotel record with rate rules for the tests."""
+    return {'hotel_id': "H001", 'rooms': [ROOM], 'rate_rules': rules}
+
+
+def quote(quoter, record, start_date, end_date, room=None):
+    """Quote a stay given as ISO dates, in ROOM unless another room is given."""
+    return quoter.quote(record, room or ROOM, parse_date(start_date), parse_date(end_date))
+
+
+class TestPriceQuoter(unittest.TestCase):
+    """Tests for the PriceQuoter class and nightly_rates."""
+
+    def test_nightly_rates(self):
+        """Test that matching rules apply in order and other room types are left alone."""
+        rules = [
+            {'start_date': "2024-07-01", 'end_date': "2024-08-31", 'multiplier': 1.5},
+            {'room_type': "Double", 'weekdays': [5, 6], 'price': 90},
+            {'room_type': "Single", 'price': 10},
+        ]
+        rates = nightly_rates(ROOM, rules, 2024)
+        self.assertEqual(len(rates), 366)
+        # 2024-01-01 was a Monday; 2024-07-01 is day 182, 2024-07-06 a Saturday.
+        self.assertEqual(rates[:7], [100, 100, 100, 100, 100, 90, 90])
+        self.assertEqual(rates[182:189], [150, 150, 150, 150, 150, 90, 90])
+        self.assertEqual(nightly_rates(ROOM, None, 2023), [100] * 365)
+
+    def test_recurring_seasons(self):
+        """Test MM-DD seasons in every year, including ones wrapping around the new year."""
+        quoter = PriceQuoter()
+        record = hotel([{'start_date': "12-31", 'end_date': "01-01", 'price': 200}])
+        self.assertEqual(quote(quoter, record, "2023-12-30", "2024-01-02"), 600)
+        self.assertEqual(quote(quoter, record, "2030-12-31", "2030-12-31"), 200)
+        # February 29 stands for February 28 in other years.
+        quoter = PriceQuoter()
+        leap = hotel([{'start_date': "02-29", 'end_date': "03-01", 'price': 0}])
+        self.assertEqual(quote(quoter, leap, "2023-02-27", "2023-03-02"), 200)
+        self.assertEqual(quote(quoter, leap, "2024-02-28", "2024-03-02"), 200)
+
+    def test_long_stays_and_cache(self):
+        """Test totals over several years and that repeated quotes come from the cache."""
+        quoter = PriceQuoter(max_quotes=2)
+        record = hotel([{'weekdays': [0], 'price': 99.99}])
+        total = quote(quoter, record, "2023-01-01", "2025-12-31")
+        # 157 Mondays in those 1096 nights.
+        self.assertEqual(total, round(939 * 100 + 157 * 99.99, 2))
+        quote(quoter, record, "2024-01-01", "2024-01-01")
+        quote(quoter, record, "2023-01-01", "2025-12-31")
+        quote(quoter, record, "2024-05-01", "2024-05-01")
+        self.assertEqual(len(quoter), 2)
+        # pylint: disable=protected-access
+        self.assertEqual([key[3:] for key in quoter._quotes],
+                         [(parse_date("2023-01-01"), parse_date("2025-12-31")),
+                          (parse_date("2024-05-01"),) * 2])
+
+    def test_invalidate(self):
+        """Test that invalidating a hotel recomputes its rates."""
+        quoter = PriceQuoter()
+        self.assertEqual(quote(quoter, hotel(), "2024-01-01", "2024-01-02"), 200)
+        cheaper = dict(ROOM, price=50)
+        self.assertEqual(quote(quoter, hotel(), "2024-01-01", "2024-01-02", cheaper), 200)
+        quoter.invalidate("H001")
+        self.assertEqual(quote(quoter, hotel(), "2024-01-01", "2024-01-02", cheaper), 100)
+
+    def test_invalid(self):
+        """Test that rooms without a price and malformed rules raise ValueError."""
+        for rules in ([{'price': 1, 'multiplier': 2}], [{}], [{'price': "1"}],
+                      [{'price': 1, 'weekdays': [7]}], [{'price': 1, 'start_date': "13-01"}],
+                      [{'price': 1, 'nights': 2}], ["cheap"]):
+            with self.subTest(rules=rules), self.assertRaises(ValueError):
+                quote(PriceQuoter(), hotel(rules), "2024-01-01", "2024-01-01")
+        with self.assertRaises(ValueError):
+            quote(PriceQuoter(), hotel(), "2024-01-01", "2024-01-01", dict(ROOM, price=None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+This module contains unit tests for the slotted record types.
+It tests conversion to and from dictionaries, the mapping interface used by the rest of
+the code, and repositories that hold records while writing plain JSON.
+"""
+
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from records import (CustomerRecord, HotelRecord, ReservationRecord, Room,
+                     json_default)
+from repository import Repository
+from storage import JsonFileStorage, read_json
+
+HOTEL = {
+    'hotel_id': "001",
+    'name': "Harbor",
+    'location': "Lisbon",
+    'rooms': [{'room_id': "101", 'type': "Single", 'price': 80}],
+    'amenities': ["WiFi"]
+}
+
+
+class TestRecords(unittest.TestCase):
+    """Tests for the record types."""
+
+    def test_round_trip(self):
+        """Test that dictionaries convert to records and back unchanged."""
+        hotel = HotelRecord.from_dict(HOTEL)
+        self.assertIsInstance(hotel.rooms[0], Room)
+        self.assertEqual(hotel.to_dict(), HOTEL)
+        self.assertEqual(list(hotel.to_dict()), list(HOTEL))
+        self.assertFalse(hasattr(hotel, '__dict__'))
+        self.assertIs(HotelRecord.from_dict(hotel), hotel)
+
+    def test_missing_and_extra_fields(self):
+        """Test that absent fields stay absent and unknown fields are kept."""
+        customer = CustomerRecord.from_dict({'customer_id': "C1", 'name': "Ana", 'vip': True})
+        self.assertNotIn('email', customer)
+        self.assertIsNone(customer.get('email'))
+        with self.assertRaises(KeyError):
+            customer['email']  # pylint: disable=pointless-statement
+        self.assertEqual(customer['vip'], True)
+        self.assertEqual(len(customer), 3)
+        self.assertEqual(customer.to_dict(), {'customer_id': "C1", 'name': "Ana", 'vip': True})
+
+    def test_mapping_interface(self):
+        """Test item access, update, deletion and comparison with dictionaries."""
+        hotel = HotelRecord.from_dict(HOTEL)
+        hotel.update({'name': "Pier", 'stars': 4,
+                      'rooms': [{'room_id': "102", 'type': "Double", 'price': 120}]})
+        self.assertEqual(hotel.name, "Pier")
+        self.assertIsInstance(hotel['rooms'][0], Room)
+        self.assertEqual(hotel['rooms'][0]['price'], 120)
+        del hotel['stars']
+        del hotel['amenities']
+        self.assertEqual(dict(hotel), {'hotel_id': "001", 'name': "Pier", 'location': "Lisbon",
+                                       'rooms': [{'room_id': "102", 'type': "Double",
+                                                  'price': 120}]})
+        self.assertEqual(hotel, hotel.to_dict())
+        self.assertNotEqual(hotel, HOTEL)
+
+    def test_reservation_strings_are_shared(self):
+        """Test that repeated IDs and dates are stored once."""
+        first, second = (ReservationRecord.from_dict(json.loads(json.dumps({
+            'reservation_id': reservation_id, 'customer_id': "C001", 'hotel_id': "H001",
+            'room_id': "101", 'start_date': "2024-01-01", 'end_date': "2024-01-02"
+        }))) for reservation_id in ("R1", "R2"))
+        self.assertIs(first.hotel_id, second.hotel_id)
+        self.assertIs(first.start_date, second.start_date)
+
+    def test_json_and_pickle(self):
+        """Test serializing records with json and pickle."""
+        hotel = HotelRecord.from_dict(HOTEL)
+        self.assertEqual(json.loads(json.dumps(hotel, default=json_default)), HOTEL)
+        self.assertEqual(pickle.loads(pickle.dumps(hotel)), HOTEL)
+        with self.assertRaises(TypeError):
+            json.dumps(object(), default=json_default)
+
+
+class TestRecordRepository(unittest.TestCase):
+    """Tests for a repository holding records."""
+
+    def setUp(self):
+        """Create a repository in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'hotels.json')
+        self.repository = Repository(JsonFileStorage(self.path, 'hotel_id'), HotelRecord)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_records_are_cached_and_written_as_json(self):
+        """Test that the cache holds records and the file holds plain JSON."""
+        stored = self.repository.create(HOTEL)
+        self.assertIsInstance(stored, HotelRecord)
+        self.assertIs(self.repository.get("001"), stored)
+        self.repository.modify("001", {'name': "Pier"})
+        self.assertEqual(read_json(self.path), [dict(HOTEL, name="Pier")])
+
+        fresh = Repository(JsonFileStorage(self.path, 'hotel_id'), HotelRecord)
+        self.assertIsInstance(fresh.load()[0], HotelRecord)
+        self.assertEqual(fresh.load(), [dict(HOTEL, name="Pier")])
+
+
+if __name__ == '__main__':
+    unittest.main()
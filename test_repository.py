@@ -0,0 +1,120 @@
+"""
+This module contains unit tests for the Repository class.
+It tests cache hits and misses, invalidation when the file changes on disk,
+write-through of mutations, and that booking a room is served from memory.
+"""
+
+import os
+import tempfile
+import unittest
+from hotel import Hotel
+from repository import Repository
+from reservation import Reservation
+from sqlite_storage import close_connections
+from storage import JsonFileStorage, JournalStorage, write_json
+from store import BACKENDS, Store, activate, deactivate
+
+
+class TestRepository(unittest.TestCase):
+    """Tests for the Repository class."""
+
+    def setUp(self):
+        """Create a repository over a JSON file in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'customers.json')
+        write_json(self.path, [{'customer_id': "C001", 'name': "John Doe"}])
+        self.repository = Repository(JsonFileStorage(self.path, 'customer_id'))
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_repeated_loads_hit_the_cache(self):
+        """Test that only the first load parses the file."""
+        for _ in range(3):
+            self.assertEqual(self.repository.get("C001")['name'], "John Doe")
+        self.assertEqual(self.repository.stats(), {'hits': 2, 'misses': 1, 'generation': 1})
+
+    def test_external_change_invalidates_cache(self):
+        """Test that a file rewritten behind the repository's back is reloaded."""
+        self.repository.load()
+        write_json(self.path, [{'customer_id': "C002", 'name': "Jane Doe Smith"}])
+
+        self.assertIsNone(self.repository.get("C001"))
+        self.assertEqual(self.repository.get("C002")['name'], "Jane Doe Smith")
+        self.assertEqual(self.repository.misses, 2)
+
+    def test_write_through_keeps_cache_valid(self):
+        """Test that mutations update both the file and the cache."""
+        self.repository.create({'customer_id': "C002", 'name': "Jane Doe"})
+        self.repository.modify("C001", {'name': "John Smith"})
+        self.repository.delete("C002")
+
+        self.assertEqual(self.repository.load(), [{'customer_id': "C001", 'name': "John Smith"}])
+        self.assertEqual(self.repository.misses, 1)
+        fresh = Repository(JsonFileStorage(self.path, 'customer_id'))
+        self.assertEqual(fresh.load(), [{'customer_id': "C001", 'name': "John Smith"}])
+
+    def test_explicit_invalidation(self):
+        """Test that invalidate() forces the next access to reload."""
+        self.repository.load()
+        self.repository.invalidate()
+        self.repository.load()
+        self.assertEqual(self.repository.misses, 2)
+
+    def test_journal_backend(self):
+        """Test the repository on top of the journal backend."""
+        path = os.path.join(self.directory.name, 'reservations.json')
+        repository = Repository(JournalStorage(path, 'reservation_id'))
+        repository.create({'reservation_id': "R1", 'room_id': "101"})
+        repository.modify("R1", {'room_id': "102"})
+
+        self.assertEqual(repository.get("R1")['room_id'], "102")
+        self.assertEqual(repository.misses, 1)
+        fresh = Repository(JournalStorage(path, 'reservation_id'))
+        self.assertEqual(fresh.get("R1")['room_id'], "102")
+
+    def test_delete_many(self):
+        """Test removing several records at once on every backend, cached or not."""
+        self.addCleanup(close_connections)
+        for backend in BACKENDS:
+            for cached in (False, True):
+                with self.subTest(backend=backend, cached=cached):
+                    directory = os.path.join(self.directory.name, f'{backend}-{cached}')
+                    repository = Store.open(directory, backend).customers
+                    repository.create_many([{'customer_id': f"C{number}", 'name': "Doe"}
+                                            for number in range(4)])
+                    if cached:
+                        repository.load()
+
+                    removed = repository.delete_many(["C1", "C3", "C9"])
+
+                    self.assertEqual([r['customer_id'] for r in removed], ["C1", "C3"])
+                    self.assertEqual([r['customer_id'] for r in repository.load()],
+                                     ["C0", "C2"])
+                    self.assertEqual(len(Store.open(directory, backend).customers.load()), 2)
+                    self.assertEqual(repository.delete_many(["C1"]), [])
+
+
+class TestBookingCache(unittest.TestCase):
+    """Tests that the booking path is served by the repositories."""
+
+    def setUp(self):
+        """Use an empty store in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
+
+    def test_reserve_room_does_not_reload(self):
+        """Test that reserving rooms does not re-read reservations.json."""
+        Hotel.reserve_room("005", "C001", "101", "2024-01-01", "2024-01-07")
+        misses = Reservation.repository.misses
+
+        Hotel.reserve_room("005", "C002", "101", "2024-02-01", "2024-02-07")
+        Hotel.reserve_room("005", "C003", "101", "2024-02-03", "2024-02-04")
+
+        self.assertEqual(Reservation.repository.misses, misses)
+        self.assertEqual(len(Reservation.load_reservations()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
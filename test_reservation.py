@@ -4,8 +4,10 @@ It tests the functionality of reservation creation, cancellation,
 and validation of reservation properties.
 """
 
+import tempfile
 import unittest
 from reservation import Reservation
+from store import Store, activate, deactivate
 
 class TestReservation(unittest.TestCase):
     """Tests for the Reservation class."""
@@ -13,9 +15,11 @@ class TestReservation(unittest.TestCase):
     def setUp(self):
         """
         Prepare environment for each test.
-        Ensure the reservation list is empty before each test.
+        Use an empty store in a temporary directory for each test.
         """
-        Reservation.save_reservations([])
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
 
     def test_create_reservation(self):
         """
@@ -85,6 +89,29 @@ class TestReservation(unittest.TestCase):
 
         self.assertIsNone(found_reservation_after, "Reservation should be removed from the list after cancellation")
 
+    def test_find_and_cancel_reservations(self):
+        """
+        Test listing reservations by hotel and customer, and canceling several at once.
+        """
+        for number, (hotel_id, customer_id) in enumerate(
+                [("H001", "C001"), ("H001", "C002"), ("H002", "C001")]):
+            Reservation({'reservation_id': f"R{number}", 'customer_id': customer_id,
+                         'hotel_id': hotel_id, 'room_id': f"10{number}",
+                         'start_date': "2024-03-01", 'end_date': "2024-03-02"}).create_reservation()
+        canceled = []
+        Reservation.subscribe(lambda event, reservation: canceled.append(reservation))
+
+        self.assertEqual([r['reservation_id'] for r in Reservation.find_by_hotel("H001")],
+                         ["R0", "R1"])
+        self.assertEqual([r['reservation_id'] for r in Reservation.find_by_customer("C001")],
+                         ["R0", "R2"])
+        removed = Reservation.cancel_reservations(["R0", "R2", "R9"])
+
+        self.assertEqual([r['reservation_id'] for r in removed], ["R0", "R2"])
+        self.assertEqual(canceled, removed)
+        self.assertEqual(Reservation.find_by_customer("C001"), [])
+        self.assertEqual([r['reservation_id'] for r in Reservation.load_reservations()], ["R1"])
+
 if __name__ == '__main__':
     unittest.main()
     
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+This module contains unit tests for the room availability search.
+It tests filtering by location, room type and price, excluding booked rooms,
+and that the search reflects changes to hotels and reservations.
+"""
+
+import tempfile
+import unittest
+from hotel import Hotel
+from room_search import RoomSearchIndex
+from store import Store, activate, deactivate
+
+
+class TestFindAvailableRooms(unittest.TestCase):
+    """Tests for Hotel.find_available_rooms."""
+
+    def setUp(self):
+        """Create two hotels in Monterrey and one elsewhere."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(deactivate, activate(Store.open(self.directory.name)))
+        Hotel({'hotel_id': "101", 'name': "Centro", 'location': "Monterrey",
+               'rooms': [{"room_id": "1", "type": "Single", "price": 100},
+                         {"room_id": "2", "type": "Double", "price": 180},
+                         {"room_id": "3", "type": "Single", "price": 90}],
+               'amenities': []}).create_hotel()
+        Hotel({'hotel_id': "102", 'name': "Valle", 'location': "monterrey ",
+               'rooms': [{"room_id": "1", "type": "Single", "price": 150}],
+               'amenities': []}).create_hotel()
+        Hotel({'hotel_id': "103", 'name': "Playa", 'location': "Cancun",
+               'rooms': [{"room_id": "1", "type": "Single", "price": 50}],
+               'amenities': []}).create_hotel()
+
+    @staticmethod
+    def rooms(results):
+        """Return (hotel_id, room_id) pairs of search results."""
+        return [(room['hotel_id'], room['room_id']) for room in results]
+
+    def test_location_search_ordered_by_price(self):
+        """Test that every room of the location is returned, cheapest first."""
+        results = Hotel.find_available_rooms("Monterrey", "2024-01-01", "2024-01-03")
+        self.assertEqual(self.rooms(results),
+                         [("101", "3"), ("101", "1"), ("102", "1"), ("101", "2")])
+
+    def test_type_and_price_filters(self):
+        """Test the room type and maximum price filters."""
+        results = Hotel.find_available_rooms("Monterrey", "2024-01-01", "2024-01-03",
+                                             room_type="Single", max_price=120)
+        self.assertEqual(self.rooms(results), [("101", "3"), ("101", "1")])
+        self.assertEqual(Hotel.find_available_rooms("Monterrey", "2024-01-01", "2024-01-03",
+                                                    room_type="Suite"), [])
+        self.assertEqual(Hotel.find_available_rooms("Lima", "2024-01-01", "2024-01-03"), [])
+
+    def test_booked_rooms_are_excluded(self):
+        """Test that rooms with an overlapping reservation are not returned."""
+        Hotel.reserve_room("101", "C001", "3", "2024-01-02", "2024-01-05")
+
+        results = Hotel.find_available_rooms("Monterrey", "2024-01-01", "2024-01-03",
+                                             room_type="Single")
+        self.assertEqual(self.rooms(results), [("101", "1"), ("102", "1")])
+        results = Hotel.find_available_rooms("Monterrey", "2024-01-06", "2024-01-08",
+                                             room_type="Single")
+        self.assertIn(("101", "3"), self.rooms(results))
+
+    def test_search_follows_hotel_changes(self):
+        """Test that new and modified hotels are reflected in the search."""
+        Hotel.find_available_rooms("Cancun", "2024-01-01", "2024-01-03")
+        Hotel.modify_hotel_info("103", rooms=[{"room_id": "1", "type": "Single", "price": 70},
+                                              {"room_id": "2", "type": "Suite", "price": 400}])
+
+        results = Hotel.find_available_rooms("Cancun", "2024-01-01", "2024-01-03")
+        self.assertEqual([room['price'] for room in results], [70, 400])
+
+    def test_hotel_writes_update_the_index_in_place(self):
+        """Test that creating, modifying and deleting hotels does not rebuild the index."""
+        index = Hotel.room_search_index()
+        Hotel({'hotel_id': "104", 'name': "Sur", 'location': "Monterrey",
+               'rooms': [{"room_id": "1", "type": "Single", "price": 95}],
+               'amenities': []}).create_hotel()
+        Hotel.modify_hotel_info("101", name="Centro Histórico")
+        Hotel.modify_hotel_info("102", location="Cancun")
+        Hotel.delete_hotel("103")
+
+        self.assertIs(Hotel.room_search_index(), index)
+        results = Hotel.find_available_rooms("Monterrey", "2024-01-01", "2024-01-03",
+                                             room_type="Single")
+        self.assertEqual(self.rooms(results), [("101", "3"), ("104", "1"), ("101", "1")])
+        results = Hotel.find_available_rooms("Cancun", "2024-01-01", "2024-01-03")
+        self.assertEqual(self.rooms(results), [("102", "1")])
+
+
+class TestRoomSearchIndex(unittest.TestCase):
+    """Tests for building and updating the RoomSearchIndex."""
+
+    def test_build_matches_incremental_adds(self):
+        """Test that a bulk build and one-by-one adds order rooms the same way."""
+        hotels = [{'hotel_id': f"H{number}", 'location': "Lima",
+                   'rooms': [{"room_id": str(room), "type": "Single", "price": price}
+                             for room, price in enumerate((number % 7, 3, None))]}
+                  for number in range(50)]
+        built = RoomSearchIndex(hotels)
+        added = RoomSearchIndex()
+        for hotel in hotels:
+            added.add_hotel(hotel)
+
+        expected = [(price, hotel_id) for price, hotel_id, _ in added.candidates("lima")]
+        self.assertEqual([(price, hotel_id) for price, hotel_id, _ in built.candidates("lima")],
+                         expected)
+        self.assertEqual(len(expected), 150)
+
+    def test_remove_hotel(self):
+        """Test that removing hotels drops their rooms and empty groups."""
+        index = RoomSearchIndex([
+            {'hotel_id': "A", 'location': "Lima", 'rooms': [{"room_id": "1", "price": 10}]},
+            {'hotel_id': "B", 'location': "Lima", 'rooms': [{"room_id": "1", "price": 10}]},
+        ])
+        index.remove_hotel("A")
+        self.assertEqual([hotel_id for _, hotel_id, _ in index.candidates("Lima")], ["B"])
+        index.remove_hotel("B")
+        index.remove_hotel("missing")
+        self.assertEqual(list(index.candidates("Lima")), [])
+
+    def test_add_and_remove_room(self):
+        """Test that single rooms are indexed by ID and found by the search in price order."""
+        index = RoomSearchIndex([
+            {'hotel_id': "A", 'location': "Lima", 'rooms': [{"room_id": "1", "price": 10}]},
+        ])
+        index.add_room("A", "Lima", {"room_id": "2", "price": 5})
+        self.assertEqual(index.room("A", "2")['price'], 5)
+        self.assertEqual([room['room_id'] for _, _, room in index.candidates("Lima")],
+                         ["2", "1"])
+
+        index.remove_room("A", "2")
+        index.remove_room("A", "9")
+        self.assertIsNone(index.room("A", "2"))
+        self.assertEqual([room['room_id'] for _, _, room in index.candidates("Lima")], ["1"])
+        index.remove_hotel("A")
+        self.assertIsNone(index.room("A", "1"))
+
+if __name__ == '__main__':
+    unittest.main()
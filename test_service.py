@@ -0,0 +1,248 @@
+"""
+This module contains unit tests for the asyncio booking service.
+It tests the hotel, customer, reservation and availability endpoints over real
+connections, keep-alive, error statuses, and concurrent bookings of the same room.
+"""
+
+import asyncio
+import json
+import tempfile
+import unittest
+from repository import Repository
+from service import BookingService
+from storage import JsonFileStorage
+from store import Store
+
+HOTEL = {
+    'hotel_id': "H001",
+    'name': "Harbor",
+    'location': "Lisbon",
+    'rooms': [{"room_id": "101", "type": "Single", "price": 80},
+              {"room_id": "102", "type": "Double", "price": 120}],
+    'amenities': ["WiFi"]
+}
+
+
+def booking(room_id, start_date, end_date, customer_id="C001"):
+    """Build a POST /reservations body."""
+    return {'hotel_id': "H001", 'customer_id': customer_id, 'room_id': room_id,
+            'start_date': start_date, 'end_date': end_date}
+
+
+class TestBookingService(unittest.IsolatedAsyncioTestCase):
+    """Tests for the BookingService class."""
+
+    async def asyncSetUp(self):
+        """Start the service on a store in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = Store.open(self.directory.name)
+        self.service = BookingService(max_workers=4, store=self.store)
+        await self.service.start('127.0.0.1', 0)
+
+    async def asyncTearDown(self):
+        """Stop the service and remove the temporary directory."""
+        await self.service.close()
+        self.directory.cleanup()
+
+    async def send(self, reader, writer, method, path, body=None, close=False):
+        """Send one request on an open connection and return (status, payload)."""
+        content = b'' if body is None else json.dumps(body).encode('utf-8')
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"{'Connection: close' + chr(13) + chr(10) if close else ''}\r\n"
+            .encode('latin-1') + content
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        payload = json.loads(await reader.readexactly(int(headers['content-length'])))
+        return status, payload
+
+    async def request(self, method, path, body=None):
+        """Send a request on a new connection and return (status, payload)."""
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.service.port)
+        try:
+            return await self.send(reader, writer, method, path, body, close=True)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def test_hotel_and_customer_endpoints(self):
+        """Test creating, reading, modifying and deleting hotels and customers."""
+        self.assertEqual((await self.request('POST', '/hotels', HOTEL))[0], 201)
+        status, hotel = await self.request('GET', '/hotels/H001')
+        self.assertEqual((status, hotel['name']), (200, "Harbor"))
+        status, result = await self.request('PATCH', '/hotels/H001', {'name': "Pier"})
+        self.assertEqual((status, result['record']['name']), (200, "Pier"))
+        self.assertEqual(len((await self.request('GET', '/hotels'))[1]), 1)
+        self.assertEqual((await self.request('DELETE', '/hotels/H001'))[0], 200)
+        self.assertEqual((await self.request('GET', '/hotels/H001'))[0], 404)
+        self.assertEqual((await self.request('DELETE', '/hotels/H001'))[0], 404)
+
+        customer = {'customer_id': "C001", 'name': "Ana", 'email': "a@x.com", 'phone': "1"}
+        self.assertEqual((await self.request('POST', '/customers', customer))[0], 201)
+        self.assertEqual((await self.request('POST', '/customers', customer))[0], 409)
+        status, result = await self.request('PATCH', '/customers/C001', {'phone': "2"})
+        self.assertEqual((status, result['record']['phone']), (200, "2"))
+        self.assertEqual((await self.request('GET', '/customers/C001'))[1]['phone'], "2")
+        self.assertEqual((await self.request('DELETE', '/customers/C001'))[0], 200)
+
+    async def test_reservation_and_availability_endpoints(self):
+        """Test booking, listing, availability search and cancellation."""
+        await self.request('POST', '/hotels', HOTEL)
+        status, result = await self.request(
+            'POST', '/reservations', booking("101", "2024-01-01", "2024-01-05"))
+        self.assertEqual(status, 201)
+        reservation_id = result['record']['reservation_id']
+
+        status, result = await self.request(
+            'POST', '/reservations', booking("101", "2024-01-05", "2024-01-06"))
+        self.assertEqual(status, 409)
+        self.assertEqual(result['conflicts'][0]['reservation_id'], reservation_id)
+
+        status, rooms = await self.request(
+            'GET', '/availability?location=lisbon&start_date=2024-01-02&end_date=2024-01-03')
+        self.assertEqual((status, [room['room_id'] for room in rooms]), (200, ["102"]))
+        status, listed = await self.request(
+            'GET', '/reservations?hotel_id=H001&start_date=2024-01-04&end_date=2024-01-09')
+        self.assertEqual([r['reservation_id'] for r in listed], [reservation_id])
+        self.assertEqual((await self.request('GET', f'/reservations/{reservation_id}'))[0], 200)
+
+        self.assertEqual((await self.request('DELETE', f'/reservations/{reservation_id}'))[0],
+                         200)
+        self.assertEqual((await self.request('GET', '/reservations'))[1], [])
+
+    async def test_hold_endpoints(self):
+        """Test holding a room, the conflicts it causes, confirming and releasing holds."""
+        await self.request('POST', '/hotels', HOTEL)
+        status, result = await self.request(
+            'POST', '/holds', dict(booking("101", "2024-01-01", "2024-01-05"), ttl=60))
+        self.assertEqual(status, 201)
+        hold_id = result['record']['hold_id']
+        status, result = await self.request(
+            'POST', '/reservations', booking("101", "2024-01-02", "2024-01-03", "C002"))
+        self.assertEqual((status, result['conflicts'][0]['hold']), (409, True))
+        self.assertEqual((await self.request(
+            'POST', '/holds', dict(booking("102", "2024-01-01", "2024-01-05"), ttl=0)))[0], 400)
+
+        status, result = await self.request('POST', f'/holds/{hold_id}/confirm')
+        self.assertEqual((status, result['record']['customer_id']), (201, "C001"))
+        self.assertEqual((await self.request('POST', f'/holds/{hold_id}/confirm'))[0], 404)
+        status, result = await self.request(
+            'POST', '/holds', booking("102", "2024-01-01", "2024-01-05"))
+        self.assertEqual((await self.request('DELETE', f"/holds/{result['record']['hold_id']}"))[0],
+                         200)
+        self.assertEqual((await self.request('DELETE', f"/holds/{hold_id}"))[0], 404)
+
+    async def test_cascading_deletes_and_customer_filter(self):
+        """Test ?customer_id= listing and that deletes with reservations need ?cascade=true."""
+        await self.request('POST', '/hotels', HOTEL)
+        customer = {'customer_id': "C001", 'name': "Ana", 'email': "a@x.com", 'phone': "1"}
+        await self.request('POST', '/customers', customer)
+        await self.request('POST', '/reservations', booking("101", "2024-01-01", "2024-01-02"))
+        await self.request('POST', '/reservations',
+                           booking("102", "2024-01-01", "2024-01-02", "C002"))
+
+        status, listed = await self.request('GET', '/reservations?customer_id=C002')
+        self.assertEqual((status, [r['room_id'] for r in listed]), (200, ["102"]))
+        status, listed = await self.request(
+            'GET', '/reservations?customer_id=C001&start_date=2024-02-01&end_date=2024-02-02')
+        self.assertEqual((status, listed), (200, []))
+
+        status, result = await self.request('DELETE', '/customers/C001')
+        self.assertEqual((status, len(result['conflicts'])), (409, 1))
+        self.assertEqual((await self.request('DELETE', '/customers/C001?cascade=true'))[0], 200)
+        self.assertEqual((await self.request('DELETE', '/hotels/H001'))[0], 409)
+        self.assertEqual((await self.request('DELETE', '/hotels/H001?cascade=1'))[0], 200)
+        self.assertEqual((await self.request('GET', '/reservations'))[1], [])
+
+    async def test_customer_lookups(self):
+        """Test finding customers by email, phone and name prefix."""
+        for customer_id, name, email in (("C001", "Ana Reis", "ana@x.com"),
+                                         ("C002", "Andre Lopes", "andre@x.com")):
+            await self.request('POST', '/customers', {'customer_id': customer_id, 'name': name,
+                                                      'email': email, 'phone': "555"})
+
+        status, found = await self.request('GET', '/customers?email=ANA%40x.com')
+        self.assertEqual((status, [c['customer_id'] for c in found]), (200, ["C001"]))
+        status, found = await self.request('GET', '/customers?phone=5-5-5')
+        self.assertEqual(len(found), 2)
+        status, found = await self.request('GET', '/customers?name=an&limit=1')
+        self.assertEqual([c['name'] for c in found], ["Ana Reis"])
+
+    async def test_quote(self):
+        """Test quoting a stay after the hotel's rate rules changed."""
+        await self.request('POST', '/hotels', HOTEL)
+        path = '/hotels/H001/rooms/101/quote?start_date=2024-01-01&end_date=2024-01-03'
+        status, result = await self.request('GET', path)
+        self.assertEqual((status, result['record']['total']), (200, 240))
+        await self.request('PATCH', '/hotels/H001', {'rate_rules': [{'price': 50}]})
+        self.assertEqual((await self.request('GET', path))[1]['record']['total'], 150)
+        self.assertEqual((await self.request('GET', path.replace('101', '999')))[0], 404)
+        self.assertEqual((await self.request('GET', path.split('&')[0]))[0], 400)
+        await self.request('PATCH', '/hotels/H001', {'rate_rules': [{'price': "free"}]})
+        self.assertEqual((await self.request('GET', path))[0], 400)
+
+    async def test_errors(self):
+        """Test unknown routes, wrong methods, missing fields and invalid dates."""
+        self.assertEqual((await self.request('GET', '/nowhere'))[0], 404)
+        self.assertEqual((await self.request('PUT', '/hotels'))[0], 405)
+        self.assertEqual((await self.request('POST', '/reservations', {'hotel_id': "H001"}))[0],
+                         400)
+        status, payload = await self.request(
+            'GET', '/availability?location=x&start_date=2024-02-01&end_date=2024-01-01')
+        self.assertEqual(status, 400)
+        self.assertIn('error', payload)
+        status, _ = await self.request(
+            'POST', '/reservations', booking("101", "2024-13-01", "2024-13-02"))
+        self.assertEqual(status, 400)
+
+    async def test_invalid_bodies(self):
+        """Test that key changes and non-string reservation fields are rejected with 400."""
+        await self.request('POST', '/hotels', HOTEL)
+        status, payload = await self.request('PATCH', '/hotels/H001', {'hotel_id': "H002"})
+        self.assertEqual((status, payload['error']), (400, "Fields cannot be changed: hotel_id."))
+        self.assertEqual((await self.request('GET', '/hotels/H001'))[0], 200)
+        status, _ = await self.request('PATCH', '/customers/C001', {'customer_id': "C002"})
+        self.assertEqual(status, 400)
+
+        body = dict(booking("101", "2024-01-01", "2024-01-02"), hotel_id=["H001"])
+        responses = await asyncio.gather(
+            self.request('POST', '/reservations', body),
+            self.request('POST', '/reservations', booking("101", "2024-01-01", "2024-01-02")))
+        self.assertEqual([status for status, _ in responses], [400, 201])
+
+    async def test_keep_alive(self):
+        """Test that several requests can be sent on one connection."""
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.service.port)
+        try:
+            for _ in range(3):
+                self.assertEqual(await self.send(reader, writer, 'GET', '/hotels'), (200, []))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def test_concurrent_bookings_of_one_room(self):
+        """Test that concurrent requests for one room book it exactly once per period."""
+        requests = [booking("101", "2024-03-01", "2024-03-03", f"C{n}") for n in range(20)]
+        requests += [booking("102", f"2024-04-{day:02d}", f"2024-04-{day:02d}")
+                     for day in range(1, 21)]
+        responses = await asyncio.gather(
+            *(self.request('POST', '/reservations', body) for body in requests))
+        statuses = [status for status, _ in responses]
+        self.assertEqual(statuses[:20].count(201), 1)
+        self.assertEqual(statuses[:20].count(409), 19)
+        self.assertEqual(statuses[20:], [201] * 20)
+
+        path = self.store.reservations.storage.path
+        stored = Repository(JsonFileStorage(path, 'reservation_id')).load()
+        self.assertEqual(len(stored), 21)
+        self.assertEqual(len({r['reservation_id'] for r in stored}), 21)
+
+
+if __name__ == '__main__':
+    unittest.main()
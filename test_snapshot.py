@@ -0,0 +1,128 @@
+"""
+This module contains unit tests for the binary snapshot format.
+It tests writing and reading snapshots of reservations and hotels, lookups by key and
+by room, the JSON export and import tools, and the snapshot backend of a store.
+"""
+
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from hotel import Hotel
+from reservation import Reservation
+from snapshot import Snapshot, export_json, import_json, main, write_snapshot
+from storage import read_json, write_json
+from store import Store, use
+
+
+def reservation(reservation_id, room_id, start_date, end_date, hotel_id="H001"):
+    """Build a reservation record for the tests."""
+    return {'reservation_id': reservation_id, 'customer_id': "C001", 'hotel_id': hotel_id,
+            'room_id': room_id, 'start_date': start_date, 'end_date': end_date}
+
+
+class TestSnapshot(unittest.TestCase):
+    """Tests for write_snapshot and the Snapshot reader."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        """Return a path in the temporary directory."""
+        return os.path.join(self.directory.name, name)
+
+    def test_reservations(self):
+        """Test that reservations read back in order, by key and by room."""
+        reservations = [
+            reservation("R3", "102", "2024-02-01", "2024-02-03"),
+            reservation("R1", "101", "2024-03-01", "2024-03-02"),
+            dict(reservation("R2", "101", "2024-01-01", "2024-01-05"), note="late arrival"),
+            reservation("R4", "101", "2024-01-01", "2024-01-02", hotel_id="H002"),
+        ]
+        write_snapshot(self.path('reservations.snap'), reservations, 'reservation_id')
+
+        with Snapshot(self.path('reservations.snap')) as snapshot:
+            self.assertEqual(list(snapshot), reservations)
+            self.assertEqual(snapshot.key, 'reservation_id')
+            self.assertEqual(snapshot.get("R2")['note'], "late arrival")
+            self.assertIsNone(snapshot.get("R9"))
+            self.assertIsNone(snapshot.get("H001"))
+            self.assertEqual([r['reservation_id']
+                              for r in snapshot.room_reservations("H001", "101")],
+                             ["R2", "R1"])
+            self.assertEqual(snapshot.room_reservations("H001", "103"), [])
+            self.assertIs(snapshot.record(0)['hotel_id'], snapshot.record(1)['hotel_id'])
+
+    def test_hotels_and_empty_snapshots(self):
+        """Test a snapshot of hotels and a snapshot without records."""
+        hotels = [{'hotel_id': "002", 'name': "Β", 'rooms': [{'room_id': "1", 'price': 9}]},
+                  {'hotel_id': "001", 'name': "A", 'rooms': []}]
+        write_snapshot(self.path('hotels.snap'), hotels, 'hotel_id')
+        write_snapshot(self.path('empty.snap'), [], 'reservation_id')
+
+        with Snapshot(self.path('hotels.snap')) as snapshot:
+            self.assertEqual(list(snapshot), hotels)
+            self.assertEqual(snapshot.get("002")['name'], "Β")
+            with self.assertRaises(ValueError):
+                snapshot.room_reservations("002", "1")
+        with Snapshot(self.path('empty.snap')) as snapshot:
+            self.assertEqual((len(snapshot), snapshot.get("R1")), (0, None))
+
+    def test_invalid_input(self):
+        """Test that unstorable reservations and files that are not snapshots are rejected."""
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path('bad.snap'),
+                           [reservation("R1", "101", "2024-13-01", "2024-13-02")],
+                           'reservation_id')
+        self.assertFalse(os.path.exists(self.path('bad.snap')))
+        write_json(self.path('hotels.json'), [])
+        with self.assertRaises(ValueError):
+            Snapshot(self.path('hotels.json'))
+
+    def test_export_and_import(self):
+        """Test converting a JSON file to a snapshot and back, also from the command line."""
+        reservations = [reservation(f"R{number}", "101", f"2024-01-{number:02d}",
+                                    f"2024-01-{number:02d}") for number in range(1, 6)]
+        write_json(self.path('reservations.json'), reservations)
+
+        self.assertEqual(export_json(self.path('reservations.json'),
+                                     self.path('reservations.snap')), 5)
+        self.assertEqual(import_json(self.path('reservations.snap'), self.path('copy.json')), 5)
+        self.assertEqual(read_json(self.path('copy.json')), reservations)
+
+        with redirect_stdout(StringIO()) as output:
+            main(['import', self.path('reservations.snap'), self.path('cli.json')])
+        self.assertIn("Imported 5 records", output.getvalue())
+        self.assertEqual(read_json(self.path('cli.json')), reservations)
+
+
+class TestSnapshotBackend(unittest.TestCase):
+    """Tests running the Hotel and Reservation classes on the snapshot backend."""
+
+    def test_reserve_and_cancel(self):
+        """Test booking, refusing an overlap, canceling and reopening the store."""
+        with tempfile.TemporaryDirectory() as directory:
+            with use(Store.open(directory, 'snapshot')) as store:
+                Hotel({'hotel_id': "001", 'name': "Hotel", 'location': "Here",
+                       'rooms': [{'room_id': "101", 'type': "Single", 'price': 100}],
+                       'amenities': []}).create_hotel()
+                first = Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+                self.assertFalse(
+                    Hotel.reserve_room("001", "C002", "101", "2024-01-03", "2024-01-04"))
+                Hotel.reserve_room("001", "C002", "101", "2024-01-06", "2024-01-07")
+                self.assertTrue(Hotel.cancel_reservation(first.record['reservation_id']))
+                self.assertEqual(store.reservations.storage.get(first.record['reservation_id']),
+                                 None)
+
+            with use(Store.open(directory, 'snapshot')):
+                self.assertEqual([r['customer_id'] for r in Reservation.load_reservations()],
+                                 ["C002"])
+                self.assertEqual(Hotel.get_room("001", "101")['price'], 100)
+            self.assertTrue(os.path.exists(os.path.join(directory, 'reservations.snap')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+This module contains unit tests for the SQLite storage backend.
+It tests record operations, the indexed overlap query, the JSON migration tool,
+and running the Hotel and Reservation classes on top of SQLite.
+"""
+
+import os
+import tempfile
+import unittest
+from customer import Customer
+from hotel import Hotel
+from ids import IdAllocator
+from reservation import Reservation
+from sqlite_storage import SqliteStorage, close_connections, migrate_json
+from storage import write_json
+from store import Store, activate, deactivate
+
+
+class TestSqliteStorage(unittest.TestCase):
+    """Tests for the SqliteStorage class."""
+
+    def setUp(self):
+        """Create a database in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, 'hotel.db')
+        self.storage = SqliteStorage(self.database, 'reservations')
+
+    def tearDown(self):
+        """Close the connections and remove the temporary directory."""
+        close_connections()
+        self.directory.cleanup()
+
+    @staticmethod
+    def reservation(reservation_id, room_id, start_date, end_date):
+        """Build a reservation record for the tests."""
+        return {
+            'reservation_id': reservation_id,
+            'customer_id': "C001",
+            'hotel_id': "H001",
+            'room_id': room_id,
+            'start_date': start_date,
+            'end_date': end_date
+        }
+
+    def test_record_operations(self):
+        """Test create, modify, delete and load."""
+        self.storage.create(self.reservation("R1", "101", "2024-01-01", "2024-01-05"))
+        self.storage.create_many([
+            self.reservation("R2", "102", "2024-01-01", "2024-01-05"),
+            self.reservation("R3", "103", "2024-01-01", "2024-01-05"),
+        ])
+
+        self.assertEqual(self.storage.modify("R2", {'room_id': "104"})['room_id'], "104")
+        self.assertIsNone(self.storage.modify("R9", {'room_id': "104"}))
+        self.assertTrue(self.storage.delete("R1"))
+        self.assertFalse(self.storage.delete("R1"))
+
+        self.assertEqual([(r['reservation_id'], r['room_id']) for r in self.storage.load()],
+                         [("R2", "104"), ("R3", "103")])
+
+    def test_delete_many_and_select(self):
+        """Test removing several records at once and selecting records by a column."""
+        self.storage.create_many([
+            self.reservation(f"R{number}", "101", f"2024-01-0{number}", f"2024-01-0{number}")
+            for number in range(1, 5)
+        ])
+        signature = self.storage.signature()
+        self.storage.delete_many(["R1", "R3", "R9"])
+
+        self.assertNotEqual(self.storage.signature(), signature)
+        self.assertEqual([r['reservation_id'] for r in self.storage.select('hotel_id', "H001")],
+                         ["R2", "R4"])
+        self.assertEqual(self.storage.select('customer_id', "C002"), [])
+        with self.assertRaises(ValueError):
+            self.storage.select('data', "{}")
+
+    def test_overlapping_uses_index(self):
+        """Test the overlap query and that it is answered from the room/date index."""
+        self.storage.save([
+            self.reservation("R1", "101", "2024-01-01", "2024-01-05"),
+            self.reservation("R2", "101", "2024-01-10", "2024-01-12"),
+            self.reservation("R3", "102", "2024-01-01", "2024-01-31"),
+        ])
+
+        conflicts = self.storage.overlapping("H001", "101", "2024-01-05", "2024-01-10")
+        self.assertEqual([r['reservation_id'] for r in conflicts], ["R1", "R2"])
+        self.assertEqual(self.storage.overlapping("H001", "101", "2024-01-06", "2024-01-09"), [])
+
+        plan = self.storage.connection.execute(
+            'EXPLAIN QUERY PLAN SELECT data FROM reservations WHERE hotel_id = ? '
+            'AND room_id = ? AND start_date <= ? AND end_date >= ?', ("H", "1", "2", "3")
+        ).fetchall()
+        self.assertIn('reservations_room_dates', str(plan))
+
+    def test_wal_mode(self):
+        """Test that databases are opened in WAL mode."""
+        mode = self.storage.connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_migrate_json(self):
+        """Test importing the JSON files."""
+        paths = {}
+        for name, records in (
+                ('hotels', [{'hotel_id': "001", 'name': "Hotel", 'location': "Here",
+                             'rooms': [{'room_id': "101", 'type': "Single", 'price': 100}],
+                             'amenities': ["WiFi"]}]),
+                ('customers', []),
+                ('reservations', [self.reservation("R1", "101", "2024-01-01", "2024-01-05")])):
+            paths[name] = os.path.join(self.directory.name, f'{name}.json')
+            write_json(paths[name], records)
+        IdAllocator(paths['reservations'] + '.seq').allocate(5)
+
+        counts = migrate_json(self.database, **paths)
+
+        self.assertEqual(counts, {'hotels': 1, 'customers': 0, 'reservations': 1})
+        hotel = SqliteStorage(self.database, 'hotels').get("001")
+        self.assertEqual(hotel['rooms'][0]['price'], 100)
+        self.assertEqual(IdAllocator(self.database + '.seq').next_id(), "R000000000006")
+
+
+class TestSqliteBackedClasses(unittest.TestCase):
+    """Tests running the Hotel and Reservation classes on SQLite."""
+
+    def setUp(self):
+        """Use a SQLite store in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.token = activate(Store.open(self.directory.name, 'sqlite'))
+
+    def tearDown(self):
+        """Restore the previous store and remove the database."""
+        deactivate(self.token)
+        close_connections()
+        self.directory.cleanup()
+
+    def test_reserve_and_cancel(self):
+        """Test reserving, refusing an overlap and canceling."""
+        Hotel({'hotel_id': "001", 'name': "Hotel", 'location': "Here",
+               'rooms': [{'room_id': "101", 'type': "Single", 'price': 100}],
+               'amenities': []}).create_hotel()
+
+        self.assertTrue(Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-05"))
+        result = Hotel.reserve_room("001", "C002", "101", "2024-01-03", "2024-01-04")
+        self.assertEqual(len(result.conflicts), 1)
+        reservation_id = Reservation.load_reservations()[0]['reservation_id']
+        self.assertTrue(Hotel.cancel_reservation(reservation_id).success)
+        self.assertEqual(Reservation.repository.storage.load(), [])
+        self.assertEqual(Hotel.repository.get("001")['name'], "Hotel")
+
+    def test_bookings_use_the_database_index(self):
+        """Test that booking and canceling query SQLite instead of loading every reservation."""
+        first = Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+        refused = Hotel.reserve_room("001", "C002", "101", "2024-01-05", "2024-01-06")
+        self.assertEqual(refused.conflicts[0]['reservation_id'],
+                         first.record['reservation_id'])
+        self.assertTrue(Hotel.cancel_reservation(first.record['reservation_id']))
+        self.assertTrue(Hotel.reserve_room("001", "C002", "101", "2024-01-05", "2024-01-06"))
+        self.assertEqual(Reservation.repository.misses, 0)
+        self.assertEqual(len(Reservation.load_reservations()), 1)
+
+    def test_cascading_deletes(self):
+        """Test deleting a hotel and a customer along with their reservations."""
+        Hotel({'hotel_id': "001", 'name': "Hotel", 'location': "Here",
+               'rooms': [{'room_id': "101", 'type': "Single", 'price': 100}],
+               'amenities': []}).create_hotel()
+        Customer("C001", "John Doe", "john@example.com", "555").create_customer()
+        Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+        Hotel.reserve_room("002", "C001", "101", "2024-01-01", "2024-01-05")
+        Hotel.reserve_room("002", "C002", "102", "2024-01-01", "2024-01-05")
+
+        self.assertEqual(len(Customer.delete_customer("C001").conflicts), 2)
+        self.assertEqual(len(Hotel.delete_hotel("001").conflicts), 1)
+        self.assertTrue(Hotel.delete_hotel("001", cascade=True).success)
+        self.assertEqual(len(Reservation.find_by_customer("C001")), 1)
+        self.assertTrue(Customer.delete_customer("C001", cascade=True).success)
+        self.assertEqual([r['customer_id'] for r in Reservation.load_reservations()], ["C002"])
+
+    def test_tables_have_their_own_signature(self):
+        """Test that writing one table does not invalidate the cache of another."""
+        Hotel({'hotel_id': "001", 'name': "Hotel", 'location': "Here",
+               'rooms': [{'room_id': "101", 'type': "Single", 'price': 100}],
+               'amenities': []}).create_hotel()
+        Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-05")
+        Reservation.load_reservations()
+        generation = Reservation.repository.generation
+        signature = Reservation.repository.storage.signature()
+
+        Hotel.modify_hotel_info("001", name="Renamed")
+
+        self.assertEqual(Reservation.repository.storage.signature(), signature)
+        Reservation.load_reservations()
+        self.assertEqual(Reservation.repository.generation, generation)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+This module contains unit tests for the storage backends.
+It tests the JSON file backend and the journal backend, including replay of the journal
+on startup, recovery from a torn last line, and compaction into the snapshot.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from storage import JsonFileStorage, JournalStorage, read_json
+
+
+class TestJsonFileStorage(unittest.TestCase):
+    """Tests for the JsonFileStorage class."""
+
+    def setUp(self):
+        """Create a storage in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'hotels.json')
+        self.storage = JsonFileStorage(self.path, 'hotel_id')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_create_modify_delete(self):
+        """Test that mutations are written to the JSON file."""
+        self.storage.create({'hotel_id': "001", 'name': "First"})
+        self.storage.create({'hotel_id': "002", 'name': "Second"})
+
+        updated = self.storage.modify("001", {'name': "Renamed"})
+        self.assertEqual(updated, {'hotel_id': "001", 'name': "Renamed"})
+        self.assertIsNone(self.storage.modify("999", {'name': "Missing"}))
+
+        self.assertTrue(self.storage.delete("002"))
+        self.assertFalse(self.storage.delete("002"))
+        self.assertEqual(read_json(self.path), [{'hotel_id': "001", 'name': "Renamed"}])
+
+    def test_delete_many(self):
+        """Test that several records are removed with one write, skipping unknown keys."""
+        self.storage.save([{'hotel_id': f"00{number}"} for number in range(4)])
+        self.storage.delete_many(["001", "003", "999"])
+        self.assertEqual(read_json(self.path), [{'hotel_id': "000"}, {'hotel_id': "002"}])
+
+    def test_load_missing_file(self):
+        """Test that a missing file loads as an empty collection."""
+        self.assertEqual(self.storage.load(), [])
+
+
+class TestJournalStorage(unittest.TestCase):
+    """Tests for the JournalStorage class."""
+
+    def setUp(self):
+        """Create a journal storage in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'reservations.json')
+        self.storage = JournalStorage(self.path, 'reservation_id', compact_every=None)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def reopen(self):
+        """Return a fresh storage over the same files, as after a restart."""
+        return JournalStorage(self.path, 'reservation_id', compact_every=None)
+
+    def journal_lines(self):
+        """Return the decoded lines of the journal file."""
+        with open(self.storage.journal_path, 'r', encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_mutations_append_to_journal(self):
+        """Test that mutations append entries instead of rewriting the snapshot."""
+        self.storage.save([{'reservation_id': "R1", 'room_id': "101"}])
+        snapshot_before = read_json(self.path)
+
+        self.storage.create({'reservation_id': "R2", 'room_id': "102"})
+        self.storage.modify("R1", {'room_id': "103"})
+        self.storage.delete("R2")
+
+        self.assertEqual(read_json(self.path), snapshot_before)
+        self.assertEqual([entry['op'] for entry in self.journal_lines()],
+                         ['create', 'modify', 'delete'])
+        self.assertEqual(self.storage.load(), [{'reservation_id': "R1", 'room_id': "103"}])
+
+    def test_create_many(self):
+        """Test that a batch of records is journaled as one create entry per record."""
+        self.storage.create_many([{'reservation_id': f"R{number}", 'room_id': "101"}
+                                  for number in range(3)])
+
+        self.assertEqual(len(self.journal_lines()), 3)
+        self.assertEqual(len(self.reopen().load()), 3)
+
+    def test_delete_many(self):
+        """Test that deleting several records journals one entry per removed record."""
+        self.storage.save([{'reservation_id': f"R{number}"} for number in range(3)])
+        self.storage.delete_many(["R0", "R2", "R2", "R9"])
+
+        self.assertEqual([entry['key'] for entry in self.journal_lines()], ["R0", "R2"])
+        self.assertEqual(self.reopen().load(), [{'reservation_id': "R1"}])
+
+    def test_replay_on_startup(self):
+        """Test that a new instance replays the journal on top of the snapshot."""
+        self.storage.create({'reservation_id': "R1", 'room_id': "101"})
+        self.storage.create({'reservation_id': "R2", 'room_id': "102"})
+        self.storage.delete("R1")
+
+        self.assertEqual(self.reopen().load(), [{'reservation_id': "R2", 'room_id': "102"}])
+
+    def test_follows_appends_from_other_instances(self):
+        """Test that appends made through another instance are picked up on load."""
+        self.storage.create({'reservation_id': "R1", 'room_id': "101"})
+        other = self.reopen()
+        other.create({'reservation_id': "R2", 'room_id': "102"})
+
+        self.assertEqual([r['reservation_id'] for r in self.storage.load()], ["R1", "R2"])
+
+    def test_torn_last_line_is_ignored_and_repaired(self):
+        """Test recovery from a crash in the middle of a journal append."""
+        self.storage.create({'reservation_id': "R1", 'room_id': "101"})
+        with open(self.storage.journal_path, 'ab') as file:
+            file.write(b'{"op": "create", "record": {"reservation_')
+
+        storage = self.reopen()
+        self.assertEqual([r['reservation_id'] for r in storage.load()], ["R1"])
+
+        storage.create({'reservation_id': "R3", 'room_id': "103"})
+        self.assertEqual(len(self.journal_lines()), 2)
+        self.assertEqual([r['reservation_id'] for r in self.reopen().load()], ["R1", "R3"])
+
+    def test_compaction(self):
+        """Test that compaction folds the journal into the snapshot."""
+        storage = JournalStorage(self.path, 'reservation_id', compact_every=3)
+        for number in range(4):
+            storage.create({'reservation_id': f"R{number}", 'room_id': "101"})
+
+        self.assertEqual(len(read_json(self.path)), 3)
+        self.assertEqual(len(self.journal_lines()), 1)
+
+        storage.compact()
+        self.assertEqual(len(read_json(self.path)), 4)
+        self.assertEqual(self.journal_lines(), [])
+        self.assertEqual(len(self.reopen().load()), 4)
+
+    def test_replay_after_interrupted_compaction(self):
+        """Test that replaying a journal already folded into the snapshot is harmless."""
+        self.storage.create({'reservation_id': "R1", 'room_id': "101"})
+        self.storage.modify("R1", {'room_id': "102"})
+        self.storage.create({'reservation_id': "R2", 'room_id': "103"})
+        self.storage.delete("R2")
+        with open(self.storage.journal_path, 'rb') as file:
+            journal = file.read()
+
+        self.storage.compact()
+        with open(self.storage.journal_path, 'wb') as file:
+            file.write(journal)
+
+        self.assertEqual(self.reopen().load(), [{'reservation_id': "R1", 'room_id': "102"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+This module contains unit tests for the Store and ShardedStore classes.
+It tests that stores in different directories are isolated, that the current store
+follows use() and the current context, each backend, and routing and merging over shards.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from customer import Customer
+from hotel import Hotel
+from reservation import Reservation
+from sharding import ShardedStore
+from sqlite_storage import close_connections
+from store import BACKENDS, Store, current_store, default_store, use
+
+
+def hotel(hotel_id, price, location="Lisbon"):
+    """Return a hotel with one single room."""
+    return {'hotel_id': hotel_id, 'name': f"Hotel {hotel_id}", 'location': location,
+            'rooms': [{"room_id": "101", "type": "Single", "price": price}],
+            'amenities': []}
+
+
+class TestStore(unittest.TestCase):
+    """Tests for the Store class and the current store."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Close the SQLite connections and remove the temporary directory."""
+        close_connections()
+        self.directory.cleanup()
+
+    def path(self, *names):
+        """Return a path in the temporary directory."""
+        return os.path.join(self.directory.name, *names)
+
+    def test_stores_are_isolated(self):
+        """Test that two stores in one process keep their own data."""
+        first, second = Store.open(self.path('a')), Store.open(self.path('b'))
+        with use(first):
+            Hotel(hotel("001", 100)).create_hotel()
+            Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-02")
+        with use(second):
+            self.assertEqual(Hotel.load_hotels(), [])
+            self.assertTrue(Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-02"))
+
+        self.assertEqual(len(first.reservations.load()), 1)
+        self.assertEqual(len(second.reservations.load()), 1)
+        self.assertTrue(os.path.exists(self.path('a', 'hotels.json')))
+
+    def test_current_store(self):
+        """Test that use() nests and restores the previous store."""
+        store = Store.open(self.path())
+        self.assertIs(current_store(), default_store())
+        with use(store):
+            self.assertIs(Reservation.repository, store.reservations)
+            with use(Store.open(self.path('inner'))):
+                self.assertIsNot(Customer.repository, store.customers)
+            self.assertIs(Customer.repository, store.customers)
+        self.assertIs(current_store(), default_store())
+
+    def test_threads_do_not_share_the_current_store(self):
+        """Test that a store made current in one thread is not current in another."""
+        seen = []
+        with use(Store.open(self.path())):
+            thread = threading.Thread(target=lambda: seen.append(current_store()))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [default_store()])
+
+    def test_backends(self):
+        """Test booking and reading back on every backend."""
+        for backend in BACKENDS:
+            with use(Store.open(self.path(backend), backend)) as store:
+                Hotel(hotel("001", 100)).create_hotel()
+                Customer("C001", "John Doe", "john@example.com", "555").create_customer()
+                result = Hotel.reserve_room("001", "C001", "101", "2024-01-01", "2024-01-02")
+                self.assertTrue(result.success)
+                self.assertEqual(result.record['reservation_id'], "R000000000001")
+                self.assertEqual(len(store.reservations.storage.load()), 1)
+        self.assertTrue(os.path.exists(self.path('sqlite', 'hotel.db')))
+        with self.assertRaises(ValueError):
+            Store.open(self.path(), 'csv')
+
+
+class TestShardedStore(unittest.TestCase):
+    """Tests for the ShardedStore class."""
+
+    def setUp(self):
+        """Open two shards routed by the first letter of the hotel ID."""
+        self.directory = tempfile.TemporaryDirectory()
+        directories = {name: os.path.join(self.directory.name, name) for name in 'ab'}
+        self.sharded = ShardedStore.open(
+            directories, os.path.join(self.directory.name, 'shared'),
+            route=lambda hotel_id: hotel_id[0])
+        for hotel_id, price in (("a1", 120), ("b1", 80), ("a2", 100)):
+            with self.sharded.use(hotel_id):
+                Hotel(hotel(hotel_id, price)).create_hotel()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_routing_and_shared_state(self):
+        """Test that hotels land in their shard, sharing customers and reservation IDs."""
+        self.assertEqual([h['hotel_id'] for h in self.sharded.shards['a'].hotels.load()],
+                         ["a1", "a2"])
+        with self.sharded.use("a1"):
+            Customer("C001", "John Doe", "john@example.com", "555").create_customer()
+            first = Hotel.reserve_room("a1", "C001", "101", "2024-01-01", "2024-01-02")
+        with self.sharded.use("b1"):
+            self.assertIsNotNone(Customer.repository.get("C001"))
+            second = Hotel.reserve_room("b1", "C001", "101", "2024-01-01", "2024-01-02")
+
+        ids = [first.record['reservation_id'], second.record['reservation_id']]
+        self.assertEqual(len(set(ids)), 2)
+        self.assertIs(self.sharded.shard_of_reservation(ids[1]), self.sharded.shards['b'])
+        self.assertIsNone(self.sharded.shard_of_reservation("R999"))
+        self.assertEqual([r['hotel_id'] for r in self.sharded.iter_reservations()],
+                         ["a1", "b1"])
+        self.assertEqual(len(list(self.sharded.iter_reservations("b1"))), 1)
+
+    def test_find_available_rooms_merges_shards(self):
+        """Test that rooms from every shard come back cheapest first."""
+        with self.sharded.use("a2"):
+            Hotel.reserve_room("a2", "C001", "101", "2024-01-01", "2024-01-02")
+
+        rooms = self.sharded.find_available_rooms("Lisbon", "2024-01-01", "2024-01-01")
+        self.assertEqual([room['hotel_id'] for room in rooms], ["b1", "a1"])
+
+    def test_delete_customer_across_shards(self):
+        """Test that deleting a customer checks and cancels their reservations in every shard."""
+        with self.sharded.use("a1"):
+            Customer("C001", "John Doe", "john@example.com", "555").create_customer()
+            Hotel.reserve_room("a1", "C001", "101", "2024-01-01", "2024-01-02")
+        with self.sharded.use("b1"):
+            Hotel.reserve_room("b1", "C001", "101", "2024-01-01", "2024-01-02")
+            Hotel.reserve_room("b1", "C002", "101", "2024-02-01", "2024-02-02")
+
+        result = self.sharded.delete_customer("C001")
+        self.assertEqual([r['hotel_id'] for r in result.conflicts], ["a1", "b1"])
+        self.assertTrue(self.sharded.delete_customer("C001", cascade=True).success)
+        self.assertEqual([r['customer_id'] for r in self.sharded.iter_reservations()], ["C002"])
+        self.assertFalse(self.sharded.delete_customer("C001").success)
+
+    def test_hash_route_is_stable(self):
+        """Test that the default route sends a hotel to the same shard every time."""
+        sharded = ShardedStore(self.sharded.shards)
+        self.assertIs(sharded.shard_for("a1"), sharded.shard_for("a1"))
+        self.assertIn(sharded.route("x9"), ('a', 'b'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+This module contains unit tests for the streaming readers and writers.
+It tests the incremental JSON array parser across chunk boundaries, JSON Lines input and
+output, file conversion, and lazy iteration and export of reservations.
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from itertools import islice
+from repository import Repository
+from reservation import Reservation
+from sqlite_storage import SqliteStorage, close_connections
+from storage import read_json, write_json
+from store import Store, activate, deactivate
+from streaming import (convert, export_collection, import_collection, iter_file,
+                       iter_json_array, write_file, write_json_array)
+
+
+def reservation(reservation_id, hotel_id, start_date, end_date):
+    """Build a reservation record for the tests."""
+    return {
+        'reservation_id': reservation_id,
+        'customer_id': "C001",
+        'hotel_id': hotel_id,
+        'room_id': "101",
+        'start_date': start_date,
+        'end_date': end_date
+    }
+
+
+class TestJsonArray(unittest.TestCase):
+    """Tests for the incremental JSON array reader and writer."""
+
+    records = [
+        {'id': 1, 'name': "Hotel \"One\", [main]", 'nested': {'list': [1, 2.5, None]}},
+        {'id': 22, 'name': "Dos\n", 'nested': {}},
+        12345,
+        "text",
+    ]
+
+    def test_parse_across_chunk_boundaries(self):
+        """Test that every chunk size yields the same elements as json.loads."""
+        text = json.dumps(self.records, indent=4)
+        for chunk_size in (1, 2, 3, 7, 64, 65536):
+            parsed = list(iter_json_array(io.StringIO(text), chunk_size))
+            self.assertEqual(parsed, self.records, chunk_size)
+
+    def test_parse_is_lazy(self):
+        """Test that elements are yielded before the end of the input is read."""
+        text = '[{"id": 1}, {"id": 2}, this is not JSON'
+        records = iter_json_array(io.StringIO(text), chunk_size=4)
+        self.assertEqual(list(islice(records, 2)), [{'id': 1}, {'id': 2}])
+        with self.assertRaises(ValueError):
+            next(records)
+
+    def test_parse_empty_and_invalid(self):
+        """Test empty arrays and content that is not an array."""
+        self.assertEqual(list(iter_json_array(io.StringIO(' [ ] '))), [])
+        for text in ('', '{"id": 1}', '[1 2]'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(io.StringIO(text)))
+
+    def test_writer_matches_json_dump(self):
+        """Test that the streaming writer produces the same text as json.dump."""
+        for records in (self.records, []):
+            output = io.StringIO()
+            count = write_json_array(output, iter(records))
+            self.assertEqual(count, len(records))
+            self.assertEqual(output.getvalue(), json.dumps(records, indent=4))
+
+
+class TestFiles(unittest.TestCase):
+    """Tests for file level streaming, conversion and the repository helpers."""
+
+    def setUp(self):
+        """Create a temporary directory and use a store kept in it."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'reservations.json')
+        self.token = activate(Store.open(self.directory.name))
+        write_json(self.path, [
+            reservation("R1", "H001", "2024-01-01", "2024-01-05"),
+            reservation("R2", "H002", "2024-01-03", "2024-01-04"),
+            reservation("R3", "H001", "2024-02-01", "2024-02-03"),
+        ])
+
+    def tearDown(self):
+        """Restore the previous store and remove the temporary directory."""
+        deactivate(self.token)
+        close_connections()
+        self.directory.cleanup()
+
+    def file(self, name):
+        """Return the path of a file in the temporary directory."""
+        return os.path.join(self.directory.name, name)
+
+    def test_convert_between_formats(self):
+        """Test converting a JSON array to JSON Lines and back, with a filter."""
+        jsonl = self.file('reservations.jsonl')
+        self.assertEqual(convert(self.path, jsonl), 3)
+        with open(jsonl, encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 3)
+
+        copy = self.file('copy.json')
+        count = convert(jsonl, copy, lambda record: record['hotel_id'] == "H001")
+        self.assertEqual(count, 2)
+        self.assertEqual([r['reservation_id'] for r in read_json(copy)], ["R1", "R3"])
+        self.assertEqual(list(iter_file(self.file('missing.jsonl'))), [])
+
+    def test_iter_reservations(self):
+        """Test filtering by hotel and by overlapping period, from disk and from cache."""
+        def ids(**filters):
+            return [r['reservation_id'] for r in Reservation.iter_reservations(**filters)]
+
+        for _ in range(2):
+            self.assertEqual(ids(), ["R1", "R2", "R3"])
+            self.assertEqual(ids(hotel_id="H001"), ["R1", "R3"])
+            self.assertEqual(ids(date_range=("2024-01-05", "2024-02-01")), ["R1", "R3"])
+            self.assertEqual(ids(hotel_id="H002", date_range=("2024-01-04", "2024-01-10")),
+                             ["R2"])
+            Reservation.load_reservations()
+        with self.assertRaises(ValueError):
+            ids(date_range=("2024-02-01", "2024-01-01"))
+
+    def test_export_and_import(self):
+        """Test exporting a repository to JSON Lines and importing it into SQLite in batches."""
+        jsonl = self.file('export.jsonl')
+        count = export_collection(Reservation.repository, jsonl,
+                                  lambda record: record['hotel_id'] == "H001")
+        self.assertEqual(count, 2)
+
+        target = Repository(SqliteStorage(self.file('hotel.db'), 'reservations'))
+        self.assertEqual(import_collection(target, self.path, batch_size=2), 3)
+        self.assertEqual([r['reservation_id'] for r in target.storage.iter_records()],
+                         ["R1", "R2", "R3"])
+        self.assertEqual(import_collection(target, jsonl), 2)
+        self.assertEqual(len(target.load()), 3)
+
+    def test_imported_reservations_are_checked_for_conflicts(self):
+        """Test that reservations imported into the repository reach the overlap index."""
+        self.assertEqual(Reservation.find_conflicts("H003", "101", "2024-01-02", "2024-01-03"),
+                         [])
+        imported = self.file('imported.jsonl')
+        write_file(imported, [reservation("X1", "H003", "2024-01-01", "2024-01-05")])
+        import_collection(Reservation.repository, imported)
+
+        conflicts = Reservation.find_conflicts("H003", "101", "2024-01-02", "2024-01-03")
+        self.assertEqual([r['reservation_id'] for r in conflicts], ["X1"])
+
+
+if __name__ == '__main__':
+    unittest.main()